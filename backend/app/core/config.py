@@ -5,6 +5,20 @@ class Settings(BaseSettings):
     APP_NAME: str = "SistemaComercio"
     API_V1_PREFIX: str = "/api/v1"
 
+    # Servidor (gunicorn.conf.py). Cada worker tiene su propio pool, así que
+    # WEB_WORKERS=0 usa un worker por CPU pero nunca más de los que entran en
+    # DB_MAX_CONNECTIONS con DB_POOL_SIZE + DB_MAX_OVERFLOW conexiones cada uno.
+    WEB_HOST: str = "0.0.0.0"
+    WEB_PORT: int = 8000
+    WEB_WORKERS: int = 0
+    WEB_KEEPALIVE: int = 5
+    WEB_BACKLOG: int = 2048
+    WEB_LIMIT_CONCURRENCY: int = 0
+    WEB_MAX_REQUESTS: int = 0
+    WEB_MAX_REQUESTS_JITTER: int = 0
+    WEB_TIMEOUT: int = 120
+    WEB_GRACEFUL_TIMEOUT: int = 30
+
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "1234"
     POSTGRES_DB: str = "SistemaComercio"
@@ -12,10 +26,80 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = 5432
     DATABASE_SSL_MODE: str = "prefer"
 
+    # Pool de conexiones (por proceso/worker)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_USE_LIFO: bool = False
+    # Conexiones que puede abrir el backend entre todos los workers; por debajo
+    # de max_connections de PostgreSQL (100 por defecto) para dejar lugar a
+    # migraciones, psql y los procesos de exportación
+    DB_MAX_CONNECTIONS: int = 80
+
+    # Al arrancar, abrir DB_POOL_SIZE conexiones para que los primeros requests no esperen
+    DB_POOL_WARMUP: bool = True
+
+    # Al arrancar, avisar en el log si faltan índices declarados en los modelos
+    DB_INDEX_CHECK_ON_STARTUP: bool = True
+
+    # Lecturas con SQLAlchemy async + asyncpg (materiales, costos, meses-jornada, catálogos)
+    DB_ASYNC_ENABLED: bool = False
+
+    LOG_LEVEL: str = "INFO"
+
+    # Cache de la tabla configuracion: se invalida por LISTEN/NOTIFY y vence igual a los N segundos
+    CONFIG_CACHE_TTL_S: float = 60.0
+    CONFIG_LISTEN_ENABLED: bool = True
+
+    # Secciones de presupuesto de obra cacheadas por worker (se invalidan por tabla_versiones)
+    PRESUPUESTO_CACHE_MAX_ENTRADAS: int = 512
+
+    # /health/ready reutiliza el último SELECT 1 durante este tiempo
+    HEALTH_DB_CHECK_TTL_S: float = 5.0
+    # Tope de conexión y de sentencia del SELECT 1 (conexión propia, fuera del pool)
+    HEALTH_DB_CHECK_TIMEOUT_S: float = 2.0
+
     JWT_SECRET: str = "change_me_in_production"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 120
 
+    # Serialización JSON: orjson como clase de respuesta por defecto y, en los
+    # listados pesados, armar el JSON desde el ORM sin re-validar con Pydantic
+    JSON_FAST_RESPONSE: bool = True
+    TRUSTED_ORM_RESPONSES: bool = False
+
+    # /export: filas por lote del cursor del servidor (y por chunk enviado)
+    EXPORT_YIELD_PER: int = 1000
+
+    # /materiales/excel: procesos que arman las hojas (0 = núcleos, hasta 4),
+    # carpeta de trabajos (vacío = temp del sistema) y cuánto se guardan
+    EXCEL_EXPORT_WORKERS: int = 0
+    EXCEL_EXPORT_DIR: str = ""
+    EXCEL_EXPORT_TTL_S: int = 3600
+
+    # Métricas por ruta (/metrics, formato Prometheus) y header Server-Timing
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True
+
+    # Detector de N+1 (desarrollo/tests): consultas por request y formas repetidas
+    QUERY_GUARD_ENABLED: bool = False
+    QUERY_GUARD_MAX_QUERIES: int = 0
+    QUERY_GUARD_REPEAT_THRESHOLD: int = 5
+    QUERY_GUARD_RAISE: bool = False
+
+    # Compresión de respuestas: brotli si está brotli-asgi, si no gzip
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Hash de contraseñas (bcrypt) en un pool de hilos propio
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+
     @computed_field
     @property
     def DATABASE_URL(self) -> str:
@@ -25,6 +109,15 @@ class Settings(BaseSettings):
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}{ssl_part}"
         )
 
+    @computed_field
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        ssl_part = f"?ssl={self.DATABASE_SSL_MODE}" if self.DATABASE_SSL_MODE else ""
+        return (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+            f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}{ssl_part}"
+        )
+
     model_config = ConfigDict(
         env_file=".env",        # carga variables desde .env
         case_sensitive=True,    # diferencia mayúsculas/minúsculas
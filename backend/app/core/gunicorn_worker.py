@@ -0,0 +1,16 @@
+from uvicorn.workers import UvicornWorker as _BaseUvicornWorker
+
+from app.core.config import settings
+
+
+class UvicornWorker(_BaseUvicornWorker):
+    """
+    Worker de gunicorn con las opciones de uvicorn que gunicorn no expone.
+    Con limit_concurrency, por encima del límite uvicorn responde 503 en vez de
+    encolar requests que igual esperarían un slot del pool de la base.
+    """
+
+    CONFIG_KWARGS = {
+        **_BaseUvicornWorker.CONFIG_KWARGS,
+        "limit_concurrency": settings.WEB_LIMIT_CONCURRENCY or None,
+    }
@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, Sequence
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.async_session import get_async_db
+from app.db.session import get_db
+from app.services.versiones_tablas import VersionTabla, leer_versiones, leer_versiones_async
+
+
+def _a_utc(fecha: datetime) -> datetime:
+    # timestamptz llega en la TimeZone de la sesión; usegmt exige UTC
+    if fecha.tzinfo is None:
+        return fecha.replace(tzinfo=timezone.utc)
+    return fecha.astimezone(timezone.utc)
+
+
+def _aplicar_validadores(
+    request: Request,
+    response: Response,
+    tablas: Sequence[str],
+    versiones: Optional[Dict[str, VersionTabla]],
+) -> None:
+    if versiones is None:
+        return
+
+    # ETag débil: el cuerpo puede viajar comprimido o no, el contenido es el mismo
+    etag = 'W/"' + "-".join(f"{tabla}.{versiones[tabla][0]}" for tabla in tablas) + '"'
+    fechas = [actualizado for _, actualizado in versiones.values() if actualizado is not None]
+    last_modified = _a_utc(max(fechas)).replace(microsecond=0) if fechas else None
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags_cliente = {value.strip() for value in if_none_match.split(",")}
+        if etag in etags_cliente or "*" in etags_cliente:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    elif last_modified is not None:
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                desde = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                desde = None
+            if desde is not None and desde.tzinfo is not None and last_modified <= desde:
+                raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+
+
+def conditional_catalog(*tablas: str) -> Callable[..., None]:
+    """
+    Dependencia para GETs de catálogos: arma ETag/Last-Modified a partir de las
+    versiones de `tablas` y responde 304 si el cliente ya tiene esa versión.
+    """
+
+    def dependency(request: Request, response: Response, db: Session = Depends(get_db)) -> None:
+        _aplicar_validadores(request, response, tablas, leer_versiones(db, tablas))
+
+    return dependency
+
+
+def conditional_catalog_async(*tablas: str) -> Callable[..., Awaitable[None]]:
+    """Igual que conditional_catalog, para los routers con sesión async."""
+
+    async def dependency(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)) -> None:
+        _aplicar_validadores(request, response, tablas, await leer_versiones_async(db, tablas))
+
+    return dependency
@@ -0,0 +1,47 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+
+class EventLoopMonitor:
+    """
+    Mide el retraso del event loop: duerme `intervalo` segundos y registra cuánto
+    tarde se despertó. Un lag alto indica trabajo bloqueante dentro de handlers async.
+    """
+
+    def __init__(self, intervalo: float = 0.5) -> None:
+        self.intervalo = intervalo
+        self.ultimo_s = 0.0
+        self.max_s = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            inicio = time.perf_counter()
+            await asyncio.sleep(self.intervalo)
+            lag = max(time.perf_counter() - inicio - self.intervalo, 0.0)
+            self.ultimo_s = lag
+            self.max_s = max(self.max_s, lag)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "activo": self._task is not None,
+            "lag_ms": self.ultimo_s * 1000.0,
+            "lag_max_ms": self.max_s * 1000.0,
+        }
+
+
+loop_monitor = EventLoopMonitor()
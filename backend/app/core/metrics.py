@@ -0,0 +1,261 @@
+"""
+Métricas por ruta en memoria del proceso y exposición en formato Prometheus.
+
+Cada request abre un RequestStats en un ContextVar; los eventos de cursor de
+SQLAlchemy suman ahí el tiempo de base y la cantidad de consultas. Como
+run_in_threadpool copia el contexto, los handlers sync ven el mismo objeto.
+Con varios workers cada proceso expone sólo sus propias métricas.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+SIN_RUTA = "<sin_ruta>"
+
+
+class RequestStats:
+    __slots__ = ("inicio", "db_time_s", "queries")
+
+    def __init__(self) -> None:
+        self.inicio = time.perf_counter()
+        self.db_time_s = 0.0
+        self.queries = 0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+# ==================== Eventos de SQLAlchemy ====================
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_inicio", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get("metrics_inicio")
+    if not inicios:
+        return
+    duracion = time.perf_counter() - inicios.pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_time_s += duracion
+        stats.queries += 1
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("metrics_inicio"):
+        conn.info["metrics_inicio"].pop()
+
+
+# ==================== Registro ====================
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for idx, limite in enumerate(self.buckets):
+            if value <= limite:
+                self.counts[idx] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class _Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._duracion: Dict[Tuple[str, str, str], _Histogram] = {}
+        self._db: Dict[Tuple[str, str], _Histogram] = {}
+        self._queries: Dict[Tuple[str, str], _Histogram] = {}
+        self._tamanio: Dict[Tuple[str, str], _Histogram] = {}
+
+    def observe(self, method: str, route: str, status: int, duracion: float, stats: RequestStats, tamanio: int) -> None:
+        with self._lock:
+            self._get(self._duracion, (method, route, str(status)), LATENCY_BUCKETS).observe(duracion)
+            self._get(self._db, (method, route), LATENCY_BUCKETS).observe(stats.db_time_s)
+            self._get(self._queries, (method, route), QUERY_BUCKETS).observe(stats.queries)
+            self._get(self._tamanio, (method, route), SIZE_BUCKETS).observe(tamanio)
+
+    @staticmethod
+    def _get(store: Dict[Any, _Histogram], key: Any, buckets: Tuple[float, ...]) -> _Histogram:
+        hist = store.get(key)
+        if hist is None:
+            hist = store[key] = _Histogram(buckets)
+        return hist
+
+    def snapshot(self) -> Dict[str, List[Tuple[Tuple[str, ...], _Histogram]]]:
+        def copiar(store):
+            salida = []
+            for key, hist in sorted(store.items()):
+                copia = _Histogram(hist.buckets)
+                copia.counts = list(hist.counts)
+                copia.total = hist.total
+                copia.count = hist.count
+                salida.append((key, copia))
+            return salida
+
+        with self._lock:
+            return {
+                "duracion": copiar(self._duracion),
+                "db": copiar(self._db),
+                "queries": copiar(self._queries),
+                "tamanio": copiar(self._tamanio),
+            }
+
+
+registry = _Registry()
+
+
+# ==================== Middleware ====================
+
+def _route_template(scope: Dict[str, Any]) -> str:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or SIN_RUTA
+
+
+def _server_timing(stats: RequestStats, duracion: float) -> bytes:
+    return (
+        f'app;dur={duracion * 1000.0:.1f}, '
+        f'db;dur={stats.db_time_s * 1000.0:.1f};desc="{stats.queries} consultas"'
+    ).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro (sin BaseHTTPMiddleware, que no soporta bien streaming).
+    Registrarlo último para que sea el más externo y mida el tamaño ya comprimido.
+    """
+
+    def __init__(self, app, server_timing: bool = True) -> None:
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        estado = {"status": 500, "tamanio": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                estado["status"] = message["status"]
+                if self.server_timing:
+                    duracion = time.perf_counter() - stats.inicio
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(stats, duracion)))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                estado["tamanio"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            registry.observe(
+                scope["method"],
+                _route_template(scope),
+                estado["status"],
+                time.perf_counter() - stats.inicio,
+                stats,
+                estado["tamanio"],
+            )
+
+
+# ==================== Formato Prometheus ====================
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(nombres: Iterable[str], valores: Iterable[str], extra: str = "") -> str:
+    partes = [f'{nombre}="{_escape(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}"
+
+
+_LE_INF = 'le="+Inf"'
+
+
+def _render_histogram(
+    lineas: List[str],
+    nombre: str,
+    ayuda: str,
+    label_names: Tuple[str, ...],
+    series: List[Tuple[Tuple[str, ...], _Histogram]],
+) -> None:
+    lineas.append(f"# HELP {nombre} {ayuda}")
+    lineas.append(f"# TYPE {nombre} histogram")
+    for key, hist in series:
+        acumulado = 0
+        for limite, count in zip(hist.buckets, hist.counts):
+            acumulado += count
+            le = 'le="%g"' % limite
+            lineas.append(f"{nombre}_bucket{_labels(label_names, key, le)} {acumulado}")
+        lineas.append(f"{nombre}_bucket{_labels(label_names, key, _LE_INF)} {hist.count}")
+        lineas.append(f"{nombre}_sum{_labels(label_names, key)} {hist.total:.6f}")
+        lineas.append(f"{nombre}_count{_labels(label_names, key)} {hist.count}")
+
+
+def _render_gauges(lineas: List[str], prefijo: str, ayuda: str, valores: Dict[str, Any]) -> None:
+    for clave, valor in valores.items():
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            continue
+        nombre = f"{prefijo}_{clave}"
+        lineas.append(f"# HELP {nombre} {ayuda} ({clave})")
+        lineas.append(f"# TYPE {nombre} gauge")
+        lineas.append(f"{nombre} {valor}")
+
+
+def render_prometheus() -> str:
+    from app.core.security import password_pool_stats
+    from app.db.session import pool_stats
+
+    snap = registry.snapshot()
+    lineas: List[str] = []
+    _render_histogram(
+        lineas, "http_request_duration_seconds", "Latencia por ruta",
+        ("method", "route", "status"), snap["duracion"],
+    )
+    _render_histogram(
+        lineas, "http_request_db_seconds", "Tiempo en la base por request",
+        ("method", "route"), snap["db"],
+    )
+    _render_histogram(
+        lineas, "http_request_db_queries", "Consultas SQL por request",
+        ("method", "route"), snap["queries"],
+    )
+    _render_histogram(
+        lineas, "http_response_size_bytes", "Tamaño del cuerpo de la respuesta",
+        ("method", "route"), snap["tamanio"],
+    )
+    _render_gauges(lineas, "db_pool", "Pool de conexiones", pool_stats())
+    _render_gauges(lineas, "password_hash_pool", "Pool de hash de contraseñas", password_pool_stats())
+    return "\n".join(lineas) + "\n"
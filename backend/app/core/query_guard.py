@@ -0,0 +1,180 @@
+"""
+Detector opt-in de N+1: cuenta las consultas de cada request y marca las
+"formas" de SQL (literales y listas IN normalizadas) que se repiten más de un
+umbral, típico de lazy loads dentro de un loop.
+
+En la app se activa con QUERY_GUARD_ENABLED (loguea o, con QUERY_GUARD_RAISE,
+lanza QueryGuardError antes de enviar la respuesta). En tests se usa el
+context manager:
+
+    with query_guard(max_queries=10, repeat_threshold=3):
+        client.put("/api/v1/materiales/1", json=...)
+"""
+import logging
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_PARAM = re.compile(r"%\([^)]+\)s|\$\d+|:\w+|\?")
+_RE_IN_LIST = re.compile(r"\(\s*(?:\?\s*,\s*)+\?\s*\)")
+_RE_POSTCOMPILE = re.compile(r"\(?\s*__\[POSTCOMPILE_\w+\]\s*\)?")
+_RE_SPACES = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    forma = _RE_STRING.sub("?", statement)
+    forma = _RE_POSTCOMPILE.sub("(?)", forma)
+    forma = _RE_PARAM.sub("?", forma)
+    forma = _RE_NUMBER.sub("?", forma)
+    forma = _RE_IN_LIST.sub("(?)", forma)
+    return _RE_SPACES.sub(" ", forma).strip()
+
+
+class QueryGuardError(AssertionError):
+    pass
+
+
+class QueryGuard:
+    def __init__(self, max_queries: int = 0, repeat_threshold: int = 0) -> None:
+        self.max_queries = max_queries
+        self.repeat_threshold = repeat_threshold
+        self.total = 0
+        self.formas: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str) -> None:
+        forma = normalize_statement(statement)
+        with self._lock:
+            self.total += 1
+            self.formas[forma] += 1
+
+    def repetidas(self) -> Dict[str, int]:
+        if self.repeat_threshold <= 0:
+            return {}
+        return {forma: count for forma, count in self.formas.most_common() if count > self.repeat_threshold}
+
+    def problemas(self) -> List[str]:
+        problemas: List[str] = []
+        if self.max_queries > 0 and self.total > self.max_queries:
+            problemas.append(f"{self.total} consultas (máximo {self.max_queries})")
+        for forma, count in self.repetidas().items():
+            problemas.append(f"{count}x {forma[:200]}")
+        return problemas
+
+    def check(self, contexto: str = "") -> None:
+        problemas = self.problemas()
+        if problemas:
+            prefijo = f"{contexto}: " if contexto else ""
+            raise QueryGuardError(prefijo + "posible N+1 -> " + " | ".join(problemas))
+
+
+_request_guard: ContextVar[Optional[QueryGuard]] = ContextVar("query_guard", default=None)
+
+# Guards abiertos con query_guard(): TestClient ejecuta la app en otro hilo, así
+# que en tests no alcanza con el ContextVar y se registran a nivel proceso.
+_global_guards: List[QueryGuard] = []
+_global_lock = threading.Lock()
+_listener_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    guard = _request_guard.get()
+    if guard is not None:
+        guard.record(statement)
+    if _global_guards:
+        with _global_lock:
+            guards = list(_global_guards)
+        for guard in guards:
+            guard.record(statement)
+
+
+def install_listener() -> None:
+    global _listener_installed
+    with _global_lock:
+        if _listener_installed:
+            return
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        _listener_installed = True
+
+
+@contextmanager
+def query_guard(
+    max_queries: int = 0,
+    repeat_threshold: int = settings.QUERY_GUARD_REPEAT_THRESHOLD,
+    raise_on_exit: bool = True,
+) -> Iterator[QueryGuard]:
+    """Cuenta todas las consultas del proceso mientras está abierto."""
+    install_listener()
+    guard = QueryGuard(max_queries=max_queries, repeat_threshold=repeat_threshold)
+    with _global_lock:
+        _global_guards.append(guard)
+    try:
+        yield guard
+    finally:
+        with _global_lock:
+            _global_guards.remove(guard)
+    if raise_on_exit:
+        guard.check()
+
+
+class QueryGuardMiddleware:
+    """
+    Abre un QueryGuard por request y evalúa al terminar. Con raise_errors la
+    respuesta se retiene entera hasta evaluar (una respuesta en streaming
+    también puede consultar mientras genera el body), así el error sale como
+    500 en vez de cortar una respuesta ya empezada. Es un modo de desarrollo:
+    no usarlo con exportaciones grandes.
+    """
+
+    def __init__(
+        self,
+        app,
+        max_queries: int = 0,
+        repeat_threshold: int = 5,
+        raise_errors: bool = False,
+    ) -> None:
+        install_listener()
+        self.app = app
+        self.max_queries = max_queries
+        self.repeat_threshold = repeat_threshold
+        self.raise_errors = raise_errors
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        guard = QueryGuard(max_queries=self.max_queries, repeat_threshold=self.repeat_threshold)
+        contexto = f"{scope['method']} {scope.get('path', '')}"
+        retenidos: List[dict] = []
+
+        async def send_retenido(message) -> None:
+            retenidos.append(message)
+
+        token = _request_guard.set(guard)
+        try:
+            await self.app(scope, receive, send_retenido if self.raise_errors else send)
+        finally:
+            _request_guard.reset(token)
+
+        if self.raise_errors:
+            guard.check(contexto)
+            for message in retenidos:
+                await send(message)
+        else:
+            problemas = guard.problemas()
+            if problemas:
+                logger.warning("%s: posible N+1 -> %s", contexto, " | ".join(problemas))
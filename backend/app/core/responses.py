@@ -0,0 +1,28 @@
+from typing import Any, Mapping, Optional, Type
+
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+
+from app.core.config import settings
+
+try:
+    import orjson  # noqa: F401
+    _ORJSON_AVAILABLE = True
+except Exception:
+    _ORJSON_AVAILABLE = False
+
+
+def default_response_class() -> Type[JSONResponse]:
+    if settings.JSON_FAST_RESPONSE and _ORJSON_AVAILABLE:
+        return ORJSONResponse
+    return JSONResponse
+
+
+def trusted_orm_responses() -> bool:
+    return settings.TRUSTED_ORM_RESPONSES
+
+
+def trusted_json_response(content: Any, status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> Response:
+    # Devolver un Response directo hace que FastAPI no vuelva a validar contra
+    # response_model: sólo usar con datos armados desde el ORM por el propio handler.
+    # Tampoco copia los headers que pusieron las dependencias: pasarlos en `headers`.
+    return default_response_class()(content=content, status_code=status_code, headers=dict(headers or {}))
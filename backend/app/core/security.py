@@ -1,13 +1,89 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from typing import Any, Callable, Dict
 
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt es CPU intensivo: se ejecuta en un pool propio y acotado para que un pico
+# de logins no ocupe el threadpool que comparten el resto de los endpoints sync.
+_password_executor = ThreadPoolExecutor(
+    max_workers=max(settings.PASSWORD_HASH_WORKERS, 1),
+    thread_name_prefix="password-hash",
+)
+_password_lock = threading.Lock()
+_password_stats: Dict[str, float] = {
+    "pendientes": 0,
+    "en_curso": 0,
+    "completadas": 0,
+    "rechazadas": 0,
+    "espera_total_s": 0.0,
+    "espera_max_s": 0.0,
+}
+
+
+def _submit_password_job(func: Callable[..., Any], *args: Any) -> Future:
+    with _password_lock:
+        if _password_stats["pendientes"] >= settings.PASSWORD_HASH_MAX_QUEUE:
+            _password_stats["rechazadas"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Demasiadas solicitudes de autenticación simultáneas, reintente en unos segundos",
+                headers={"Retry-After": "1"},
+            )
+        _password_stats["pendientes"] += 1
+
+    encolado = time.perf_counter()
+
+    def run() -> Any:
+        espera = time.perf_counter() - encolado
+        with _password_lock:
+            _password_stats["en_curso"] += 1
+            _password_stats["espera_total_s"] += espera
+            _password_stats["espera_max_s"] = max(_password_stats["espera_max_s"], espera)
+        try:
+            return func(*args)
+        finally:
+            with _password_lock:
+                _password_stats["en_curso"] -= 1
+                _password_stats["pendientes"] -= 1
+                _password_stats["completadas"] += 1
+
+    return _password_executor.submit(run)
+
+
+def password_pool_stats() -> Dict[str, Any]:
+    with _password_lock:
+        stats = dict(_password_stats)
+    completadas = stats["completadas"] or 0
+    return {
+        "workers": max(settings.PASSWORD_HASH_WORKERS, 1),
+        "max_queue": settings.PASSWORD_HASH_MAX_QUEUE,
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        "en_curso": int(stats["en_curso"]),
+        "en_cola": int(stats["pendientes"] - stats["en_curso"]),
+        "completadas": int(completadas),
+        "rechazadas": int(stats["rechazadas"]),
+        "espera_promedio_ms": (stats["espera_total_s"] / completadas * 1000.0) if completadas else 0.0,
+        "espera_max_ms": stats["espera_max_s"] * 1000.0,
+    }
+
+
+def shutdown_password_executor() -> None:
+    _password_executor.shutdown(wait=False, cancel_futures=True)
 
 
 def create_access_token(subject: str, additional_claims: Dict[str, Any] | None = None) -> str:
@@ -21,13 +97,18 @@ def create_access_token(subject: str, additional_claims: Dict[str, Any] | None =
 
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
-    return password_context.verify(plain_password, password_hash)
+    return _submit_password_job(password_context.verify, plain_password, password_hash).result()
 
 
 def get_password_hash(password: str) -> str:
-    return password_context.hash(password)
-
+    return _submit_password_job(password_context.hash, password).result()
 
 
+async def verify_password_async(plain_password: str, password_hash: str) -> bool:
+    return await asyncio.wrap_future(
+        _submit_password_job(password_context.verify, plain_password, password_hash)
+    )
 
 
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit_password_job(password_context.hash, password))
@@ -1,5 +1,5 @@
-from sqlalchemy.orm import DeclarativeBase, relationship, Mapped, mapped_column
-from sqlalchemy import Integer, String, Boolean, ForeignKey, Text, Date, Float
+from sqlalchemy.orm import DeclarativeBase, Session, relationship, Mapped, mapped_column
+from sqlalchemy import Integer, String, Boolean, ForeignKey, Text, Date, Float, Index, delete, event, insert, inspect
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.mutable import MutableList, MutableDict
 from datetime import date
@@ -66,7 +66,7 @@ class ItemObra(Base):
     __tablename__ = "itemsObra"
 
     id_item_Obra: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    id_obra: Mapped[int] = mapped_column(Integer, ForeignKey("obras.id_obra"), nullable=False)
+    id_obra: Mapped[int] = mapped_column(Integer, ForeignKey("obras.id_obra"), nullable=False, index=True)
     descripcion: Mapped[str] = mapped_column(String(250), nullable=False)
     meses_operario: Mapped[float] = mapped_column(Float, nullable=False)
     capataz: Mapped[float] = mapped_column(Float, nullable=False)
@@ -86,7 +86,7 @@ class Recurso(Base):
 
     id_recurso: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     descripcion: Mapped[str] = mapped_column(String(250), nullable=False)
-    id_tipo_recurso: Mapped[int] = mapped_column(Integer, ForeignKey("tipos_recurso.id_tipo_recurso"), nullable=False)
+    id_tipo_recurso: Mapped[int] = mapped_column(Integer, ForeignKey("tipos_recurso.id_tipo_recurso"), nullable=False, index=True)
     unidad: Mapped[str] = mapped_column(String(20), nullable=False)
     cantidad: Mapped[float] = mapped_column(Float, nullable=False)
     meses_operario: Mapped[float] = mapped_column(Float, nullable=False)
@@ -97,7 +97,7 @@ class Personal(Base):
     __tablename__ = "personal"
 
     id_personal: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    funcion: Mapped[str] = mapped_column(String(250), nullable=False)
+    funcion: Mapped[str] = mapped_column(String(250), nullable=False, index=True)
     sueldo_bruto: Mapped[float] = mapped_column(Float, nullable=False)
     descuentos: Mapped[float] = mapped_column(Float, nullable=False)
     porc_descuento: Mapped[float] = mapped_column(Float, nullable=False)
@@ -117,7 +117,7 @@ class Equipo(Base):
     __tablename__ = "equipos"
 
     id_equipo: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    detalle: Mapped[str] = mapped_column(String(250), nullable=False)
+    detalle: Mapped[str] = mapped_column(String(250), nullable=False, index=True)
     Amortizacion: Mapped[float] = mapped_column("amortizacion", Float, nullable=False)
     Seguro: Mapped[float] = mapped_column("seguro", Float, nullable=False)
     Patente: Mapped[float] = mapped_column("patente", Float, nullable=False)
@@ -149,7 +149,7 @@ class Costo(Base):
     __tablename__ = "costos"
 
     id_costo: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    id_tipo_costo: Mapped[int] = mapped_column(Integer, ForeignKey("tipos_costo.id_tipo_costo"), nullable=False)
+    id_tipo_costo: Mapped[int] = mapped_column(Integer, ForeignKey("tipos_costo.id_tipo_costo"), nullable=False, index=True)
     detalle: Mapped[str] = mapped_column(String(255), nullable=False)
     values: Mapped[list[dict[str, Any]]] = mapped_column(
         "values",
@@ -165,6 +165,76 @@ class Costo(Base):
 
     tipo_costo = relationship("TipoCosto", back_populates="costos")
 
+    __table_args__ = (
+        Index(
+            "ix_costos_itemsObra_gin",
+            "itemsObra",
+            postgresql_using="gin",
+            postgresql_ops={"itemsObra": "jsonb_path_ops"},
+        ),
+    )
+
+
+class CostoItemObraAsignacion(Base):
+    """
+    Copia relacional de Costo.itemsObra (una fila por costo e ítem de obra)
+    para sumar por ítem en SQL. La mantienen los eventos de abajo.
+    """
+    __tablename__ = "costo_item_obra"
+
+    id_costo: Mapped[int] = mapped_column(
+        Integer, ForeignKey("costos.id_costo", ondelete="CASCADE"), primary_key=True
+    )
+    # Sin FK a itemsObra: el JSON puede referenciar ítems ya borrados
+    id_item: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id_tipo_costo: Mapped[int] = mapped_column(Integer, nullable=False)
+    cantidad: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    porcentaje: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (Index("ix_costo_item_obra_tipo_item", "id_tipo_costo", "id_item"),)
+
+
+def _costo_item_obra_rows(costo: Costo) -> list[dict[str, Any]]:
+    rows: dict[int, dict[str, Any]] = {}
+    for item in costo.itemsObra or []:
+        item_id = next((item[key] for key in ("idItem", "id", "id_item") if key in item), None)
+        if item_id is None:
+            continue
+        total = next((item[key] for key in ("total", "costo_total") if item.get(key) is not None), 0.0)
+        # Un ítem repetido en el JSON rompería la PK: gana el último
+        rows[int(item_id)] = {
+            "id_costo": costo.id_costo,
+            "id_item": int(item_id),
+            "id_tipo_costo": costo.id_tipo_costo,
+            "cantidad": float(item.get("cantidad", 0.0) or 0.0),
+            "total": float(total or 0.0),
+            "porcentaje": float(item.get("porcentaje", 0.0) or 0.0),
+        }
+    return list(rows.values())
+
+
+@event.listens_for(Costo, "after_insert")
+def _costo_item_obra_after_insert(mapper, connection, target: Costo) -> None:
+    rows = _costo_item_obra_rows(target)
+    if rows:
+        connection.execute(insert(CostoItemObraAsignacion.__table__), rows)
+
+
+@event.listens_for(Costo, "after_update")
+def _costo_item_obra_after_update(mapper, connection, target: Costo) -> None:
+    state = inspect(target)
+    if not (
+        state.attrs.itemsObra.history.has_changes()
+        or state.attrs.id_tipo_costo.history.has_changes()
+    ):
+        return
+    table = CostoItemObraAsignacion.__table__
+    connection.execute(delete(table).where(table.c.id_costo == target.id_costo))
+    rows = _costo_item_obra_rows(target)
+    if rows:
+        connection.execute(insert(table), rows)
+
 
 def _default_headers_base() -> list[dict[str, Any]]:
     titulos = ["Detalle", "Unidad", "Cantidad", "$Unitario", "$Total"]
@@ -283,10 +353,10 @@ class Material(Base):
     __tablename__ = "materiales"
 
     id_material: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    id_tipo_material: Mapped[int] = mapped_column(Integer, ForeignKey("tipos_material.id_tipo_material"), nullable=False)
+    id_tipo_material: Mapped[int] = mapped_column(Integer, ForeignKey("tipos_material.id_tipo_material"), nullable=False, index=True)
     detalle: Mapped[str] = mapped_column(String(255), nullable=False)
     unidad: Mapped[str | None] = mapped_column(String(50))
-    cantidad: Mapped[str | None] = mapped_column(String(50))
+    cantidad: Mapped[float | None] = mapped_column(Float)
     costo_unitario: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
     costo_total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
     atributos: Mapped[list[dict[str, Any]] | None] = mapped_column(
@@ -295,6 +365,94 @@ class Material(Base):
 
     tipo_material = relationship("TipoMaterial", back_populates="materiales")
 
+    __table_args__ = (
+        Index(
+            "ix_materiales_atributos_gin",
+            "atributos",
+            postgresql_using="gin",
+            postgresql_ops={"atributos": "jsonb_path_ops"},
+        ),
+    )
+
+
+class MaterialAtributoValor(Base):
+    """
+    Copia relacional de Material.atributos (una fila por atributo) para
+    filtrar, ordenar y sumar por header en SQL. La mantiene el after_flush de
+    abajo; no se escribe directamente.
+    """
+    __tablename__ = "material_atributos"
+
+    id_material: Mapped[int] = mapped_column(
+        Integer, ForeignKey("materiales.id_material", ondelete="CASCADE"), primary_key=True
+    )
+    id_header_atribute: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Los ids de header se repiten entre tipos: se guarda el tipo para filtrar por índice
+    id_tipo_material: Mapped[int] = mapped_column(Integer, nullable=False)
+    value_num: Mapped[float | None] = mapped_column(Float)
+    value_text: Mapped[str | None] = mapped_column(Text)
+
+    __table_args__ = (
+        Index("ix_material_atributos_tipo_header_num", "id_tipo_material", "id_header_atribute", "value_num"),
+    )
+
+
+def _material_atributo_rows(material: Material) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for attr in material.atributos or []:
+        value = attr.get("value")
+        value_num: float | None = None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value_num = float(value)
+        elif isinstance(value, str) and value.strip():
+            try:
+                value_num = float(value.strip().replace(",", "."))
+            except ValueError:
+                value_num = None
+        rows.append(
+            {
+                "id_material": material.id_material,
+                "id_header_atribute": int(attr["id_header_atribute"]),
+                "id_tipo_material": material.id_tipo_material,
+                "value_num": value_num,
+                "value_text": None if value is None else str(value),
+            }
+        )
+    # Un id repetido en el JSON rompería la PK: gana el último
+    return list({row["id_header_atribute"]: row for row in rows}.values())
+
+
+def _atributos_cambiaron(material: Material) -> bool:
+    state = inspect(material)
+    return (
+        state.attrs.atributos.history.has_changes()
+        or state.attrs.id_tipo_material.history.has_changes()
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _material_atributos_after_flush(session: Session, flush_context) -> None:
+    # Se junta todo el flush: un DELETE y un INSERT (executemany) en vez de
+    # dos sentencias por material. En after_flush new/dirty siguen mostrando
+    # lo que se acaba de escribir y los ids ya están asignados.
+    nuevos = [obj for obj in session.new if isinstance(obj, Material)]
+    modificados = [
+        obj
+        for obj in session.dirty
+        if isinstance(obj, Material) and obj not in session.deleted and _atributos_cambiaron(obj)
+    ]
+    if not (nuevos or modificados):
+        return
+    table = MaterialAtributoValor.__table__
+    connection = session.connection()
+    if modificados:
+        ids = [material.id_material for material in modificados]
+        connection.execute(delete(table).where(table.c.id_material.in_(ids)))
+    rows = [row for material in nuevos + modificados for row in _material_atributo_rows(material)]
+    if rows:
+        connection.execute(insert(table), rows)
+
+
 class MesResumen(Base):
     __tablename__ = "mesesResumen"
 
@@ -324,3 +482,6 @@ class DiaMes(Base):
     total_horas: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     
     mes_resumen = relationship("MesResumen", back_populates="dias_mes")
+
+    # Los días se leen siempre por mes y ordenados por fecha
+    __table_args__ = (Index("ix_diasMes_id_mes_fecha", "id_mes", "fecha"),)
@@ -1,21 +1,92 @@
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
 
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+_pool_lock = threading.Lock()
+_pool_metrics: Dict[str, float] = {
+    "checkouts": 0,
+    "timeouts": 0,
+    "espera_total_s": 0.0,
+    "espera_max_s": 0.0,
+}
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mide cuánto tarda cada checkout (espera + pre-ping)."""
+
+    def connect(self):  # type: ignore[override]
+        inicio = time.perf_counter()
+        try:
+            conn = super().connect()
+        except PoolTimeoutError:
+            with _pool_lock:
+                _pool_metrics["timeouts"] += 1
+            raise
+        espera = time.perf_counter() - inicio
+        with _pool_lock:
+            _pool_metrics["checkouts"] += 1
+            _pool_metrics["espera_total_s"] += espera
+            _pool_metrics["espera_max_s"] = max(_pool_metrics["espera_max_s"], espera)
+        return conn
+
+
+# SQLAlchemy nombra el logger del pool por el módulo de la clase ("app.db.session...");
+# sin esto heredaría el nivel INFO de los loggers de la app y loguearía cada dispose.
+logging.getLogger(f"{TimedQueuePool.__module__}.{TimedQueuePool.__name__}").setLevel(logging.WARNING)
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=TimedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_use_lifo=settings.DB_POOL_USE_LIFO,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-def get_db():
+def pool_stats() -> Dict[str, Any]:
+    pool = engine.pool
+    with _pool_lock:
+        metrics = dict(_pool_metrics)
+    checkouts = metrics["checkouts"] or 0
+    return {
+        "size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": int(checkouts),
+        "timeouts": int(metrics["timeouts"]),
+        "espera_promedio_ms": (metrics["espera_total_s"] / checkouts * 1000.0) if checkouts else 0.0,
+        "espera_max_ms": metrics["espera_max_s"] * 1000.0,
+    }
+
+
+def get_db(request: Request):
+    # Una sola sesión por request: dependencias (role_required, get_current_user)
+    # y el handler comparten la misma, aunque se resuelva get_db más de una vez.
+    existing = getattr(request.state, "db", None)
+    if existing is not None:
+        yield existing
+        return
+
     db = SessionLocal()
+    request.state.db = db
     try:
         yield db
     finally:
+        request.state.db = None
         db.close()
-
-
-
-
-
@@ -1,8 +1,19 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from app.core.config import settings
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import MetricsMiddleware
+from app.core.responses import default_response_class
+from app.core.security import shutdown_password_executor
 from app.routers.health import router as health_router
+from app.routers.metrics import router as metrics_router
 from app.routers.auth import router as auth_router
 from app.routers.roles import router as roles_router
 from app.routers.usuarios import router as usuarios_router
@@ -16,10 +27,46 @@ from app.routers.recursos import router as recursos_router
 from app.routers.costos import router as costos_router
 from app.routers.mesesJornada import router as mesesJornada_router
 from app.routers.materiales import router as materiales_router
-from app.services.startup import seed_admin
+from app.routers.busqueda import router as busqueda_router
+from app.routers.exportacion import router as exportacion_router
+from app.db.async_session import dispose_async_engine
+from app.services.configuracion import config_listener
+from app.services.startup import preparar_arranque
+
+
+# Nivel sólo para los loggers de la app: con el root en INFO SQLAlchemy loguearía cada consulta
+logging.basicConfig(format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+logger = logging.getLogger("app")
+logger.setLevel(settings.LOG_LEVEL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    inicio = time.perf_counter()
+    tiempos = await run_in_threadpool(preparar_arranque)
+    logger.info(
+        "Arranque listo en %.0f ms (%s)",
+        (time.perf_counter() - inicio) * 1000.0,
+        ", ".join(f"{etapa} {ms:.0f} ms" for etapa, ms in tiempos.items()),
+    )
+    loop_monitor.start()
+    if settings.CONFIG_LISTEN_ENABLED:
+        config_listener.start()
+    yield
+
+    from app.db.session import engine
+    from app.services.materiales_excel_libro import shutdown_excel_executor
 
+    await loop_monitor.stop()
+    config_listener.stop()
 
-app = FastAPI(title=settings.APP_NAME)
+    shutdown_password_executor()
+    shutdown_excel_executor()
+    await dispose_async_engine()
+    engine.dispose()
+
+
+app = FastAPI(title=settings.APP_NAME, default_response_class=default_response_class(), lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +81,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    try:
+        from brotli_asgi import BrotliMiddleware
+
+        app.add_middleware(
+            BrotliMiddleware,
+            quality=settings.COMPRESSION_BROTLI_QUALITY,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            gzip_fallback=True,
+        )
+    except ImportError:
+        app.add_middleware(
+            GZipMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            compresslevel=settings.COMPRESSION_GZIP_LEVEL,
+        )
+
+if settings.QUERY_GUARD_ENABLED:
+    from app.core.query_guard import QueryGuardMiddleware
+
+    app.add_middleware(
+        QueryGuardMiddleware,
+        max_queries=settings.QUERY_GUARD_MAX_QUERIES,
+        repeat_threshold=settings.QUERY_GUARD_REPEAT_THRESHOLD,
+        raise_errors=settings.QUERY_GUARD_RAISE,
+    )
+
+if settings.METRICS_ENABLED:
+    # Último en agregarse = más externo: mide la latencia total y el tamaño comprimido
+    app.add_middleware(MetricsMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
+    app.include_router(metrics_router)
+
+if settings.DB_ASYNC_ENABLED:
+    # Debe ir antes que los routers sync para tomar precedencia en las mismas rutas
+    from app.routers.async_reads import router as async_reads_router
+
+    app.include_router(async_reads_router, prefix=settings.API_V1_PREFIX)
+
 app.include_router(health_router, prefix=settings.API_V1_PREFIX)
 app.include_router(auth_router, prefix=settings.API_V1_PREFIX)
 app.include_router(roles_router, prefix=settings.API_V1_PREFIX)
@@ -48,17 +133,6 @@ app.include_router(recursos_router, prefix=settings.API_V1_PREFIX)
 app.include_router(mesesJornada_router, prefix=settings.API_V1_PREFIX)
 app.include_router(costos_router, prefix=settings.API_V1_PREFIX)
 app.include_router(materiales_router, prefix=settings.API_V1_PREFIX)
-
-
-@app.on_event("startup")
-def on_startup():
-    # Semilla de usuario administrador por defecto
-    from app.db.session import SessionLocal
-
-    db = SessionLocal()
-    try:
-        seed_admin(db)
-    finally:
-        db.close()
-
+app.include_router(busqueda_router, prefix=settings.API_V1_PREFIX)
+app.include_router(exportacion_router, prefix=settings.API_V1_PREFIX)
 
@@ -0,0 +1,130 @@
+# Versiones async (AsyncSession + asyncpg) de los endpoints de lectura más usados.
+# main.py las registra sólo con DB_ASYNC_ENABLED y antes que los routers sync, así
+# para estas rutas gana la versión async; el formato de respuesta es el mismo.
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import role_required
+from app.core.http_cache import conditional_catalog_async
+from app.db.async_session import get_async_db
+from app.db.models import (
+    Cliente,
+    Costo,
+    DiaMes,
+    Material,
+    MesResumen,
+    TipoCosto,
+    TipoMaterial,
+    ensure_total_cantidad_struct,
+)
+from app.schemas.catalogs import ClienteRead
+from app.schemas.costos import CostoRead, TipoCostoRead
+from app.schemas.materiales import MaterialRead, TipoMaterialRead
+from app.schemas.mesesJornada import DiaMesRead, MesResumenRead
+
+
+router = APIRouter()
+
+
+def _tipos_material_con_conteo():
+    # Cuenta materiales con un GROUP BY en vez de cargarlos todos para len()
+    conteo = (
+        select(Material.id_tipo_material, func.count(Material.id_material).label("cantidad"))
+        .group_by(Material.id_tipo_material)
+        .subquery()
+    )
+    return (
+        select(TipoMaterial, func.coalesce(conteo.c.cantidad, 0))
+        .outerjoin(conteo, conteo.c.id_tipo_material == TipoMaterial.id_tipo_material)
+    )
+
+
+def _normalize_tipo_totales(tipo: TipoMaterial, materiales_count: int) -> TipoMaterial:
+    tipo.total_cantidad = ensure_total_cantidad_struct(tipo.total_cantidad)
+    tipo.materiales_count = int(materiales_count or 0)
+    return tipo
+
+
+# ==================== MATERIALES ====================
+
+@router.get(
+    "/materiales/tipos",
+    response_model=List[TipoMaterialRead],
+    tags=["Materiales"],
+    dependencies=[Depends(conditional_catalog_async("tipos_material", "materiales"))],
+)
+async def listar_tipos_material(db: AsyncSession = Depends(get_async_db)):
+    rows = (await db.execute(_tipos_material_con_conteo())).all()
+    return [_normalize_tipo_totales(tipo, count) for tipo, count in rows]
+
+
+@router.get("/materiales/tipos/{id_tipo_material}", response_model=TipoMaterialRead, tags=["Materiales"])
+async def obtener_tipo_material(id_tipo_material: int, db: AsyncSession = Depends(get_async_db)):
+    stmt = _tipos_material_con_conteo().where(TipoMaterial.id_tipo_material == id_tipo_material)
+    row = (await db.execute(stmt)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Tipo de material no encontrado")
+    tipo, count = row
+    return _normalize_tipo_totales(tipo, count)
+
+
+@router.get("/materiales/tipo/{id_tipo_material}", response_model=List[MaterialRead], tags=["Materiales"])
+async def listar_materiales_por_tipo(id_tipo_material: int, db: AsyncSession = Depends(get_async_db)):
+    tipo = await db.get(TipoMaterial, id_tipo_material)
+    if not tipo:
+        raise HTTPException(status_code=404, detail="Tipo de material no encontrado")
+    stmt = select(Material).where(Material.id_tipo_material == id_tipo_material)
+    return (await db.scalars(stmt)).all()
+
+
+# ==================== COSTOS ====================
+
+@router.get("/costos/tipos", response_model=List[TipoCostoRead], tags=["Costos"])
+async def listar_tipos_costo(db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(TipoCosto))).all()
+
+
+@router.get("/costos/", response_model=List[CostoRead], tags=["Costos"])
+async def listar_costos(db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(Costo))).all()
+
+
+# ==================== MESES JORNADA ====================
+
+@router.get("/meses-jornada/mes-resumen/cliente/{id_cliente}", response_model=MesResumenRead, tags=["Meses Jornada"])
+async def obtener_mes_resumen_por_cliente(id_cliente: int, db: AsyncSession = Depends(get_async_db)):
+    mes_resumen = await db.scalar(select(MesResumen).where(MesResumen.id_cliente == id_cliente))
+    if not mes_resumen:
+        raise HTTPException(status_code=404, detail="No se encontró mesResumen para este cliente")
+    return mes_resumen
+
+
+@router.get("/meses-jornada/mes-resumen/{id_mes}", response_model=MesResumenRead, tags=["Meses Jornada"])
+async def obtener_mes_resumen(id_mes: int, db: AsyncSession = Depends(get_async_db)):
+    mes_resumen = await db.get(MesResumen, id_mes)
+    if not mes_resumen:
+        raise HTTPException(status_code=404, detail="MesResumen no encontrado")
+    return mes_resumen
+
+
+@router.get("/meses-jornada/dias-mes/mes/{id_mes}", response_model=List[DiaMesRead], tags=["Meses Jornada"])
+async def listar_dias_mes_por_mes(id_mes: int, db: AsyncSession = Depends(get_async_db)):
+    mes_resumen = await db.get(MesResumen, id_mes)
+    if not mes_resumen:
+        raise HTTPException(status_code=404, detail="MesResumen no encontrado")
+    stmt = select(DiaMes).where(DiaMes.id_mes == id_mes).order_by(DiaMes.fecha)
+    return list((await db.scalars(stmt)).all())
+
+
+# ==================== CATÁLOGOS ====================
+
+@router.get("/catalogos/clientes", response_model=list[ClienteRead], tags=["catalogos"])
+async def list_clientes(
+    db: AsyncSession = Depends(get_async_db),
+    _: None = Depends(role_required(["Administrador", "Cotizador"])),
+):
+    # La verificación de rol sigue usando la sesión sync de get_current_user
+    return list((await db.scalars(select(Cliente))).all())
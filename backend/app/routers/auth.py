@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.core.config import settings
-from app.core.security import verify_password, create_access_token
+from app.core.security import verify_password_async, create_access_token
 from app.db.session import get_db
 from app.db.models import Usuario, Rol
 from app.schemas.auth import LoginRequest, TokenResponse
@@ -14,15 +15,19 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
-    user: Usuario | None = db.scalar(select(Usuario).where(Usuario.dni == payload.dni))
+async def login(payload: LoginRequest, db: Session = Depends(get_db)):
+    # Endpoint async: las consultas van al threadpool y bcrypt a su pool dedicado,
+    # así la espera del hash no retiene un hilo del threadpool compartido.
+    user: Usuario | None = await run_in_threadpool(
+        db.scalar, select(Usuario).where(Usuario.dni == payload.dni)
+    )
     if not user or not user.activo:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
 
-    if not verify_password(payload.password, user.password_hash):
+    if not await verify_password_async(payload.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
 
-    role: Rol | None = db.get(Rol, user.id_rol)
+    role: Rol | None = await run_in_threadpool(db.get, Rol, user.id_rol)
     claims = {"role": role.nombre if role else None, "uid": str(user.id_usuario)}
     token = create_access_token(subject=user.dni, additional_claims=claims)
     return TokenResponse(access_token=token)
@@ -0,0 +1,27 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.deps import role_required
+from app.db.session import get_db
+from app.schemas.busqueda import BusquedaRead, TablaBusqueda
+from app.services.busqueda import ENTIDADES, buscar
+
+
+router = APIRouter(prefix="/search", tags=["busqueda"])
+
+
+@router.get("", response_model=BusquedaRead)
+def buscar_texto(
+    # Con menos de 3 caracteres no hay trigramas y el índice no sirve
+    q: str = Query(..., min_length=3, max_length=100),
+    tablas: Optional[List[TablaBusqueda]] = Query(default=None, description="Por defecto busca en todas"),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+    _: None = Depends(role_required(["Cotizador", "Administrador"])),
+):
+    """Búsqueda por texto parcial, sin acentos, en materiales, equipos, personal y recursos"""
+    seleccion = list(dict.fromkeys(tablas)) if tablas else list(ENTIDADES)
+    return buscar(db, q, seleccion, limit, offset)
@@ -1,20 +1,23 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.core.deps import role_required
+from app.core.responses import trusted_json_response, trusted_orm_responses
 from app.db.models import Costo, TipoCosto
 from app.db.session import get_db
 from app.schemas.costos import (
     CostoCreate,
     CostoRead,
     CostoUpdate,
+    ItemObraCostoResumen,
     TipoCostoCreate,
     TipoCostoRead,
     TipoCostoUpdate,
 )
+from app.services.costos_items_obra import resumen_por_item_obra, totales_por_item
 
 
 router = APIRouter(prefix="/costos", tags=["Costos"])
@@ -27,27 +30,41 @@ def _extract_item_identifier(item: Dict[str, Any]) -> Any:
     return None
 
 
-def _extract_item_total(item: Dict[str, Any]) -> float:
-    for key in ("total", "costo_total"):
-        value = item.get(key)
-        if value is not None:
-            return float(value)
-    return 0.0
+def _costo_to_dict(costo: Costo) -> Dict[str, Any]:
+    # Mismo formato que CostoRead, armado directo desde el ORM (sin Pydantic)
+    return {
+        "id_costo": costo.id_costo,
+        "id_tipo_costo": costo.id_tipo_costo,
+        "detalle": costo.detalle,
+        "values": [
+            {"name": value.get("name"), "value": float(value.get("value", 0.0) or 0.0)}
+            for value in costo.values or []
+        ],
+        "unidad": costo.unidad,
+        "costo_unitario": float(costo.costo_unitario),
+        "cantidad": float(costo.cantidad),
+        "costo_total": float(costo.costo_total),
+        "itemsObra": [
+            {
+                "idItem": item.get("idItem"),
+                "cantidad": float(item.get("cantidad", 0.0) or 0.0),
+                "total": float(item.get("total", 0.0) or 0.0),
+                "porcentaje": float(item.get("porcentaje", 0.0) or 0.0),
+            }
+            for item in costo.itemsObra or []
+        ],
+    }
 
 
 def recalculate_tipo_costo(db: Session, tipo_costo: TipoCosto) -> None:
-    total = 0.0
-    items_totals: Dict[Any, float] = {}
-
-    for costo in tipo_costo.costos:
-        total += float(costo.costo_total or 0.0)
-        for item in costo.itemsObra or []:
-            item_id = _extract_item_identifier(item)
-            if item_id is None:
-                continue
-            items_totals[item_id] = items_totals.get(item_id, 0.0) + _extract_item_total(item)
+    # Los costos recién escritos tienen que estar en la base (y en costo_item_obra)
+    db.flush()
+    total = db.scalar(
+        select(func.coalesce(func.sum(Costo.costo_total), 0.0)).where(Costo.id_tipo_costo == tipo_costo.id_tipo_costo)
+    )
+    items_totals = totales_por_item(db, tipo_costo.id_tipo_costo)
 
-    tipo_costo.costo_total = total
+    tipo_costo.costo_total = float(total or 0.0)
 
     if tipo_costo.items:
         updated_items = []
@@ -56,7 +73,7 @@ def recalculate_tipo_costo(db: Session, tipo_costo: TipoCosto) -> None:
             if item_id is None:
                 updated_items.append(entry)
                 continue
-            nuevo_total = items_totals.get(item_id, 0.0)
+            nuevo_total = items_totals.get(int(item_id), 0.0)
             actualizado = {**entry}
             if "costo_total" in actualizado:
                 actualizado["costo_total"] = nuevo_total
@@ -132,7 +149,10 @@ def eliminar_tipo_costo(
 
 @router.get("/", response_model=List[CostoRead])
 def listar_costos(db: Session = Depends(get_db)):
-    return db.scalars(select(Costo)).all()
+    costos = db.scalars(select(Costo)).all()
+    if trusted_orm_responses():
+        return trusted_json_response([_costo_to_dict(costo) for costo in costos])
+    return costos
 
 
 @router.post("/", response_model=CostoRead, status_code=status.HTTP_201_CREATED)
@@ -155,6 +175,14 @@ def crear_costo(
     return costo
 
 
+@router.get("/items-obra/resumen", response_model=List[ItemObraCostoResumen])
+def resumen_costos_por_item_obra(
+    id_obra: Optional[int] = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    return resumen_por_item_obra(db, id_obra)
+
+
 @router.get("/{id_costo}", response_model=CostoRead)
 def obtener_costo(id_costo: int, db: Session = Depends(get_db)):
     costo = db.get(Costo, id_costo)
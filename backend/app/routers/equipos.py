@@ -1,25 +1,22 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, Form
 from sqlalchemy.orm import Session
 from sqlalchemy import select, text
 from typing import List
 
+from app.core.http_cache import conditional_catalog
 from app.db.session import get_db
 from app.db.models import Equipo
 from app.schemas.equipos import EquipoCreate, EquipoUpdate, EquipoRead
-try:
-    from app.services.limpiar_y_convertir_datos_equipos import (
-        limpiar_y_convertir_datos_equipos,
-        COLUMNAS_FINALES_EQUIPOS,
-    )
-    _PANDAS_AVAILABLE = True
-except Exception:
-    _PANDAS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter(prefix="/equipos", tags=["Equipo"])
 
 
-@router.get("/", response_model=List[EquipoRead])
+@router.get("/", response_model=List[EquipoRead], dependencies=[Depends(conditional_catalog("equipos"))])
 def listar_equipos(db: Session = Depends(get_db)):
     return db.scalars(select(Equipo)).all()
 
@@ -68,7 +65,14 @@ async def importar_excel_original(
     if not file.filename.lower().endswith((".xlsx", ".xlsm", ".xls", ".csv")):
         raise HTTPException(status_code=400, detail="Archivo inválido. Acepte .xlsx/.xls/.csv")
 
-    if not _PANDAS_AVAILABLE:
+    # pandas se importa recién acá: es caro y sólo lo usa este endpoint
+    try:
+        from app.services.limpiar_y_convertir_datos_equipos import (
+            limpiar_y_convertir_datos_equipos,
+            COLUMNAS_FINALES_EQUIPOS,
+        )
+    except ImportError:
+        logger.exception("No se pudo importar el algoritmo de limpieza (pandas)")
         raise HTTPException(status_code=500, detail="Procesamiento con pandas no disponible en el servidor")
 
     import csv, io
@@ -0,0 +1,24 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.deps import role_required
+from app.services.exportacion import FORMATOS, exportar
+
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+
+@router.get("/{tabla}")
+def exportar_tabla(
+    tabla: Literal["materiales", "costos", "personal", "equipos"],
+    formato: Literal["csv", "ndjson"] = Query(default="csv"),
+    _: None = Depends(role_required(["Cotizador", "Administrador"])),
+):
+    """Descarga la tabla completa en CSV o NDJSON, leída y enviada por lotes"""
+    return StreamingResponse(
+        exportar(tabla, formato),
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{tabla}.{formato}"'},
+    )
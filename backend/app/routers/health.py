@@ -1,25 +1,61 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Response, status
+from fastapi.concurrency import run_in_threadpool
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.core.loop_monitor import loop_monitor
+from app.core.security import password_pool_stats
+from app.db.session import pool_stats
+from app.services.health_checks import db_roundtrip
 
 
 router = APIRouter(prefix="/health", tags=["health"]) 
 
 
-@router.get("", summary="Healthcheck")
-def healthcheck(db: Session = Depends(get_db)):
-    db.execute(text("SELECT 1"))
+async def _readiness(response: Response) -> dict:
+    db = await run_in_threadpool(db_roundtrip)
+    if not db["ok"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    pool = pool_stats()
+    return {
+        "status": "ok" if db["ok"] else "error",
+        "db": db,
+        "pool": {
+            "size": pool["size"],
+            "checked_out": pool["checked_out"],
+            "overflow": pool["overflow"],
+            "max_overflow": pool["max_overflow"],
+            "timeouts": pool["timeouts"],
+        },
+        "event_loop": loop_monitor.stats(),
+    }
+
+
+@router.get("", summary="Healthcheck (alias de /health/ready)")
+async def healthcheck(response: Response):
+    data = await _readiness(response)
     return {
         "app": settings.APP_NAME,
-        "status": "ok",
-        "db": "ok",
+        "status": data["status"],
+        "db": "ok" if data["db"]["ok"] else "error",
         "version": "v1",
     }
 
 
+@router.get("/live", summary="Liveness: el proceso responde (no toca la base)")
+async def liveness():
+    return {"status": "ok"}
+
+
+@router.get("/ready", summary="Readiness: base, pool de conexiones y lag del event loop")
+async def readiness(response: Response):
+    return await _readiness(response)
+
 
+@router.get("/auth-pool", summary="Estado del pool de hash de contraseñas")
+def auth_pool_status():
+    return password_pool_stats()
 
 
+@router.get("/pool", summary="Estado del pool de conexiones a la base")
+def db_pool_status():
+    return pool_stats()
@@ -1,27 +1,40 @@
 from __future__ import annotations
 
 import io
+import math
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status, UploadFile, File
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import flag_modified
 
+from app.core.http_cache import conditional_catalog
+from app.core.responses import trusted_json_response, trusted_orm_responses
 from app.db.models import Material, TipoMaterial, ensure_total_cantidad_struct
 from app.db.session import get_db
 from app.schemas.materiales import (
+    AtributoResumenRead,
     Calculo,
+    ExcelTrabajoRead,
     HeaderAtributoCreate,
     MaterialCreate,
     MaterialRead,
     MaterialUpdate,
     TipoMaterialCreate,
     TipoMaterialRead,
+    TipoMaterialUpdate,
 )
-from app.services.materiales_excel import build_excel_for_tipo_material
-from app.services.materiales_excel_upload import process_excel_upload
+from app.services.materiales_dependencias import (
+    GrafoHeaders,
+    NodoHeader,
+    atributos_numericos,
+    construir_grafo,
+)
+from app.services.configuracion import CLAVE_VALOR_DOLAR, fijar_config, valor_dolar as valor_dolar_config
+from app.services.material_atributos import filtrar_materiales, resumen_por_header, totales_por_header
 
 
 router = APIRouter(prefix="/materiales", tags=["Materiales"])
@@ -54,13 +67,23 @@ def _slugify_filename(value: str) -> str:
     return normalized or "tipo_material"
 
 
+def _finite(numero: float, field: str, value: Any) -> float:
+    # float() acepta "nan", "inf" y "1e999", pero el JSONB no puede guardarlos
+    if not math.isfinite(numero):
+        raise HTTPException(
+            status_code=400,
+            detail=f"El campo {field} debe ser un número finito (valor recibido: '{value}')",
+        )
+    return numero
+
+
 def _to_float(value: Any, field: str, allow_blank: bool = False) -> float:
     if value is None:
         if allow_blank:
             return 0.0
         raise HTTPException(status_code=400, detail=f"El campo {field} requiere un valor numérico")
     if isinstance(value, (int, float)):
-        return float(value)
+        return _finite(float(value), field, value)
     if isinstance(value, str):
         stripped = value.strip()
         if stripped == "":
@@ -69,12 +92,13 @@ def _to_float(value: Any, field: str, allow_blank: bool = False) -> float:
             raise HTTPException(status_code=400, detail=f"El campo {field} no puede estar vacío")
         normalized = stripped.replace(",", ".")
         try:
-            return float(normalized)
+            numero = float(normalized)
         except ValueError as exc:
             raise HTTPException(
                 status_code=400,
                 detail=f"El campo {field} debe ser numérico (valor recibido: '{value}')",
             ) from exc
+        return _finite(numero, field, value)
     raise HTTPException(
         status_code=400,
         detail=f"El campo {field} debe ser numérico",
@@ -416,20 +440,37 @@ def _calculate_calculo(
     return resultado
 
 
-def _apply_calculo(tipo: TipoMaterial, material: Material) -> None:
-    attr_map = _get_material_attribute_map(material)
+def _apply_calculo(
+    tipo: TipoMaterial,
+    material: Material,
+    nodos: Optional[List[NodoHeader]] = None,
+    grafo: Optional[GrafoHeaders] = None,
+) -> None:
+    # Orden topológico: cada header calculado se evalúa después de los que lee.
+    # `nodos` restringe la evaluación a esos headers (ya ordenados); `grafo` se
+    # pasa armado cuando se recorre un lote de materiales del mismo tipo.
+    if nodos is None:
+        nodos = (grafo or construir_grafo(tipo.headers_base, tipo.headers_atributes)).orden
+    if not nodos:
+        return
 
-    # Primero atributos para que las bases puedan tomar sus valores si dependen de ellos
-    for attr_id, header in _get_attribute_header_map(tipo).items():
-        if attr_id not in attr_map:
+    attr_map = _get_material_attribute_map(material)
+    attr_headers = _get_attribute_header_map(tipo)
+    base_headers = _get_base_header_map(tipo)
+
+    for tipo_header, header_id in nodos:
+        if tipo_header == "atribute":
+            header = attr_headers.get(header_id)
+            if header is None or header_id not in attr_map:
+                continue
+            resultado = _calculate_calculo(tipo, material, header, attr_map)
+            if resultado is not None:
+                attr_map[header_id]["value"] = resultado
             continue
-        resultado = _calculate_calculo(tipo, material, header, attr_map)
-        if resultado is not None:
-            attr_map[attr_id]["value"] = f"{resultado}"
 
-    # Ahora headers base (por ejemplo $Total)
-    base_map = _get_base_header_map(tipo)
-    for header in base_map.values():
+        header = base_headers.get(header_id)
+        if header is None:
+            continue
         resultado = _calculate_calculo(tipo, material, header, attr_map)
         if resultado is None:
             continue
@@ -439,7 +480,7 @@ def _apply_calculo(tipo: TipoMaterial, material: Material) -> None:
         elif titulo in ("$unitario",):
             material.costo_unitario = resultado
         elif titulo == "cantidad":
-            material.cantidad = f"{resultado}"
+            material.cantidad = resultado
 
 
 def _accumulate_totals(tipo: TipoMaterial, material: Material, factor: float) -> None:
@@ -491,6 +532,99 @@ def _remove_material_from_totals(tipo: TipoMaterial, material: Material) -> None
     _recalculate_total_usd(tipo)
 
 
+def _material_header_values(tipo: TipoMaterial, material: Material) -> Dict[NodoHeader, Any]:
+    valores: Dict[NodoHeader, Any] = {}
+    for header_id, header in _get_base_header_map(tipo).items():
+        if BASE_TITLE_FIELD_MAP.get(header["titulo"].strip().lower()):
+            valores[("base", header_id)] = _extract_base_value(material, header)
+    for attr in material.atributos or []:
+        valores[("atribute", int(attr["id_header_atribute"]))] = attr.get("value")
+    return valores
+
+
+def _apply_totals_delta(
+    tipo: TipoMaterial,
+    anteriores: Dict[NodoHeader, Any],
+    actuales: Dict[NodoHeader, Any],
+    nodos: set[NodoHeader],
+) -> None:
+    # Equivale a _remove_material_from_totals + _add_material_to_totals, pero
+    # sólo para los headers cuyo valor pudo cambiar. Los totales de costo
+    # repiten su tope en 0 al restar (total - anterior, después + actual) para
+    # que un total desfasado no quede negativo
+    base_map = _get_base_header_map(tipo)
+    attr_map = _get_attribute_header_map(tipo)
+    total_cantidad = ensure_total_cantidad_struct(tipo.total_cantidad)
+    cantidades = total_cantidad.get("cantidades") or []
+    headers_atributes_modificados = False
+
+    for nodo in nodos:
+        tipo_header, header_id = nodo
+        if tipo_header == "base":
+            header = base_map.get(header_id)
+            if header is None:
+                continue
+            field = BASE_TITLE_FIELD_MAP.get(header["titulo"].strip().lower())
+            contable = field in ("costo_total", "costo_unitario") or (header_id == 2 and header.get("active", True))
+        else:
+            header = attr_map.get(header_id)
+            if header is None:
+                continue
+            calculo = header.get("calculo") or {}
+            contable = bool(header.get("isCantidad") or calculo.get("activo"))
+        if not contable:
+            continue
+
+        anterior = _to_float(anteriores.get(nodo), header["titulo"], allow_blank=True)
+        actual = _to_float(actuales.get(nodo), header["titulo"], allow_blank=True)
+        delta = actual - anterior
+        if delta == 0.0:
+            continue
+
+        if tipo_header == "base":
+            if field == "costo_total":
+                tipo.total_costo_total = max(float(tipo.total_costo_total or 0.0) - anterior, 0.0) + actual
+            elif field == "costo_unitario":
+                tipo.total_costo_unitario = max(float(tipo.total_costo_unitario or 0.0) - anterior, 0.0) + actual
+            else:
+                entry = _ensure_total_cantidad_entry(cantidades, "base", header_id)
+                entry["total"] = float(entry.get("total", 0.0)) + delta
+        else:
+            header["total_costo_header"] = float(header.get("total_costo_header", 0.0)) + delta
+            headers_atributes_modificados = True
+            entry = _ensure_total_cantidad_entry(cantidades, "atribute", header_id)
+            entry["total"] = float(entry.get("total", 0.0)) + delta
+
+    total_cantidad["cantidades"] = cantidades
+    total_cantidad["total_cantidades"] = sum(float(entry.get("total", 0.0) or 0.0) for entry in cantidades)
+    tipo.total_cantidad = total_cantidad
+    if headers_atributes_modificados:
+        flag_modified(tipo, "headers_atributes")
+    _recalculate_total_usd(tipo)
+
+
+def _typed_attribute_value(value: Any, header: Dict[str, Any], numerico: bool) -> Any:
+    # Los atributos que entran en cálculos/totales se guardan como número; el
+    # resto queda como texto (códigos, descripciones)
+    if not numerico:
+        return "" if value is None else str(value)
+    if value is None or (isinstance(value, str) and value.strip() == ""):
+        return None
+    return _to_float(value, f"atributo {header['titulo']}")
+
+
+def _coerce_attribute_values(tipo: TipoMaterial, material: Material, numericos: set[int]) -> None:
+    # Un header puede pasar a numérico (isCantidad, nuevo cálculo): sus valores
+    # guardados como texto se convierten en el recálculo completo
+    headers = _get_attribute_header_map(tipo)
+    for attr in material.atributos or []:
+        header = headers.get(attr["id_header_atribute"])
+        if header is None or attr["id_header_atribute"] not in numericos:
+            continue
+        if not isinstance(attr.get("value"), (int, float)):
+            attr["value"] = _typed_attribute_value(attr.get("value"), header, True)
+
+
 def _normalize_material(
     tipo: TipoMaterial,
     payload: MaterialCreate | MaterialUpdate,
@@ -516,11 +650,11 @@ def _normalize_material(
                 if payload.cantidad is None or str(payload.cantidad).strip() == "":
                     raise HTTPException(status_code=400, detail="La cantidad es obligatoria para este tipo de material")
             if payload.cantidad is not None:
-                material.cantidad = str(payload.cantidad)
+                material.cantidad = _to_float(payload.cantidad, "cantidad")
         else:
             material.cantidad = None
     elif payload.cantidad is not None:
-        material.cantidad = str(payload.cantidad)
+        material.cantidad = _to_float(payload.cantidad, "cantidad")
 
     if unidad_header:
         if unidad_header.get("active", True):
@@ -535,7 +669,7 @@ def _normalize_material(
         material.unidad = str(payload.unidad)
 
     if hasattr(payload, "costo_unitario") and payload.costo_unitario is not None:
-        material.costo_unitario = float(payload.costo_unitario)
+        material.costo_unitario = _to_float(payload.costo_unitario, "costo_unitario")
 
     atributo_headers = _get_attribute_header_map(tipo)
 
@@ -545,6 +679,7 @@ def _normalize_material(
                 raise HTTPException(status_code=400, detail="Se requieren atributos para este tipo de material")
         else:
             attr_map = {a.id_header_atribute: a.value for a in payload.atributos}
+            numericos = atributos_numericos(tipo.headers_base, tipo.headers_atributes)
             atributos: List[Dict[str, Any]] = []
             for attr_id, header in atributo_headers.items():
                 if attr_id not in attr_map:
@@ -552,7 +687,12 @@ def _normalize_material(
                         status_code=400,
                         detail=f"Falta el atributo '{header['titulo']}' en la carga del material",
                     )
-                atributos.append({"id_header_atribute": attr_id, "value": str(attr_map[attr_id])})
+                atributos.append(
+                    {
+                        "id_header_atribute": attr_id,
+                        "value": _typed_attribute_value(attr_map[attr_id], header, attr_id in numericos),
+                    }
+                )
             material.atributos = atributos
     else:
         material.atributos = []
@@ -560,6 +700,91 @@ def _normalize_material(
     return material
 
 
+def _calculo_to_dict(calculo: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    calculo = calculo or {}
+    return {
+        "activo": bool(calculo.get("activo", False)),
+        "isMultiple": bool(calculo.get("isMultiple", False)),
+        "operaciones": [
+            {
+                "tipo": op.get("tipo", "multiplicacion"),
+                "headers_base": op.get("headers_base"),
+                "headers_atributes": op.get("headers_atributes"),
+            }
+            for op in calculo.get("operaciones") or []
+        ],
+    }
+
+
+def _tipo_material_to_dict(tipo: TipoMaterial) -> Dict[str, Any]:
+    # Mismo formato que TipoMaterialRead, armado directo desde el ORM (sin Pydantic)
+    total_cantidad = ensure_total_cantidad_struct(tipo.total_cantidad)
+    headers_atributes = tipo.headers_atributes
+    return {
+        "id_tipo_material": tipo.id_tipo_material,
+        "titulo": tipo.titulo,
+        "total_costo_unitario": float(tipo.total_costo_unitario),
+        "total_costo_total": float(tipo.total_costo_total),
+        "total_USD": float(tipo.total_USD),
+        "valor_dolar": float(tipo.valor_dolar),
+        "total_cantidad": {
+            "total_cantidades": total_cantidad["total_cantidades"],
+            "cantidades": [
+                {
+                    "typeOfHeader": entry.get("typeOfHeader"),
+                    "idHeader": entry.get("idHeader"),
+                    "total": float(entry.get("total", 0.0) or 0.0),
+                }
+                for entry in total_cantidad["cantidades"]
+            ],
+        },
+        "headers_base": [
+            {
+                "id_header_base": header["id_header_base"],
+                "titulo": header["titulo"],
+                "active": header.get("active", True),
+                "calculo": _calculo_to_dict(header.get("calculo")),
+                "order": header.get("order"),
+            }
+            for header in tipo.headers_base or []
+        ],
+        "headers_atributes": None if headers_atributes is None else [
+            {
+                "id_header_atribute": header["id_header_atribute"],
+                "titulo": header["titulo"],
+                "isCantidad": header.get("isCantidad", False),
+                "calculo": _calculo_to_dict(header.get("calculo")),
+                "total_costo_header": float(header.get("total_costo_header", 0.0) or 0.0),
+                "order": header.get("order"),
+            }
+            for header in headers_atributes
+        ],
+        "order_headers": [
+            {"id": entry["id"], "order": entry["order"], "type": entry.get("type", "base")}
+            for entry in tipo.order_headers or []
+        ],
+        "materiales_count": getattr(tipo, "materiales_count", 0),
+    }
+
+
+def _material_to_dict(material: Material) -> Dict[str, Any]:
+    # Mismo formato que MaterialRead
+    atributos = material.atributos
+    return {
+        "id_material": material.id_material,
+        "id_tipo_material": material.id_tipo_material,
+        "detalle": material.detalle,
+        "unidad": material.unidad,
+        "cantidad": material.cantidad,
+        "costo_unitario": float(material.costo_unitario),
+        "costo_total": float(material.costo_total),
+        "atributos": None if atributos is None else [
+            {"id_header_atribute": attr["id_header_atribute"], "value": attr.get("value")}
+            for attr in atributos
+        ],
+    }
+
+
 def _recalculate_total_usd(tipo: TipoMaterial) -> None:
     valor = float(tipo.valor_dolar or DEFAULT_VALOR_DOLAR)
     tipo.total_USD = float(tipo.total_costo_total or 0.0) * valor
@@ -571,21 +796,157 @@ def _apply_global_valor_dolar(db: Session, nuevo_valor: float) -> None:
         tipo.valor_dolar = float(nuevo_valor)
         _recalculate_total_usd(tipo)
         db.add(tipo)
+    fijar_config(db, {CLAVE_VALOR_DOLAR: float(nuevo_valor)})
 
 
 def _get_existing_valor_dolar(db: Session) -> float:
+    valor = valor_dolar_config(db)
+    if valor is not None:
+        return valor
+    # Bases sin la clave en configuracion: el valor que ya tienen los tipos
     existing = db.scalar(select(TipoMaterial.valor_dolar).limit(1))
     if existing is None:
         return DEFAULT_VALOR_DOLAR
     return float(existing)
 
 
-@router.get("/tipos", response_model=List[TipoMaterialRead])
-def listar_tipos_material(db: Session = Depends(get_db)):
+def _recalculate_tipo_completo(tipo: TipoMaterial) -> None:
+    tipo.total_cantidad = _initialize_total_cantidad(tipo.headers_base, tipo.headers_atributes)
+    tipo.total_costo_unitario = 0.0
+    tipo.total_costo_total = 0.0
+    for header in tipo.headers_atributes or []:
+        header["total_costo_header"] = 0.0
+    grafo = construir_grafo(tipo.headers_base, tipo.headers_atributes)
+    numericos = atributos_numericos(tipo.headers_base, tipo.headers_atributes)
+    if tipo.materiales:
+        for material in tipo.materiales:
+            _coerce_attribute_values(tipo, material, numericos)
+            _apply_calculo(tipo, material, grafo=grafo)
+            flag_modified(material, "atributos")
+            _add_material_to_totals(tipo, material)
+    else:
+        _recalculate_total_usd(tipo)
+
+
+def _recalculate_header_totals(
+    tipo: TipoMaterial,
+    base_ids: set[int],
+    attr_ids: set[int],
+    sumas_atributos: Optional[Dict[int, float]] = None,
+) -> None:
+    # sumas_atributos: totales por header ya calculados en SQL (material_atributos)
+    materiales = list(tipo.materiales or [])
+    total_cantidad = ensure_total_cantidad_struct(tipo.total_cantidad)
+    cantidades = total_cantidad.get("cantidades") or []
+
+    for header_id, header in _get_base_header_map(tipo).items():
+        if header_id not in base_ids:
+            continue
+        field = BASE_TITLE_FIELD_MAP.get(header["titulo"].strip().lower())
+        if field == "costo_total":
+            tipo.total_costo_total = sum(float(m.costo_total or 0.0) for m in materiales)
+        elif field == "costo_unitario":
+            tipo.total_costo_unitario = sum(float(m.costo_unitario or 0.0) for m in materiales)
+        elif header_id == 2 and header.get("active", True):
+            entry = _ensure_total_cantidad_entry(cantidades, "base", header_id)
+            entry["total"] = sum(
+                _to_float(_extract_base_value(m, header), header["titulo"], allow_blank=True) for m in materiales
+            )
+
+    for header_id, header in _get_attribute_header_map(tipo).items():
+        if header_id not in attr_ids:
+            continue
+        calculo = header.get("calculo") or {}
+        if not (header.get("isCantidad") or calculo.get("activo")):
+            # Dejó de sumar: se saca del agregado
+            cantidades = [
+                entry for entry in cantidades
+                if not (entry["typeOfHeader"] == "atribute" and entry["idHeader"] == header_id)
+            ]
+            header["total_costo_header"] = 0.0
+            continue
+        if sumas_atributos is not None:
+            total = float(sumas_atributos.get(header_id, 0.0))
+        else:
+            total = 0.0
+            for material in materiales:
+                attr = _get_material_attribute_map(material).get(header_id)
+                if attr is not None:
+                    total += _to_float(attr.get("value"), f"atributo {header['titulo']}", allow_blank=True)
+        header["total_costo_header"] = total
+        _ensure_total_cantidad_entry(cantidades, "atribute", header_id)["total"] = total
+
+    total_cantidad["cantidades"] = cantidades
+    total_cantidad["total_cantidades"] = sum(float(entry.get("total", 0.0) or 0.0) for entry in cantidades)
+    tipo.total_cantidad = total_cantidad
+    _recalculate_total_usd(tipo)
+
+
+def _merge_header_updates(
+    headers: List[Dict[str, Any]],
+    updates: List[Any],
+    id_field: str,
+) -> tuple[set[int], set[int], set[int], set[int], bool]:
+    """
+    Aplica los cambios parciales sobre `headers` (in place) y clasifica qué
+    cambió: (titulo, calculo, isCantidad, active, order). Los updates sin id
+    se emparejan por posición.
+    """
+    by_id = {int(header[id_field]): header for header in headers}
+    titulos: set[int] = set()
+    calculos: set[int] = set()
+    cantidades: set[int] = set()
+    activos: set[int] = set()
+    orden = False
+
+    for position, update in enumerate(updates):
+        data = update.model_dump(exclude_unset=True)
+        header_id = data.pop(id_field, None)
+        if header_id is None:
+            if position >= len(headers):
+                raise HTTPException(status_code=400, detail=f"No existe el header en la posición {position + 1}")
+            header = headers[position]
+        else:
+            header = by_id.get(int(header_id))
+            if header is None:
+                raise HTTPException(status_code=400, detail=f"No existe el header con id {header_id}")
+        header_id = int(header[id_field])
+
+        if data.get("titulo") is not None and data["titulo"] != header.get("titulo"):
+            header["titulo"] = data["titulo"]
+            titulos.add(header_id)
+        if "calculo" in data:
+            nuevo = _calculo_to_dict(data["calculo"])
+            if nuevo != _calculo_to_dict(header.get("calculo")):
+                header["calculo"] = nuevo
+                calculos.add(header_id)
+        if data.get("isCantidad") is not None and bool(data["isCantidad"]) != bool(header.get("isCantidad", False)):
+            header["isCantidad"] = bool(data["isCantidad"])
+            cantidades.add(header_id)
+        if data.get("active") is not None and bool(data["active"]) != bool(header.get("active", True)):
+            if header_id in REQUIRED_BASE_HEADERS and not data["active"]:
+                raise HTTPException(status_code=400, detail=f"El header '{header['titulo']}' no se puede desactivar")
+            header["active"] = bool(data["active"])
+            activos.add(header_id)
+        if data.get("order") is not None and int(data["order"]) != header.get("order"):
+            header["order"] = int(data["order"])
+            orden = True
+
+    return titulos, calculos, cantidades, activos, orden
+
+
+@router.get(
+    "/tipos",
+    response_model=List[TipoMaterialRead],
+    dependencies=[Depends(conditional_catalog("tipos_material", "materiales"))],
+)
+def listar_tipos_material(response: Response, db: Session = Depends(get_db)):
     stmt = select(TipoMaterial).options(selectinload(TipoMaterial.materiales))
     tipos = db.scalars(stmt).all()
     for tipo in tipos:
         _normalize_tipo_totales(tipo)
+    if trusted_orm_responses():
+        return trusted_json_response([_tipo_material_to_dict(tipo) for tipo in tipos], headers=response.headers)
     return tipos
 
 
@@ -605,6 +966,7 @@ def crear_tipo_material(payload: TipoMaterialCreate, db: Session = Depends(get_d
     headers_base = _build_headers_base(payload.headers_base_active)
     headers_base = _apply_base_calculations(headers_base, getattr(payload, "headers_base_calculations", None))
     headers_atributes = _normalize_headers_atributes(payload.headers_atributes)
+    construir_grafo(headers_base, headers_atributes)
     order_headers = _apply_order_headers(headers_base, headers_atributes, getattr(payload, "order_headers", None))
     total_cantidad = _initialize_total_cantidad(headers_base, headers_atributes)
 
@@ -655,23 +1017,99 @@ def actualizar_tipo_material(
     headers_base = _apply_base_calculations(headers_base, getattr(payload, "headers_base_calculations", None))
     headers_atributes = _normalize_headers_atributes(payload.headers_atributes)
     order_headers = _apply_order_headers(headers_base, headers_atributes, getattr(payload, "order_headers", None))
-    total_cantidad = _initialize_total_cantidad(headers_base, headers_atributes)
 
     tipo.titulo = payload.titulo
     tipo.headers_base = headers_base
     tipo.headers_atributes = headers_atributes
-    tipo.total_cantidad = total_cantidad
-    tipo.total_costo_unitario = 0.0
-    tipo.total_costo_total = 0.0
     tipo.order_headers = order_headers
     tipo.valor_dolar = valor_dolar
+    _recalculate_tipo_completo(tipo)
+
+    db.add(tipo)
+    db.commit()
+    db.refresh(tipo)
+    _normalize_tipo_totales(tipo)
+    return tipo
 
-    if tipo.materiales:
-        for material in tipo.materiales:
-            _apply_calculo(tipo, material)
-            _add_material_to_totals(tipo, material)
-    else:
-        _recalculate_total_usd(tipo)
+
+@router.patch("/tipos/{id_tipo_material}", response_model=TipoMaterialRead)
+def actualizar_parcial_tipo_material(
+    id_tipo_material: int,
+    payload: TipoMaterialUpdate,
+    db: Session = Depends(get_db),
+):
+    """
+    Cambios parciales sobre un tipo de material. A diferencia del PUT, sólo se
+    recalculan los headers cuyo cálculo cambió (y los que dependen de ellos);
+    renombrar atributos o reordenar columnas no toca los materiales.
+    """
+    stmt = (
+        select(TipoMaterial)
+        .options(selectinload(TipoMaterial.materiales))
+        .where(TipoMaterial.id_tipo_material == id_tipo_material)
+    )
+    tipo = db.scalar(stmt)
+    if not tipo:
+        raise HTTPException(status_code=404, detail="Tipo de material no encontrado")
+
+    if payload.titulo is not None and payload.titulo != tipo.titulo:
+        existente = db.scalar(
+            select(TipoMaterial)
+            .where(TipoMaterial.titulo == payload.titulo)
+            .where(TipoMaterial.id_tipo_material != id_tipo_material)
+        )
+        if existente:
+            raise HTTPException(status_code=409, detail="Ya existe un tipo de material con ese título")
+        tipo.titulo = payload.titulo
+
+    # Copias planas: se reasignan al final para que el ORM registre el cambio
+    headers_base = [dict(header) for header in tipo.headers_base or []]
+    headers_atributes = [dict(header) for header in tipo.headers_atributes or []]
+
+    base_titulos, base_calculos, _, base_activos, base_orden = _merge_header_updates(
+        headers_base, payload.headers_base or [], "id_header_base"
+    )
+    _, attr_calculos, attr_cantidades, _, attr_orden = _merge_header_updates(
+        headers_atributes, payload.headers_atributes or [], "id_header_atribute"
+    )
+
+    if base_orden or attr_orden or payload.order_headers is not None:
+        tipo.order_headers = _apply_order_headers(headers_base, headers_atributes, payload.order_headers)
+        headers_base.sort(key=lambda header: header.get("order", 999))
+        headers_atributes.sort(key=lambda header: header.get("order", header["id_header_atribute"]))
+
+    tipo.headers_base = headers_base
+    if tipo.headers_atributes is not None or headers_atributes:
+        tipo.headers_atributes = headers_atributes
+
+    if payload.valor_dolar is not None:
+        tipo.valor_dolar = float(payload.valor_dolar)
+        _apply_global_valor_dolar(db, tipo.valor_dolar)
+
+    # Valida que los cálculos no formen un ciclo antes de tocar materiales
+    grafo = construir_grafo(tipo.headers_base, tipo.headers_atributes)
+
+    # Activar/desactivar columnas base o renombrarlas (el título define qué campo
+    # del material leen) cambia la estructura: mismo recálculo completo que el PUT
+    if base_activos or base_titulos:
+        _recalculate_tipo_completo(tipo)
+    elif base_calculos or attr_calculos or attr_cantidades:
+        # Headers con cálculo cambiado y todo lo que lee de ellos, en orden topológico
+        nodos = grafo.aguas_abajo(
+            [("base", header_id) for header_id in base_calculos]
+            + [("atribute", header_id) for header_id in attr_calculos]
+        )
+        for material in tipo.materiales or []:
+            _apply_calculo(tipo, material, nodos)
+            flag_modified(material, "atributos")
+        base_afectados = base_calculos | {header_id for tipo_header, header_id in nodos if tipo_header == "base"}
+        attr_afectados = attr_calculos | attr_cantidades | {
+            header_id for tipo_header, header_id in nodos if tipo_header == "atribute"
+        }
+        # El flush sincroniza material_atributos; las sumas por header salen de un GROUP BY
+        db.flush()
+        sumas = totales_por_header(db, tipo.id_tipo_material, attr_afectados)
+        _recalculate_header_totals(tipo, base_afectados, attr_afectados, sumas)
 
     db.add(tipo)
     db.commit()
@@ -691,6 +1129,8 @@ def obtener_tipo_material(id_tipo_material: int, db: Session = Depends(get_db)):
     if not tipo:
         raise HTTPException(status_code=404, detail="Tipo de material no encontrado")
     _normalize_tipo_totales(tipo)
+    if trusted_orm_responses():
+        return trusted_json_response(_tipo_material_to_dict(tipo))
     return tipo
 
 
@@ -707,6 +1147,9 @@ def descargar_excel_tipo_material(id_tipo_material: int, db: Session = Depends(g
     )
     materiales = db.scalars(stmt).all()
 
+    # openpyxl se carga recién con el primer export
+    from app.services.materiales_excel import build_excel_for_tipo_material
+
     excel_bytes = build_excel_for_tipo_material(tipo, materiales)
     filename = f"{_slugify_filename(tipo.titulo)}.xlsx"
 
@@ -717,6 +1160,42 @@ def descargar_excel_tipo_material(id_tipo_material: int, db: Session = Depends(g
     )
 
 
+@router.post("/excel", response_model=ExcelTrabajoRead, status_code=status.HTTP_202_ACCEPTED)
+def iniciar_excel_materiales(background_tasks: BackgroundTasks):
+    """Arranca el armado del libro con una hoja por tipo; el progreso se consulta por id_trabajo"""
+    from app.services import materiales_excel_libro
+
+    trabajo = materiales_excel_libro.crear_trabajo()
+    background_tasks.add_task(materiales_excel_libro.ejecutar_trabajo, trabajo["id_trabajo"])
+    return trabajo
+
+
+@router.get("/excel/{id_trabajo}", response_model=ExcelTrabajoRead)
+def estado_excel_materiales(id_trabajo: str):
+    from app.services import materiales_excel_libro
+
+    trabajo = materiales_excel_libro.leer_estado(id_trabajo)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo de exportación no encontrado")
+    return trabajo
+
+
+@router.get("/excel/{id_trabajo}/archivo")
+def descargar_excel_materiales(id_trabajo: str):
+    from app.services import materiales_excel_libro
+
+    trabajo = materiales_excel_libro.leer_estado(id_trabajo)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo de exportación no encontrado")
+    if trabajo["estado"] != "listo":
+        raise HTTPException(status_code=409, detail=f"El libro todavía no está listo (estado: {trabajo['estado']})")
+    return FileResponse(
+        materiales_excel_libro.ruta_archivo(id_trabajo),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename="materiales.xlsx",
+    )
+
+
 @router.post("/tipos/{id_tipo_material}/upload-excel")
 async def upload_excel_tipo_material(
     id_tipo_material: int,
@@ -725,6 +1204,9 @@ async def upload_excel_tipo_material(
 ):
     if file is None:
         raise HTTPException(status_code=400, detail="Debe adjuntar un archivo Excel")
+
+    from app.services.materiales_excel_upload import process_excel_upload
+
     result = await process_excel_upload(file, id_tipo_material, db)
     tipo = db.get(TipoMaterial, id_tipo_material)
     if tipo:
@@ -760,7 +1242,37 @@ def listar_materiales_por_tipo(id_tipo_material: int, db: Session = Depends(get_
     if not tipo:
         raise HTTPException(status_code=404, detail="Tipo de material no encontrado")
     stmt = select(Material).where(Material.id_tipo_material == id_tipo_material)
-    return db.scalars(stmt).all()
+    materiales = db.scalars(stmt).all()
+    if trusted_orm_responses():
+        return trusted_json_response([_material_to_dict(material) for material in materiales])
+    return materiales
+
+
+@router.get("/tipo/{id_tipo_material}/filtrar", response_model=List[MaterialRead])
+def filtrar_materiales_por_atributo(
+    id_tipo_material: int,
+    atributo: int = Query(..., description="id_header_atribute por el que filtrar/ordenar"),
+    minimo: Optional[float] = Query(default=None),
+    maximo: Optional[float] = Query(default=None),
+    texto: Optional[str] = Query(default=None, description="Coincidencia parcial sobre el valor como texto"),
+    orden: Optional[Literal["asc", "desc"]] = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    if not db.get(TipoMaterial, id_tipo_material):
+        raise HTTPException(status_code=404, detail="Tipo de material no encontrado")
+    materiales = filtrar_materiales(db, id_tipo_material, atributo, minimo, maximo, texto, orden, limit, offset)
+    if trusted_orm_responses():
+        return trusted_json_response([_material_to_dict(material) for material in materiales])
+    return materiales
+
+
+@router.get("/tipos/{id_tipo_material}/atributos/resumen", response_model=List[AtributoResumenRead])
+def resumen_atributos_tipo_material(id_tipo_material: int, db: Session = Depends(get_db)):
+    if not db.get(TipoMaterial, id_tipo_material):
+        raise HTTPException(status_code=404, detail="Tipo de material no encontrado")
+    return resumen_por_header(db, id_tipo_material)
 
 
 @router.get("/{id_material}", response_model=MaterialRead)
@@ -783,10 +1295,20 @@ def actualizar_material(id_material: int, payload: MaterialUpdate, db: Session =
 
     db.refresh(tipo)
 
-    _remove_material_from_totals(tipo, material)
+    # Sólo se reevalúan los headers calculados que leen (directa o
+    # indirectamente) algún valor editado, y sólo sus totales se ajustan
+    grafo = construir_grafo(tipo.headers_base, tipo.headers_atributes)
+    anteriores = _material_header_values(tipo, material)
     material = _normalize_material(tipo, payload, material)
-    _apply_calculo(tipo, material)
-    _add_material_to_totals(tipo, material)
+    cambiados = [
+        nodo for nodo, valor in _material_header_values(tipo, material).items()
+        if anteriores.get(nodo) != valor
+    ]
+    nodos = grafo.aguas_abajo(cambiados)
+    _apply_calculo(tipo, material, nodos)
+    if any(tipo_header == "atribute" for tipo_header, _ in nodos):
+        flag_modified(material, "atributos")
+    _apply_totals_delta(tipo, anteriores, _material_header_values(tipo, material), set(cambiados) | set(nodos))
 
     db.add(material)
     db.add(tipo)
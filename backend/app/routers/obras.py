@@ -5,7 +5,8 @@ from sqlalchemy import select
 from app.core.deps import role_required
 from app.db.session import get_db
 from app.db.models import Obra
-from app.schemas.obras import ObraCreate, ObraRead, ObraUpdate
+from app.schemas.obras import ObraCreate, ObraRead, ObraUpdate, PresupuestoObra
+from app.services.presupuesto_obra import calcular_presupuesto
 
 
 router = APIRouter(prefix="/obras", tags=["obras"])
@@ -64,3 +65,15 @@ def actualizar_obra(
     return obra
 
 
+@router.get("/{id}/presupuesto", response_model=PresupuestoObra)
+def obtener_presupuesto_obra(
+    id: int,
+    db: Session = Depends(get_db),
+    _: None = Depends(role_required(["Cotizador", "Administrador"]))
+):
+    """Presupuesto de la obra por secciones; sólo se recalculan las secciones cuyas tablas cambiaron"""
+    obra = db.scalar(select(Obra).where(Obra.id_obra == id))
+    if not obra:
+        raise HTTPException(status_code=404, detail="Obra no encontrada")
+
+    return {"id_obra": obra.id_obra, "moneda": obra.moneda, **calcular_presupuesto(db, obra.id_obra)}
@@ -1,23 +1,22 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, Form
 from sqlalchemy.orm import Session
 from sqlalchemy import select, text
 from typing import List
 
+from app.core.http_cache import conditional_catalog
 from app.db.session import get_db
 from app.db.models import Personal
 from app.schemas.personal import PersonalCreate, PersonalUpdate, PersonalRead
-try:
-    from app.services.limpiar_y_convertir_datos_personal import limpiar_y_convertir_datos_personal, COLUMNAS_FINALES  # type: ignore
-    _PANDAS_AVAILABLE = True
-except Exception as e:
-    print(f"Error importando algoritmo de personal: {e}")
-    _PANDAS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter(prefix="/personal", tags=["Personal"])
 
 
-@router.get("/", response_model=List[PersonalRead])
+@router.get("/", response_model=List[PersonalRead], dependencies=[Depends(conditional_catalog("personal"))])
 def listar_personal(db: Session = Depends(get_db)):
     return db.scalars(select(Personal)).all()
 
@@ -66,7 +65,11 @@ async def importar_excel_original(
     if not file.filename.lower().endswith((".xlsx", ".xlsm", ".xls", ".csv")):
         raise HTTPException(status_code=400, detail="Archivo inválido. Acepte .xlsx/.xls/.csv")
 
-    if not _PANDAS_AVAILABLE:
+    # pandas se importa recién acá: es caro y sólo lo usa este endpoint
+    try:
+        from app.services.limpiar_y_convertir_datos_personal import limpiar_y_convertir_datos_personal, COLUMNAS_FINALES
+    except ImportError:
+        logger.exception("No se pudo importar el algoritmo de limpieza (pandas)")
         raise HTTPException(status_code=500, detail="Procesamiento con pandas no disponible en el servidor")
 
     import csv, io
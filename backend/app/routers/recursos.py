@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select
 from typing import List
 
+from app.core.http_cache import conditional_catalog
 from app.db.session import get_db
 from app.db.models import Tipo_recurso, Recurso
 from app.schemas.recursos import (
@@ -17,7 +18,11 @@ from app.schemas.recursos import (
 router = APIRouter(prefix="/recursos", tags=["recursos"])
 
 
-@router.get("/tiposRecurso", response_model=List[TipoRecursoRead])
+@router.get(
+    "/tiposRecurso",
+    response_model=List[TipoRecursoRead],
+    dependencies=[Depends(conditional_catalog("tipos_recurso"))],
+)
 def listar_tipos_recurso(db: Session = Depends(get_db)):
     return db.scalars(select(Tipo_recurso)).all()
 
@@ -46,7 +51,11 @@ def actualizar_tipo_recurso(id: int, payload: TipoRecursoUpdate, db: Session = D
     return tipo
 
 
-@router.get("/", response_model=List[RecursoRead])
+@router.get(
+    "/",
+    response_model=List[RecursoRead],
+    dependencies=[Depends(conditional_catalog("recursos"))],
+)
 def listar_recursos(tipoId: int | None = Query(default=None, alias="tipoId"), db: Session = Depends(get_db)):
     stmt = select(Recurso)
     if tipoId is not None:
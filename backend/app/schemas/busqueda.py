@@ -0,0 +1,21 @@
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+
+TablaBusqueda = Literal["materiales", "equipos", "personal", "recursos"]
+
+
+class ResultadoBusqueda(BaseModel):
+    tabla: TablaBusqueda
+    id: int
+    texto: str
+    # id_tipo_material / id_tipo_recurso; None para equipos y personal
+    id_tipo: Optional[int] = None
+    score: float
+
+
+class BusquedaRead(BaseModel):
+    # None cuando el offset pasa el final de los resultados
+    total: Optional[int] = None
+    resultados: List[ResultadoBusqueda]
@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+
+
+class ConfigPar(BaseModel):
+    clave: str = Field(..., min_length=1, max_length=100)
+    valor: str | float | int | bool
+
+
+class ConfigRead(BaseModel):
+    clave: str
+    valor: str
@@ -79,3 +79,11 @@ class CostoRead(CostoBase):
     class Config:
         from_attributes = True
 
+
+class ItemObraCostoResumen(BaseModel):
+    id_item: int
+    id_obra: Optional[int] = None
+    descripcion: Optional[str] = None
+    costos: int = 0
+    cantidad: float = 0.0
+    total: float = 0.0
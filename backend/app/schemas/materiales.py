@@ -24,6 +24,7 @@ class HeaderBase(BaseModel):
 
 
 class HeaderBaseUpdate(BaseModel):
+    id_header_base: Optional[int] = None
     titulo: Optional[str] = None
     active: Optional[bool] = None
     calculo: Optional[Calculo] = None
@@ -54,6 +55,7 @@ class HeaderAtributoCreate(BaseModel):
 
 
 class HeaderAtributoUpdate(BaseModel):
+    id_header_atribute: Optional[int] = None
     titulo: Optional[str] = None
     isCantidad: Optional[bool] = None
     calculo: Optional[Calculo] = None
@@ -113,14 +115,15 @@ class TipoMaterialRead(BaseModel):
 
 class MaterialAtributo(BaseModel):
     id_header_atribute: int
-    value: str
+    # Número para atributos que entran en cálculos/totales, texto para el resto
+    value: float | str | None
 
 
 class MaterialBase(BaseModel):
     id_tipo_material: int
     detalle: str
     unidad: Optional[str] = None
-    cantidad: Optional[str] = None
+    cantidad: Optional[float | str] = None
     costo_unitario: float
     atributos: Optional[List[MaterialAtributo]] = None
 
@@ -132,15 +135,31 @@ class MaterialCreate(MaterialBase):
 class MaterialUpdate(BaseModel):
     detalle: Optional[str] = None
     unidad: Optional[str] = None
-    cantidad: Optional[str] = None
+    cantidad: Optional[float | str] = None
     costo_unitario: Optional[float] = None
     atributos: Optional[List[MaterialAtributo]] = None
 
 
 class MaterialRead(MaterialBase):
     id_material: int
+    cantidad: Optional[float] = None
     costo_total: float
 
     class Config:
         from_attributes = True
 
+
+class AtributoResumenRead(BaseModel):
+    id_header_atribute: int
+    cantidad_materiales: int
+    total: float
+    minimo: Optional[float] = None
+    maximo: Optional[float] = None
+
+
+class ExcelTrabajoRead(BaseModel):
+    id_trabajo: str
+    estado: str  # pendiente | generando | listo | error
+    total_hojas: int
+    hojas_listas: int
+    error: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 
 
@@ -47,3 +47,88 @@ class ObraRead(ObraBase):
 
     class Config:
         from_attributes = True
+
+
+# ============================================================================
+# PRESUPUESTO
+# ============================================================================
+
+class PresupuestoItem(BaseModel):
+    id_item: int
+    descripcion: str
+    meses_operario: float
+    capataz: float
+    costo_total: float
+
+
+class PresupuestoItems(BaseModel):
+    items: List[PresupuestoItem]
+    meses_operario: float
+    capataz: float
+    total: float
+
+
+class PresupuestoTipoCosto(BaseModel):
+    id_tipo_costo: int
+    tipo: str
+    descripcion: Optional[str] = None
+    costos: int
+    total: float
+
+
+class PresupuestoCostos(BaseModel):
+    tipos: List[PresupuestoTipoCosto]
+    total: float
+
+
+class PresupuestoTipoMaterial(BaseModel):
+    id_tipo_material: int
+    titulo: str
+    total: float
+    total_USD: float
+
+
+class PresupuestoMateriales(BaseModel):
+    tipos: List[PresupuestoTipoMaterial]
+    total: float
+    total_USD: float
+
+
+class PresupuestoTipoRecurso(BaseModel):
+    id_tipo_recurso: int
+    descripcion: str
+    recursos: int
+    cantidad: float
+    meses_operario: float
+
+
+class PresupuestoRecursos(BaseModel):
+    tipos: List[PresupuestoTipoRecurso]
+    meses_operario: float
+
+
+class PresupuestoPersonal(BaseModel):
+    cantidad: int
+    costo_mensual: float
+    costo_mensual_promedio: float
+
+
+class PresupuestoEquipos(BaseModel):
+    cantidad: int
+    costo_mensual: float
+
+
+class PresupuestoObra(BaseModel):
+    id_obra: int
+    moneda: str
+    items: PresupuestoItems
+    costos: PresupuestoCostos
+    # Catálogos comunes a todas las obras, como referencia: no suman al total
+    materiales: PresupuestoMateriales
+    recursos: PresupuestoRecursos
+    personal: PresupuestoPersonal
+    equipos: PresupuestoEquipos
+    # Sólo los costos asignados a los ítems de esta obra
+    total: float
+    # Secciones que se recalcularon en este pedido (el resto salió de la cache)
+    recalculadas: List[str]
@@ -0,0 +1,85 @@
+"""
+Búsqueda por texto parcial sobre materiales, equipos, personal y recursos.
+
+Cada tabla aporta un SELECT con la misma forma y se combinan con UNION ALL.
+El texto se compara como lower(f_unaccent(col)), la misma expresión de los
+GIN gin_trgm_ops de la migración 0007: si cambia acá hay que cambiar el índice.
+"""
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import Integer, bindparam, func, literal, null, or_, select, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.models import Equipo, Material, Personal, Recurso
+
+
+# tabla -> (id, texto buscado, id del tipo al que pertenece si lo tiene)
+ENTIDADES: Dict[str, Tuple[Any, Any, Any]] = {
+    "materiales": (Material.id_material, Material.detalle, Material.id_tipo_material),
+    "equipos": (Equipo.id_equipo, Equipo.detalle, None),
+    "personal": (Personal.id_personal, Personal.funcion, None),
+    "recursos": (Recurso.id_recurso, Recurso.descripcion, Recurso.id_tipo_recurso),
+}
+
+
+def _normalizar(expr) -> ColumnElement:
+    return func.lower(func.f_unaccent(expr))
+
+
+def _escapar_like(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def buscar(db: Session, q: str, tablas: Iterable[str], limit: int, offset: int) -> Dict[str, Any]:
+    """
+    Coincidencias de `q` sin distinguir acentos ni mayúsculas: contiene el
+    texto (LIKE) o alguna palabra se le parece (word_similarity, operador <%).
+    Ordena por parecido y devuelve {total, resultados} paginado.
+    """
+    termino = _normalizar(bindparam("q", q.strip()))
+    patron = _normalizar(bindparam("patron", f"%{_escapar_like(q.strip())}%"))
+
+    selects = []
+    for tabla in tablas:
+        id_col, texto_col, tipo_col = ENTIDADES[tabla]
+        texto = _normalizar(texto_col)
+        selects.append(
+            select(
+                literal(tabla).label("tabla"),
+                id_col.label("id"),
+                texto_col.label("texto"),
+                (tipo_col if tipo_col is not None else null().cast(Integer)).label("id_tipo"),
+                func.word_similarity(termino, texto).label("score"),
+                func.similarity(termino, texto).label("similitud"),
+            ).where(or_(texto.like(patron, escape="\\"), termino.op("<%")(texto)))
+        )
+
+    coincidencias = union_all(*selects).subquery("coincidencias")
+    stmt = (
+        select(coincidencias, func.count().over().label("total"))
+        .order_by(
+            coincidencias.c.score.desc(),
+            coincidencias.c.similitud.desc(),
+            coincidencias.c.texto,
+            coincidencias.c.tabla,
+            coincidencias.c.id,
+        )
+        .limit(limit)
+        .offset(offset)
+    )
+
+    rows = db.execute(stmt).mappings().all()
+    resultados: List[Dict[str, Any]] = [
+        {
+            "tabla": row["tabla"],
+            "id": row["id"],
+            "texto": row["texto"],
+            "id_tipo": row["id_tipo"],
+            "score": float(row["score"] or 0.0),
+        }
+        for row in rows
+    ]
+    # Con offset más allá del final no vuelve ninguna fila que traiga el total
+    total = rows[0]["total"] if rows else None
+    return {"total": total, "resultados": resultados}
@@ -0,0 +1,222 @@
+"""
+Configuración global (tabla `configuracion`, clave -> valor texto) cacheada en
+memoria con getters tipados.
+
+Cada worker guarda todas las claves; guardar_config hace el upsert en una sola
+sentencia y emite NOTIFY en el canal `configuracion_cambios`. El valor global
+del dólar vive en la clave `valor_dolar` (ver valor_dolar/fijar_config). Un hilo por
+worker escucha ese canal (conexión psycopg2 propia, fuera del pool) e invalida
+la cache. Como respaldo, la cache también vence a los CONFIG_CACHE_TTL_S.
+"""
+import logging
+import select
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import psycopg2
+from fastapi import HTTPException
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.schemas.configuracion import ConfigPar
+
+
+logger = logging.getLogger(__name__)
+
+CANAL = "configuracion_cambios"
+
+CLAVE_VALOR_DOLAR = "valor_dolar"
+
+_UPSERT = text(
+    """
+    INSERT INTO configuracion (clave, valor)
+    SELECT clave, valor FROM unnest(CAST(:claves AS text[]), CAST(:valores AS text[])) AS t(clave, valor)
+    ON CONFLICT (clave) DO UPDATE SET valor = EXCLUDED.valor
+    """
+)
+
+_VERDADEROS = {"1", "true", "t", "si", "sí", "yes", "y", "on"}
+
+
+def _a_texto(valor) -> str:
+    if isinstance(valor, bool):
+        return "true" if valor else "false"
+    return str(valor)
+
+
+class ConfiguracionCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._valores: Dict[str, str] = {}
+        self._cargado_en: Optional[float] = None
+        # Sube con cada invalidación: una carga que empezó antes no se guarda
+        self._generacion = 0
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self._cargado_en = None
+            self._generacion += 1
+
+    def _vigente(self) -> bool:
+        return self._cargado_en is not None and time.monotonic() - self._cargado_en < settings.CONFIG_CACHE_TTL_S
+
+    def cargar(self, db: Session) -> Dict[str, str]:
+        with self._lock:
+            generacion = self._generacion
+        rows = db.execute(text("SELECT clave, valor FROM configuracion")).fetchall()
+        valores = {clave: valor for clave, valor in rows}
+        with self._lock:
+            # Si se invalidó durante el SELECT, lo leído puede ser anterior al cambio
+            if self._generacion == generacion:
+                self._valores = valores
+                self._cargado_en = time.monotonic()
+        return valores
+
+    def todos(self, db: Session) -> Dict[str, str]:
+        with self._lock:
+            if self._vigente():
+                return dict(self._valores)
+        return dict(self.cargar(db))
+
+    def get(self, db: Session, clave: str, default: Optional[str] = None) -> Optional[str]:
+        return self.todos(db).get(clave, default)
+
+    def get_float(self, db: Session, clave: str, default: Optional[float] = None) -> Optional[float]:
+        valor = self.get(db, clave)
+        if valor is None:
+            return default
+        try:
+            return float(valor.replace(",", "."))
+        except ValueError:
+            return default
+
+    def get_int(self, db: Session, clave: str, default: Optional[int] = None) -> Optional[int]:
+        valor = self.get_float(db, clave)
+        return int(valor) if valor is not None else default
+
+    def get_bool(self, db: Session, clave: str, default: bool = False) -> bool:
+        valor = self.get(db, clave)
+        if valor is None:
+            return default
+        return valor.strip().lower() in _VERDADEROS
+
+
+configuracion = ConfiguracionCache()
+
+
+def valor_dolar(db: Session, default: Optional[float] = None) -> Optional[float]:
+    return configuracion.get_float(db, CLAVE_VALOR_DOLAR, default)
+
+
+def listar_config(db: Session) -> List[Dict[str, str]]:
+    return [{"clave": clave, "valor": valor} for clave, valor in sorted(configuracion.todos(db).items())]
+
+
+_INVALIDAR_AL_COMMIT = "configuracion_invalidar"
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_tras_commit(session: Session) -> None:
+    # Invalidar antes del commit dejaría que otro request recargue el valor
+    # viejo y lo guarde hasta CONFIG_CACHE_TTL_S (sin listener no hay NOTIFY)
+    if session.info.pop(_INVALIDAR_AL_COMMIT, False):
+        configuracion.invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_invalidacion(session: Session) -> None:
+    session.info.pop(_INVALIDAR_AL_COMMIT, None)
+
+
+def fijar_config(db: Session, valores: Dict[str, object]) -> None:
+    """
+    Upsert + NOTIFY dentro de la transacción del llamador (no hace commit). La
+    cache local se invalida cuando esa transacción hace commit.
+    """
+    if not valores:
+        return
+    textos = {clave: _a_texto(valor) for clave, valor in valores.items()}
+    db.execute(_UPSERT, {"claves": list(textos.keys()), "valores": list(textos.values())})
+    # NOTIFY es transaccional: los otros workers lo reciben recién con el commit
+    db.execute(text("SELECT pg_notify(:canal, '')"), {"canal": CANAL})
+    db.info[_INVALIDAR_AL_COMMIT] = True
+
+
+def guardar_config(db: Session, pares: Iterable[ConfigPar]) -> None:
+    # Una clave repetida en el mismo lote haría fallar el ON CONFLICT: gana la última
+    valores = {par.clave: par.valor for par in pares}
+    if not valores:
+        return
+    try:
+        fijar_config(db, valores)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al guardar la configuración: {str(e)}")
+
+
+# ==================== LISTEN/NOTIFY ====================
+
+class ConfigListener:
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="config-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _connect(self):
+        conn = psycopg2.connect(
+            host=settings.POSTGRES_HOST,
+            port=settings.POSTGRES_PORT,
+            dbname=settings.POSTGRES_DB,
+            user=settings.POSTGRES_USER,
+            password=settings.POSTGRES_PASSWORD,
+            sslmode=settings.DATABASE_SSL_MODE or None,
+            application_name=f"{settings.APP_NAME}-config-listener",
+        )
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CANAL}")
+        return conn
+
+    def _run(self) -> None:
+        espera = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                # Pudimos perdernos notificaciones mientras no escuchábamos
+                configuracion.invalidar()
+                espera = 1.0
+                while not self._stop.is_set():
+                    listos, _, _ = select.select([conn], [], [], 1.0)
+                    if not listos:
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        configuracion.invalidar()
+            except psycopg2.Error as exc:
+                logger.warning("Listener de configuración desconectado (%s), reintento en %.0f s", exc, espera)
+                self._stop.wait(espera)
+                espera = min(espera * 2, 30.0)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+config_listener = ConfigListener()
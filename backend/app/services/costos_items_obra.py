@@ -0,0 +1,50 @@
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import CostoItemObraAsignacion, ItemObra
+
+
+def totales_por_item(db: Session, id_tipo_costo: int) -> Dict[int, float]:
+    """SUM(total) por ítem de obra para un tipo de costo, desde costo_item_obra."""
+    stmt = (
+        select(CostoItemObraAsignacion.id_item, func.sum(CostoItemObraAsignacion.total))
+        .where(CostoItemObraAsignacion.id_tipo_costo == id_tipo_costo)
+        .group_by(CostoItemObraAsignacion.id_item)
+    )
+    return {int(id_item): float(total or 0.0) for id_item, total in db.execute(stmt)}
+
+
+def resumen_por_item_obra(db: Session, id_obra: Optional[int] = None) -> List[dict]:
+    """
+    Costo asignado a cada ítem de obra sumando todos los tipos de costo, con un
+    solo GROUP BY. Los ítems referenciados que ya no existen salen sin obra.
+    """
+    asignacion = CostoItemObraAsignacion
+    stmt = (
+        select(
+            asignacion.id_item,
+            ItemObra.id_obra,
+            ItemObra.descripcion,
+            func.count(asignacion.id_costo),
+            func.sum(asignacion.cantidad),
+            func.sum(asignacion.total),
+        )
+        .outerjoin(ItemObra, ItemObra.id_item_Obra == asignacion.id_item)
+        .group_by(asignacion.id_item, ItemObra.id_obra, ItemObra.descripcion)
+        .order_by(asignacion.id_item)
+    )
+    if id_obra is not None:
+        stmt = stmt.where(ItemObra.id_obra == id_obra)
+    return [
+        {
+            "id_item": id_item,
+            "id_obra": item_obra,
+            "descripcion": descripcion,
+            "costos": costos,
+            "cantidad": float(cantidad or 0.0),
+            "total": float(total or 0.0),
+        }
+        for id_item, item_obra, descripcion, costos, cantidad, total in db.execute(stmt)
+    ]
@@ -0,0 +1,56 @@
+import logging
+from typing import List
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db.models import Base
+
+
+logger = logging.getLogger(__name__)
+
+
+def indices_faltantes(engine: Engine) -> List[str]:
+    """
+    Compara los índices declarados en los modelos (Index / index=True / unique=True)
+    con los de la base. Un índice se da por presente si la base tiene uno con el
+    mismo nombre o con las mismas columnas iniciales.
+    """
+    inspector = inspect(engine)
+    faltantes: List[str] = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            faltantes.append(f'tabla "{table.name}"')
+            continue
+
+        existentes = inspector.get_indexes(table.name) + inspector.get_unique_constraints(table.name)
+        nombres = {entry["name"] for entry in existentes}
+        columnas = [list(entry["column_names"]) for entry in existentes]
+
+        esperados = [(index.name, [col.name for col in index.columns]) for index in table.indexes]
+        esperados += [(f"unique({col.name})", [col.name]) for col in table.columns if col.unique]
+
+        for nombre, cols in esperados:
+            if nombre in nombres:
+                continue
+            if any(existente[: len(cols)] == cols for existente in columnas):
+                continue
+            faltantes.append(f'{nombre} en "{table.name}" ({", ".join(cols)})')
+    return faltantes
+
+
+def reportar_indices_faltantes(engine: Engine) -> None:
+    try:
+        faltantes = indices_faltantes(engine)
+    except SQLAlchemyError as exc:
+        logger.warning("No se pudo verificar los índices de la base: %s", exc)
+        return
+    if faltantes:
+        logger.warning(
+            "Faltan %d índices en la base (ejecutar `alembic upgrade head`): %s",
+            len(faltantes),
+            "; ".join(faltantes),
+        )
+    else:
+        logger.info("Índices de la base verificados")
@@ -0,0 +1,90 @@
+"""
+Exportación de tablas completas a CSV o NDJSON sin cargarlas en memoria.
+
+Se lee con un cursor del servidor (stream_results + yield_per) y se emite un
+chunk por lote: la memoria queda acotada a EXPORT_YIELD_PER filas sin importar
+el tamaño de la tabla. El generador abre su propia sesión porque corre cuando
+StreamingResponse ya envía el cuerpo, después de cerrada la sesión del request.
+"""
+import csv
+import io
+import json
+import logging
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy import Table, select
+
+from app.core.config import settings
+from app.db.models import Costo, Equipo, Material, Personal
+from app.db.session import SessionLocal
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+
+TABLAS: Dict[str, Table] = {
+    "materiales": Material.__table__,
+    "costos": Costo.__table__,
+    "personal": Personal.__table__,
+    "equipos": Equipo.__table__,
+}
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _json(valor: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(valor).decode()
+    return json.dumps(valor, ensure_ascii=False, default=str)
+
+
+def _lotes(tabla: Table) -> Iterator[List[Any]]:
+    stmt = select(tabla).order_by(*tabla.primary_key.columns)
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt, execution_options={"yield_per": settings.EXPORT_YIELD_PER})
+        for lote in result.partitions():
+            yield lote
+    except Exception:
+        # Con el cuerpo ya en viaje no se puede cambiar el status: se corta el stream
+        logger.exception("Falló la exportación de %s", tabla.name)
+        raise
+    finally:
+        db.close()
+
+
+def _csv(tabla: Table) -> Iterator[bytes]:
+    columnas = [col.name for col in tabla.columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM para que Excel abra el CSV como UTF-8
+    buffer.write("\ufeff")
+    writer.writerow(columnas)
+    for lote in _lotes(tabla):
+        for row in lote:
+            # Los JSONB (atributos, values, itemsObra) van serializados en su celda
+            writer.writerow(_json(valor) if isinstance(valor, (list, dict)) else valor for valor in row)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _ndjson(tabla: Table) -> Iterator[bytes]:
+    columnas = [col.name for col in tabla.columns]
+    for lote in _lotes(tabla):
+        yield "".join(_json(dict(zip(columnas, row))) + "\n" for row in lote).encode("utf-8")
+
+
+def exportar(tabla: str, formato: str) -> Iterator[bytes]:
+    """Chunks del archivo de `tabla` en `formato` ("csv" o "ndjson"), ordenado por PK."""
+    generador = _csv if formato == "csv" else _ndjson
+    return generador(TABLAS[tabla])
@@ -0,0 +1,85 @@
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, pool, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+
+
+# _sondeo: una sola probe consulta a la vez; _estado protege el último resultado
+_sondeo = threading.Lock()
+_estado = threading.Lock()
+_ultimo: Dict[str, Any] = {"ok": None, "latencia_ms": None, "error": None, "medido_en": 0.0}
+_engine: Optional[Engine] = None
+
+
+def _health_engine() -> Engine:
+    """
+    Engine propio sin pool: la probe no compite con los requests por el pool de
+    la app (con el pool agotado esperaría DB_POOL_TIMEOUT) y los timeouts de
+    conexión y de sentencia acotan cuánto puede tardar.
+    """
+    global _engine
+    if _engine is None:
+        timeout_s = settings.HEALTH_DB_CHECK_TIMEOUT_S
+        _engine = create_engine(
+            settings.DATABASE_URL,
+            poolclass=pool.NullPool,
+            connect_args={
+                # libpq sólo acepta segundos enteros
+                "connect_timeout": max(1, math.ceil(timeout_s)),
+                "options": f"-c statement_timeout={int(timeout_s * 1000)}",
+            },
+        )
+    return _engine
+
+
+def _resultado(en_curso: bool = False) -> Dict[str, Any]:
+    with _estado:
+        ok, medido_en = _ultimo["ok"], _ultimo["medido_en"]
+        error = _ultimo["error"]
+        latencia_ms = _ultimo["latencia_ms"]
+    if ok is None and en_curso:
+        error = "sondeo_en_curso"
+    return {
+        "ok": ok,
+        "latencia_ms": latencia_ms,
+        "error": error,
+        "edad_s": time.monotonic() - medido_en if medido_en else None,
+    }
+
+
+def db_roundtrip() -> Dict[str, Any]:
+    """
+    Resultado del último SELECT 1, reutilizado durante HEALTH_DB_CHECK_TTL_S.
+    Si otra probe ya está consultando no se espera: se devuelve el último
+    resultado (ok=None si todavía no hubo ninguno).
+    """
+    with _estado:
+        vigente = _ultimo["ok"] is not None and time.monotonic() - _ultimo["medido_en"] < settings.HEALTH_DB_CHECK_TTL_S
+    if vigente:
+        return _resultado()
+    if not _sondeo.acquire(blocking=False):
+        return _resultado(en_curso=True)
+    try:
+        inicio = time.perf_counter()
+        try:
+            with _health_engine().connect() as conn:
+                conn.execute(text("SELECT 1"))
+            ok, error = True, None
+        except SQLAlchemyError as exc:
+            ok, error = False, exc.__class__.__name__
+        with _estado:
+            _ultimo.update(
+                ok=ok,
+                error=error,
+                latencia_ms=(time.perf_counter() - inicio) * 1000.0,
+                medido_en=time.monotonic(),
+            )
+    finally:
+        _sondeo.release()
+    return _resultado()
@@ -0,0 +1,91 @@
+from typing import Dict, Iterable, List, Literal, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Material, MaterialAtributoValor
+
+
+def totales_por_header(
+    db: Session,
+    id_tipo_material: int,
+    header_ids: Optional[Iterable[int]] = None,
+) -> Dict[int, float]:
+    """
+    SUM(value_num) por header de atributo de un tipo, desde material_atributos.
+    Los headers sin valores numéricos quedan en 0.
+    """
+    stmt = (
+        select(MaterialAtributoValor.id_header_atribute, func.coalesce(func.sum(MaterialAtributoValor.value_num), 0.0))
+        .where(MaterialAtributoValor.id_tipo_material == id_tipo_material)
+        .group_by(MaterialAtributoValor.id_header_atribute)
+    )
+    ids = None if header_ids is None else list(header_ids)
+    if ids is not None:
+        stmt = stmt.where(MaterialAtributoValor.id_header_atribute.in_(ids))
+    totales = {int(header_id): float(total) for header_id, total in db.execute(stmt)}
+    for header_id in ids or []:
+        totales.setdefault(int(header_id), 0.0)
+    return totales
+
+
+def resumen_por_header(db: Session, id_tipo_material: int) -> List[dict]:
+    stmt = (
+        select(
+            MaterialAtributoValor.id_header_atribute,
+            func.count(MaterialAtributoValor.value_num),
+            func.coalesce(func.sum(MaterialAtributoValor.value_num), 0.0),
+            func.min(MaterialAtributoValor.value_num),
+            func.max(MaterialAtributoValor.value_num),
+        )
+        .where(MaterialAtributoValor.id_tipo_material == id_tipo_material)
+        .group_by(MaterialAtributoValor.id_header_atribute)
+        .order_by(MaterialAtributoValor.id_header_atribute)
+    )
+    return [
+        {
+            "id_header_atribute": header_id,
+            "cantidad_materiales": cantidad,
+            "total": float(total),
+            "minimo": minimo,
+            "maximo": maximo,
+        }
+        for header_id, cantidad, total, minimo, maximo in db.execute(stmt)
+    ]
+
+
+def filtrar_materiales(
+    db: Session,
+    id_tipo_material: int,
+    id_header_atribute: int,
+    minimo: Optional[float] = None,
+    maximo: Optional[float] = None,
+    texto: Optional[str] = None,
+    orden: Optional[Literal["asc", "desc"]] = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> List[Material]:
+    """
+    Materiales de un tipo filtrados/ordenados por el valor de un atributo,
+    resuelto con el índice (id_tipo_material, id_header_atribute, value_num).
+    """
+    valor = MaterialAtributoValor
+    stmt = (
+        select(Material)
+        .join(valor, valor.id_material == Material.id_material)
+        .where(valor.id_tipo_material == id_tipo_material)
+        .where(valor.id_header_atribute == id_header_atribute)
+    )
+    if minimo is not None:
+        stmt = stmt.where(valor.value_num >= minimo)
+    if maximo is not None:
+        stmt = stmt.where(valor.value_num <= maximo)
+    if texto:
+        stmt = stmt.where(valor.value_text.ilike(f"%{texto}%"))
+    if orden == "desc":
+        stmt = stmt.order_by(valor.value_num.desc().nulls_last(), Material.id_material)
+    elif orden == "asc":
+        stmt = stmt.order_by(valor.value_num.asc().nulls_last(), Material.id_material)
+    else:
+        stmt = stmt.order_by(Material.id_material)
+    return list(db.scalars(stmt.limit(limit).offset(offset)))
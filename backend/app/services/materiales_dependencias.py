@@ -0,0 +1,116 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+
+# ("base" | "atribute", id del header)
+NodoHeader = Tuple[str, int]
+
+
+@dataclass
+class GrafoHeaders:
+    # Headers con cálculo activo, cada uno después de los que lee
+    orden: List[NodoHeader] = field(default_factory=list)
+    # header -> headers calculados que lo leen
+    dependientes: Dict[NodoHeader, Set[NodoHeader]] = field(default_factory=dict)
+
+    def aguas_abajo(self, origenes: Iterable[NodoHeader]) -> List[NodoHeader]:
+        """
+        Headers calculados a reevaluar cuando cambian `origenes`: los propios
+        orígenes que sean calculados y todo lo que depende de ellos, en orden
+        topológico.
+        """
+        alcanzados: Set[NodoHeader] = set(origenes)
+        pendientes = deque(alcanzados)
+        while pendientes:
+            nodo = pendientes.popleft()
+            for dependiente in self.dependientes.get(nodo, ()):
+                if dependiente not in alcanzados:
+                    alcanzados.add(dependiente)
+                    pendientes.append(dependiente)
+        return [nodo for nodo in self.orden if nodo in alcanzados]
+
+
+def _referencias(calculo: Dict[str, Any]) -> Set[NodoHeader]:
+    operaciones = calculo.get("operaciones") or []
+    # Sin isMultiple sólo se evalúa la primera operación
+    if not calculo.get("isMultiple"):
+        operaciones = operaciones[:1]
+    referencias: Set[NodoHeader] = set()
+    for operacion in operaciones:
+        referencias.update(("base", int(header_id)) for header_id in operacion.get("headers_base") or [])
+        referencias.update(("atribute", int(header_id)) for header_id in operacion.get("headers_atributes") or [])
+    return referencias
+
+
+def construir_grafo(
+    headers_base: Optional[List[Dict[str, Any]]],
+    headers_atributes: Optional[List[Dict[str, Any]]],
+) -> GrafoHeaders:
+    """
+    Arma el grafo de dependencias de los cálculos de un tipo de material a
+    partir de operaciones.headers_base / headers_atributes. Un ciclo es un
+    error de configuración (400).
+    """
+    lecturas: Dict[NodoHeader, Set[NodoHeader]] = {}
+    for header in headers_base or []:
+        calculo = header.get("calculo") or {}
+        if calculo.get("activo"):
+            lecturas[("base", int(header["id_header_base"]))] = _referencias(calculo)
+    for header in headers_atributes or []:
+        calculo = header.get("calculo") or {}
+        if calculo.get("activo"):
+            lecturas[("atribute", int(header["id_header_atribute"]))] = _referencias(calculo)
+
+    dependientes: Dict[NodoHeader, Set[NodoHeader]] = {}
+    pendientes_por_nodo: Dict[NodoHeader, int] = {}
+    for nodo, referencias in lecturas.items():
+        # Sólo cuentan para el orden las referencias a otros headers calculados
+        pendientes_por_nodo[nodo] = sum(1 for ref in referencias if ref in lecturas and ref != nodo)
+        for ref in referencias:
+            dependientes.setdefault(ref, set()).add(nodo)
+        if nodo in referencias:
+            raise HTTPException(status_code=400, detail=f"El cálculo del header {nodo[0]} {nodo[1]} se referencia a sí mismo")
+
+    # Kahn; se respeta el orden de declaración entre headers independientes
+    orden: List[NodoHeader] = []
+    listos = deque(nodo for nodo, pendientes in pendientes_por_nodo.items() if pendientes == 0)
+    while listos:
+        nodo = listos.popleft()
+        orden.append(nodo)
+        for dependiente in sorted(dependientes.get(nodo, ())):
+            if dependiente not in pendientes_por_nodo:
+                continue
+            pendientes_por_nodo[dependiente] -= 1
+            if pendientes_por_nodo[dependiente] == 0:
+                listos.append(dependiente)
+
+    if len(orden) != len(lecturas):
+        en_ciclo = sorted(nodo for nodo in lecturas if nodo not in orden)
+        detalle = ", ".join(f"{tipo} {header_id}" for tipo, header_id in en_ciclo)
+        raise HTTPException(status_code=400, detail=f"Los cálculos de headers forman un ciclo: {detalle}")
+
+    return GrafoHeaders(orden=orden, dependientes=dependientes)
+
+
+def atributos_numericos(
+    headers_base: Optional[List[Dict[str, Any]]],
+    headers_atributes: Optional[List[Dict[str, Any]]],
+) -> Set[int]:
+    """
+    Ids de atributos que se guardan como número: los que suman en totales
+    (isCantidad o calculados) y los que lee algún cálculo. El resto es texto
+    libre y se guarda tal cual.
+    """
+    numericos: Set[int] = set()
+    for header in headers_atributes or []:
+        calculo = header.get("calculo") or {}
+        if header.get("isCantidad") or calculo.get("activo"):
+            numericos.add(int(header["id_header_atribute"]))
+    for header in list(headers_base or []) + list(headers_atributes or []):
+        calculo = header.get("calculo") or {}
+        if calculo.get("activo"):
+            numericos.update(header_id for tipo, header_id in _referencias(calculo) if tipo == "atribute")
+    return numericos
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 import io
+import re
+from copy import copy
 from dataclasses import dataclass
 from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple
 
 from openpyxl import Workbook
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.formula import ArrayFormula
 
 from app.db.models import Material, TipoMaterial, ensure_total_cantidad_struct
+from app.services.materiales_dependencias import GrafoHeaders, construir_grafo
 
 
 HeaderKind = Literal["base", "atribute"]
@@ -272,7 +276,12 @@ def _get_raw_base_value(material: Material, header_dict: Dict[str, Any]) -> Any:
     return getattr(material, field_name, None)
 
 
-def _build_row_values(tipo: TipoMaterial, material: Material, headers: List[HeaderSpec]) -> Dict[Tuple[HeaderKind, int], Any]:
+def _build_row_values(
+    tipo: TipoMaterial,
+    material: Material,
+    headers: List[HeaderSpec],
+    grafo: Optional[GrafoHeaders] = None,
+) -> Dict[Tuple[HeaderKind, int], Any]:
     headers_lookup = {(spec.kind, spec.header_id): spec for spec in headers}
 
     attr_values = {
@@ -281,50 +290,28 @@ def _build_row_values(tipo: TipoMaterial, material: Material, headers: List[Head
         if "id_header_atribute" in attr
     }
 
-    memo: Dict[Tuple[HeaderKind, int], Any] = {}
-    visiting: set[Tuple[HeaderKind, int]] = set()
-
-    base_lookup = {
-        spec.header_id: spec.raw for spec in headers if spec.kind == "base"
-    }
-    attr_lookup = {
-        spec.header_id: spec.raw for spec in headers if spec.kind == "atribute"
-    }
-
-    def resolve(kind: HeaderKind, header_id: int) -> Any:
-        key = (kind, header_id)
-        if key in memo:
-            return memo[key]
-        if key in visiting:
-            return None
-        visiting.add(key)
-
-        if kind == "base":
-            header_dict = base_lookup.get(header_id)
-            spec = headers_lookup.get(key)
-            raw_value = _get_raw_base_value(material, header_dict or {})
-            value: Any = raw_value
-            if spec and spec.calculo:
-                calculo_value = _calculate_calculo(headers_lookup, resolve, spec)
-                if calculo_value is not None:
-                    value = calculo_value
+    values: Dict[Tuple[HeaderKind, int], Any] = {}
+    for spec in headers:
+        if spec.kind == "base":
+            values[(spec.kind, spec.header_id)] = _get_raw_base_value(material, spec.raw)
         else:
-            spec = headers_lookup.get(key)
-            raw_value = attr_values.get(header_id)
-            value = raw_value
-            if spec and spec.calculo:
-                calculo_value = _calculate_calculo(headers_lookup, resolve, spec)
-                if calculo_value is not None:
-                    value = calculo_value
-
-        visiting.remove(key)
-        memo[key] = value
-        return value
+            values[(spec.kind, spec.header_id)] = attr_values.get(spec.header_id)
 
-    for spec in headers:
-        resolve(spec.kind, spec.header_id)
+    def resolve(kind: HeaderKind, header_id: int) -> Any:
+        return values.get((kind, header_id))
+
+    # Los calculados en orden topológico: al evaluar uno, lo que lee ya está resuelto
+    if grafo is None:
+        grafo = construir_grafo(tipo.headers_base, tipo.headers_atributes)
+    for key in grafo.orden:
+        spec = headers_lookup.get(key)
+        if spec is None:
+            continue
+        calculo_value = _calculate_calculo(headers_lookup, resolve, spec)
+        if calculo_value is not None:
+            values[key] = calculo_value
 
-    return memo
+    return values
 
 
 def _apply_title_style(cell) -> None:
@@ -347,21 +334,13 @@ def _apply_body_style(cell) -> None:
     cell.border = THIN_BORDER
 
 
-def _auto_adjust_columns(worksheet, column_count: int) -> None:
-    for col_idx in range(1, column_count + 1):
-        column_letter = get_column_letter(col_idx)
-        max_length = 0
-        for cell in worksheet[column_letter]:
-            try:
-                value = cell.value
-                if value is None:
-                    continue
-                length = len(str(value))
-                if length > max_length:
-                    max_length = length
-            except Exception:
-                continue
-        worksheet.column_dimensions[column_letter].width = min(max_length + 4, 40)
+def _column_widths(columns: Dict[int, List[Any]], last_column: int) -> List[float]:
+    # Ancho por contenido (como autoajustar), con tope de 40
+    widths: List[float] = []
+    for col_idx in range(1, last_column + 1):
+        max_length = max((len(str(value)) for value in columns.get(col_idx, ()) if value is not None), default=0)
+        widths.append(min(max_length + 4, 40))
+    return widths
 
 
 def _build_operation_expression(
@@ -445,7 +424,61 @@ def _build_formula_for_header(
     return f"={formula_expr}"
 
 
-def build_excel_for_tipo_material(tipo: TipoMaterial, materiales: List[Material]) -> bytes:
+class SharedFormula(ArrayFormula):
+    """
+    Fórmula compartida de SpreadsheetML (<f t="shared" si=.. ref=..>). La celda
+    de origen lleva `ref` y el texto; las demás del rango sólo el `si`. openpyxl
+    escribe los atributos de cualquier ArrayFormula tal cual (cell/_writer.py)
+    y al leer traduce cada celda a su fórmula.
+    """
+
+    t = "shared"
+
+    def __init__(self, si: int, ref: Optional[str] = None, text: Optional[str] = None):
+        super().__init__(ref, text)
+        self.si = si
+
+    def __iter__(self):
+        yield "t", self.t
+        if self.ref:
+            yield "ref", self.ref
+        yield "si", str(self.si)
+
+
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+def sheet_title_for(titulo: Optional[str]) -> str:
+    # Excel no acepta []:*?/\ en el nombre de hoja y lo limita a 31 caracteres
+    limpio = _INVALID_SHEET_CHARS.sub("-", titulo or "").strip("'")[:31]
+    return limpio or "Materiales"
+
+
+@dataclass
+class SheetPlan:
+    """
+    Contenido de una hoja como datos planos (picklable): se arma fuera del
+    proceso que escribe el libro y render_sheet lo vuelca a un worksheet.
+    """
+    sheet_title: str
+    titulo: Optional[str]
+    header_titles: List[str]
+    # Valores del cuerpo desde la fila 3; None en las columnas con fórmula
+    rows: List[List[Any]]
+    # Columna (1-based) -> fórmula de la fila 3; se comparte hasta MAX_FORMULA_ROWS
+    formula_columns: Dict[int, Optional[str]]
+    totals_rows: List[Tuple[str, Any]]
+    valor_dolar: Any
+    # Ancho de cada columna desde la A hasta la del valor del dólar
+    column_widths: List[float]
+
+
+def build_sheet_plan(tipo: TipoMaterial, materiales: List[Material]) -> SheetPlan:
+    """
+    Calcula todo lo que va en la hoja de un tipo sin tocar openpyxl. Sólo lee
+    atributos de `tipo` y `materiales`, así que acepta tanto el ORM como copias
+    planas con los mismos nombres.
+    """
     headers = _build_ordered_headers(tipo)
     if not headers:
         headers = [
@@ -460,26 +493,11 @@ def build_excel_for_tipo_material(tipo: TipoMaterial, materiales: List[Material]
             )
         ]
 
-    workbook = Workbook()
-    worksheet = workbook.active
-    worksheet.title = (tipo.titulo or "Materiales")[:31] or "Materiales"
-
     column_count = len(headers)
-    title_cell = worksheet.cell(row=1, column=1, value=tipo.titulo)
-    _apply_title_style(title_cell)
-    if column_count > 1:
-        worksheet.merge_cells(start_row=1, start_column=1, end_row=1, end_column=column_count)
-
     column_map = {
         (header.kind, header.header_id): get_column_letter(idx)
         for idx, header in enumerate(headers, start=1)
     }
-    headers_lookup = {(header.kind, header.header_id): header for header in headers}
-
-    # Crear headers en fila 2
-    for idx, header in enumerate(headers, start=1):
-        cell = worksheet.cell(row=2, column=idx, value=header.titulo or "")
-        _apply_header_style(cell)
 
     # Identificar columnas con cálculo activo
     columns_with_formulas: Dict[int, HeaderSpec] = {}
@@ -488,85 +506,52 @@ def build_excel_for_tipo_material(tipo: TipoMaterial, materiales: List[Material]
         if calculo.get("activo"):
             columns_with_formulas[col_idx] = header
 
-    totals_map: Dict[Tuple[HeaderKind, int], float] = {}
+    grafo = construir_grafo(tipo.headers_base, tipo.headers_atributes)
 
-    # Llenar datos de materiales existentes (filas 3 en adelante)
-    for row_idx, material in enumerate(materiales, start=3):
-        values_map = _build_row_values(tipo, material, headers)
+    # Valores de materiales existentes (filas 3 en adelante)
+    rows: List[List[Any]] = []
+    for material in materiales:
+        values_map = _build_row_values(tipo, material, headers, grafo)
+        row: List[Any] = []
         for col_idx, header in enumerate(headers, start=1):
-            value = values_map.get((header.kind, header.header_id))
-            cell = worksheet.cell(row=row_idx, column=col_idx)
-            
-            # Si esta columna tiene cálculo, NO poner fórmula aquí
-            # (las fórmulas se pondrán después en todas las filas)
+            # Las columnas con cálculo se llenan con fórmulas en todas las filas
             if col_idx in columns_with_formulas:
-                # Dejar celda vacía por ahora, se llenará con fórmulas después
-                _apply_body_style(cell)
-                numerical_for_total = _safe_to_float(value)
-                totals_map[(header.kind, header.header_id)] = (
-                    totals_map.get((header.kind, header.header_id), 0.0) + numerical_for_total
-                )
+                row.append(None)
                 continue
-
-            # Para columnas sin cálculo, llenar con valores
+            value = values_map.get((header.kind, header.header_id))
             if header.numeric_hint:
-                numeric_value = _safe_to_float(value)
-                cell.value = numeric_value
-                totals_map[(header.kind, header.header_id)] = (
-                    totals_map.get((header.kind, header.header_id), 0.0) + numeric_value
-                )
+                row.append(_safe_to_float(value))
             else:
-                cell.value = value if value is not None else ""
-            _apply_body_style(cell)
-
-    # Ahora aplicar fórmulas a TODAS las filas (desde fila 3 hasta MAX_FORMULA_ROWS) 
-    # para las columnas que tienen cálculo
-    for col_idx, header in columns_with_formulas.items():
-        for row_idx in range(3, MAX_FORMULA_ROWS + 1):
-            cell = worksheet.cell(row=row_idx, column=col_idx)
-            formula = _build_formula_for_header(row_idx, header, column_map)
-            if formula:
-                cell.value = formula
-                _apply_body_style(cell)
-
-    _auto_adjust_columns(worksheet, column_count)
+                row.append(value if value is not None else "")
+        rows.append(row)
+
+    # Una fórmula por columna (la de la fila 3): las referencias son todas de
+    # la misma fila, así que vale como fórmula compartida hasta MAX_FORMULA_ROWS
+    formula_columns: Dict[int, Optional[str]] = {
+        col_idx: _build_formula_for_header(3, header, column_map)
+        for col_idx, header in columns_with_formulas.items()
+    }
 
     # Tabla de totales (a la derecha)
     totals_start_column = column_count + 3
-    totals_title_cell = worksheet.cell(
-        row=1,
-        column=totals_start_column,
-        value="Tabla de totales",
-    )
-    _apply_title_style(totals_title_cell)
-    worksheet.merge_cells(
-        start_row=1,
-        start_column=totals_start_column,
-        end_row=1,
-        end_column=totals_start_column + 1,
-    )
-
-    # Construir mapa inverso: header_id -> columna
-    header_to_column: Dict[Tuple[HeaderKind, int], str] = {}
-    for idx, header in enumerate(headers, start=1):
-        header_to_column[(header.kind, header.header_id)] = get_column_letter(idx)
+    header_to_column = column_map
 
     total_cantidad_struct = ensure_total_cantidad_struct(tipo.total_cantidad)
     cantidad_entries = total_cantidad_struct.get("cantidades") or []
 
     headers_lookup = {(spec.kind, spec.header_id): spec for spec in headers}
 
-    # Lista de filas para la tabla de totales con etiqueta, fórmula/valor y referencia de celda
-    totals_rows: List[Tuple[str, Any, Optional[str]]] = []
+    # Filas de la tabla de totales: etiqueta y fórmula/valor
+    totals_rows: List[Tuple[str, Any]] = []
     total_cantidades_cells: List[str] = []  # Referencias de celdas para sumar Total Cantidades
 
     # Fila 2: Costo Unitario (header base id=4)
     costo_unitario_column = header_to_column.get(("base", 4))
     if costo_unitario_column:
         formula_costo_unitario = f"=SUM({costo_unitario_column}3:{costo_unitario_column}{MAX_FORMULA_ROWS})"
-        totals_rows.append(("Costo Unitario", formula_costo_unitario, None))
+        totals_rows.append(("Costo Unitario", formula_costo_unitario))
     else:
-        totals_rows.append(("Costo Unitario", 0.0, None))
+        totals_rows.append(("Costo Unitario", 0.0))
 
     # Fila 3: Costo Total (header base id=5)
     costo_total_column = header_to_column.get(("base", 5))
@@ -575,9 +560,9 @@ def build_excel_for_tipo_material(tipo: TipoMaterial, materiales: List[Material]
         formula_costo_total = f"=SUM({costo_total_column}3:{costo_total_column}{MAX_FORMULA_ROWS})"
         current_row = 2 + len(totals_rows)
         costo_total_row_ref = f"{get_column_letter(totals_start_column + 1)}{current_row}"
-        totals_rows.append(("Costo Total", formula_costo_total, costo_total_row_ref))
+        totals_rows.append(("Costo Total", formula_costo_total))
     else:
-        totals_rows.append(("Costo Total", 0.0, None))
+        totals_rows.append(("Costo Total", 0.0))
 
     # Filas para cada entrada de cantidad
     for entry in cantidad_entries:
@@ -588,7 +573,7 @@ def build_excel_for_tipo_material(tipo: TipoMaterial, materiales: List[Material]
             continue
         if header_type == "base" and header_id in {4, 5}:
             continue
-        
+
         header_spec = headers_lookup.get((header_type, header_id))
         if not header_spec and header_type == "base" and header_id == 2:
             header_label = "Cantidad"
@@ -596,29 +581,135 @@ def build_excel_for_tipo_material(tipo: TipoMaterial, materiales: List[Material]
             header_label = header_spec.titulo or ("Header" if header_type == "atribute" else f"Base {header_id}")
         else:
             header_label = f"Header {header_id}"
-        
+
         cantidad_column = header_to_column.get((header_type, header_id))
         if cantidad_column:
             formula_cantidad = f"=SUM({cantidad_column}3:{cantidad_column}{MAX_FORMULA_ROWS})"
             current_row = 2 + len(totals_rows)
             cell_ref = f"{get_column_letter(totals_start_column + 1)}{current_row}"
-            totals_rows.append((f"Total {header_label}", formula_cantidad, cell_ref))
+            totals_rows.append((f"Total {header_label}", formula_cantidad))
             total_cantidades_cells.append(cell_ref)
         else:
-            totals_rows.append((f"Total {header_label}", 0.0, None))
+            totals_rows.append((f"Total {header_label}", 0.0))
 
     # Total costo cantidades (solo si hay más de una cantidad)
-    total_cantidades_row_ref = None
     if len(cantidad_entries) > 1:
         if total_cantidades_cells:
-            formula_total_cantidades = f"={'+'.join(total_cantidades_cells)}"
-            current_row = 2 + len(totals_rows)
-            total_cantidades_row_ref = f"{get_column_letter(totals_start_column + 1)}{current_row}"
-            totals_rows.append(("Total costo cantidades", formula_total_cantidades, total_cantidades_row_ref))
+            totals_rows.append(("Total costo cantidades", f"={'+'.join(total_cantidades_cells)}"))
+        else:
+            totals_rows.append(("Total costo cantidades", 0.0))
+
+    # El valor del dólar va en su propia celda, a la derecha del título de totales
+    valor_dolar_cell_ref = f"{get_column_letter(totals_start_column + 3)}1"
+
+    # Total USD
+    if costo_total_row_ref:
+        totals_rows.append(("Total USD", f"={costo_total_row_ref}*{valor_dolar_cell_ref}"))
+    else:
+        totals_rows.append(("Total USD", tipo.total_USD))
+
+    header_titles = [header.titulo or "" for header in headers]
+
+    # Contenido de cada columna, para calcular anchos sin recorrer la hoja
+    valor_dolar_column = totals_start_column + 2
+    contenido: Dict[int, List[Any]] = {
+        1: [tipo.titulo],
+        totals_start_column: ["Tabla de totales"] + [label for label, _ in totals_rows],
+        totals_start_column + 1: [value for _, value in totals_rows],
+        valor_dolar_column: ["Valor del dólar:"],
+        valor_dolar_column + 1: [tipo.valor_dolar],
+    }
+    for col_idx, titulo in enumerate(header_titles, start=1):
+        contenido.setdefault(col_idx, []).append(titulo)
+        if col_idx in formula_columns:
+            # La fórmula más larga es la de la última fila (más dígitos)
+            contenido[col_idx].append(
+                _build_formula_for_header(MAX_FORMULA_ROWS, columns_with_formulas[col_idx], column_map)
+            )
+        else:
+            contenido[col_idx].extend(row[col_idx - 1] for row in rows)
+
+    return SheetPlan(
+        sheet_title=sheet_title_for(tipo.titulo),
+        titulo=tipo.titulo,
+        header_titles=header_titles,
+        rows=rows,
+        formula_columns=formula_columns,
+        totals_rows=totals_rows,
+        valor_dolar=tipo.valor_dolar,
+        column_widths=_column_widths(contenido, valor_dolar_column + 1),
+    )
+
+
+def render_sheet(worksheet, plan: SheetPlan) -> None:
+    """Escribe `plan` en `worksheet` (valores, fórmulas, estilos y anchos)."""
+    worksheet.title = plan.sheet_title
+
+    column_count = len(plan.header_titles)
+    title_cell = worksheet.cell(row=1, column=1, value=plan.titulo)
+    _apply_title_style(title_cell)
+    if column_count > 1:
+        worksheet.merge_cells(start_row=1, start_column=1, end_row=1, end_column=column_count)
+
+    # Crear headers en fila 2
+    for idx, titulo in enumerate(plan.header_titles, start=1):
+        cell = worksheet.cell(row=2, column=idx, value=titulo)
+        _apply_header_style(cell)
+
+    # Armar Font/Alignment/Border por celda y buscarlos en el índice de estilos
+    # del libro es lo más caro del export: se arma una vez y se copia el índice
+    body_style = None
+
+    def style_body(cell) -> None:
+        nonlocal body_style
+        if body_style is None:
+            _apply_body_style(cell)
+            body_style = cell._style
         else:
-            totals_rows.append(("Total costo cantidades", 0.0, None))
+            cell._style = copy(body_style)
+
+    for row_idx, row in enumerate(plan.rows, start=3):
+        for col_idx, value in enumerate(row, start=1):
+            cell = worksheet.cell(row=row_idx, column=col_idx)
+            if col_idx not in plan.formula_columns:
+                cell.value = value
+            style_body(cell)
+
+    # Fórmula compartida: el texto va sólo en la fila 3 y el resto de la
+    # columna la referencia por índice, en vez de una fórmula por celda
+    shared_index = 0
+    for col_idx, formula in plan.formula_columns.items():
+        if not formula:
+            continue
+        column_letter = get_column_letter(col_idx)
+        cell = worksheet.cell(row=3, column=col_idx)
+        cell.value = SharedFormula(
+            si=shared_index,
+            ref=f"{column_letter}3:{column_letter}{MAX_FORMULA_ROWS}",
+            text=formula,
+        )
+        style_body(cell)
+        dependiente = SharedFormula(si=shared_index)
+        for row_idx in range(4, MAX_FORMULA_ROWS + 1):
+            cell = worksheet.cell(row=row_idx, column=col_idx)
+            cell.value = dependiente
+            style_body(cell)
+        shared_index += 1
+
+    totals_start_column = column_count + 3
+    totals_title_cell = worksheet.cell(
+        row=1,
+        column=totals_start_column,
+        value="Tabla de totales",
+    )
+    _apply_title_style(totals_title_cell)
+    worksheet.merge_cells(
+        start_row=1,
+        start_column=totals_start_column,
+        end_row=1,
+        end_column=totals_start_column + 1,
+    )
 
-    # Separar el valor del dólar en su propia celda
     valor_dolar_column = totals_start_column + 2
     valor_dolar_label_cell = worksheet.cell(
         row=1,
@@ -626,24 +717,15 @@ def build_excel_for_tipo_material(tipo: TipoMaterial, materiales: List[Material]
         value="Valor del dólar:",
     )
     _apply_body_style(valor_dolar_label_cell)
-    
     valor_dolar_value_cell = worksheet.cell(
         row=1,
         column=valor_dolar_column + 1,
-        value=tipo.valor_dolar,
+        value=plan.valor_dolar,
     )
     _apply_body_style(valor_dolar_value_cell)
-    valor_dolar_cell_ref = f"{get_column_letter(valor_dolar_column + 1)}1"
-
-    # Total USD
-    if costo_total_row_ref and valor_dolar_cell_ref:
-        formula_total_usd = f"={costo_total_row_ref}*{valor_dolar_cell_ref}"
-        totals_rows.append(("Total USD", formula_total_usd, None))
-    else:
-        totals_rows.append(("Total USD", tipo.total_USD, None))
 
     # Escribir las filas de totales
-    for offset, (label, value, cell_ref) in enumerate(totals_rows, start=2):
+    for offset, (label, value) in enumerate(plan.totals_rows, start=2):
         label_cell = worksheet.cell(row=offset, column=totals_start_column, value=label)
         value_cell = worksheet.cell(row=offset, column=totals_start_column + 1, value=value)
         _apply_body_style(label_cell)
@@ -651,7 +733,13 @@ def build_excel_for_tipo_material(tipo: TipoMaterial, materiales: List[Material]
         label_cell.fill = PatternFill(fill_type="solid", fgColor=TOTAL_LABEL_FILL_COLOR)
         value_cell.fill = PatternFill(fill_type="solid", fgColor=TOTAL_VALUE_FILL_COLOR)
 
-    _auto_adjust_columns(worksheet, valor_dolar_column + 1)
+    for col_idx, width in enumerate(plan.column_widths, start=1):
+        worksheet.column_dimensions[get_column_letter(col_idx)].width = width
+
+
+def build_excel_for_tipo_material(tipo: TipoMaterial, materiales: List[Material]) -> bytes:
+    workbook = Workbook()
+    render_sheet(workbook.active, build_sheet_plan(tipo, materiales))
 
     buffer = io.BytesIO()
     workbook.save(buffer)
@@ -659,4 +747,4 @@ def build_excel_for_tipo_material(tipo: TipoMaterial, materiales: List[Material]
     return buffer.read()
 
 
-__all__ = ["build_excel_for_tipo_material"]
\ No newline at end of file
+__all__ = ["SheetPlan", "build_excel_for_tipo_material", "build_sheet_plan", "render_sheet", "sheet_title_for"]
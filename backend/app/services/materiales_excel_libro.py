@@ -0,0 +1,198 @@
+"""
+Libro con una hoja por tipo de material, armado como trabajo en segundo plano.
+
+El contenido de cada hoja (build_sheet_plan: valores, cálculos, fórmulas) se
+arma en un ProcessPoolExecutor a partir de copias planas del ORM; el proceso
+del request sólo vuelca los planes al libro, en orden, a medida que llegan.
+
+El estado de cada trabajo es un JSON en EXCEL_EXPORT_DIR junto al .xlsx, así
+cualquier worker de gunicorn puede informar el progreso o entregar el archivo.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import groupby
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.models import Material, TipoMaterial
+
+# openpyxl (vía materiales_excel) se importa recién en el trabajo: no al arrancar
+if TYPE_CHECKING:
+    from app.services.materiales_excel import SheetPlan
+
+
+logger = logging.getLogger(__name__)
+
+_ID_TRABAJO = re.compile(r"^[0-9a-f]{32}$")
+
+_TIPO_CAMPOS = ("id_tipo_material", "titulo", "headers_base", "headers_atributes", "order_headers", "total_cantidad", "total_USD", "valor_dolar")
+_MATERIAL_CAMPOS = ("id_material", "detalle", "unidad", "cantidad", "costo_unitario", "costo_total", "atributos")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = settings.EXCEL_EXPORT_WORKERS or min(os.cpu_count() or 1, 4)
+            # spawn: hacer fork de un worker con hilos (pool de conexiones, listener) no es seguro
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def _descartar_executor(roto: ProcessPoolExecutor) -> None:
+    # Un pool roto no acepta más tareas: el próximo trabajo arma uno nuevo
+    global _executor
+    with _executor_lock:
+        if _executor is roto:
+            _executor = None
+    roto.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_excel_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+def _copia(obj: Any, campos) -> Dict[str, Any]:
+    # Los JSONB llegan como MutableList/MutableDict: se pasan a tipos base para el pickle
+    return json.loads(json.dumps({campo: getattr(obj, campo) for campo in campos}))
+
+
+class HojaInvalida(Exception):
+    """Error al armar una hoja en el proceso hijo; a diferencia de HTTPException se puede picklear."""
+
+
+def _plan_desde_copia(tipo: Dict[str, Any], materiales: List[Dict[str, Any]]) -> "SheetPlan":
+    # Corre en el proceso hijo: build_sheet_plan sólo lee atributos
+    from fastapi import HTTPException
+
+    from app.services.materiales_excel import build_sheet_plan
+
+    try:
+        return build_sheet_plan(SimpleNamespace(**tipo), [SimpleNamespace(**material) for material in materiales])
+    except HTTPException as exc:
+        # Un tipo guardado antes de validar el grafo puede tener cálculos en ciclo
+        raise HojaInvalida(f"Tipo {tipo['id_tipo_material']} ({tipo['titulo']}): {exc.detail}") from None
+
+
+def _directorio() -> str:
+    directorio = settings.EXCEL_EXPORT_DIR or os.path.join(tempfile.gettempdir(), "materiales_excel")
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def _ruta(id_trabajo: str, extension: str) -> str:
+    return os.path.join(_directorio(), f"{id_trabajo}.{extension}")
+
+
+def _guardar_estado(id_trabajo: str, **estado: Any) -> None:
+    destino = _ruta(id_trabajo, "json")
+    temporal = f"{destino}.tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump({"id_trabajo": id_trabajo, "actualizado": time.time(), **estado}, archivo)
+    # os.replace es atómico: quien lee nunca ve un JSON a medio escribir
+    os.replace(temporal, destino)
+
+
+def _limpiar_vencidos() -> None:
+    limite = time.time() - settings.EXCEL_EXPORT_TTL_S
+    directorio = _directorio()
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        try:
+            if os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
+        except OSError:
+            continue
+
+
+def leer_estado(id_trabajo: str) -> Optional[Dict[str, Any]]:
+    if not _ID_TRABAJO.match(id_trabajo):
+        return None
+    try:
+        with open(_ruta(id_trabajo, "json"), encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+
+def ruta_archivo(id_trabajo: str) -> str:
+    return _ruta(id_trabajo, "xlsx")
+
+
+def crear_trabajo() -> Dict[str, Any]:
+    _limpiar_vencidos()
+    id_trabajo = uuid.uuid4().hex
+    _guardar_estado(id_trabajo, estado="pendiente", total_hojas=0, hojas_listas=0, error=None)
+    return leer_estado(id_trabajo)
+
+
+def ejecutar_trabajo(id_trabajo: str) -> None:
+    """Arma el libro completo; pensado para BackgroundTasks (abre su propia sesión)."""
+    from openpyxl import Workbook
+
+    from app.db.session import SessionLocal
+    from app.services.materiales_excel import render_sheet
+
+    executor: Optional[ProcessPoolExecutor] = None
+    try:
+        with SessionLocal() as db:
+            tipos = db.scalars(select(TipoMaterial).order_by(TipoMaterial.id_tipo_material)).all()
+            copias_tipos = [_copia(tipo, _TIPO_CAMPOS) for tipo in tipos]
+            filas = db.scalars(select(Material).order_by(Material.id_tipo_material, Material.id_material))
+            por_tipo = {
+                id_tipo: [_copia(material, _MATERIAL_CAMPOS) for material in grupo]
+                for id_tipo, grupo in groupby(filas, key=lambda material: material.id_tipo_material)
+            }
+
+        total = len(copias_tipos)
+        _guardar_estado(id_trabajo, estado="generando", total_hojas=total, hojas_listas=0, error=None)
+
+        executor = _get_executor()
+        futuros = [
+            executor.submit(_plan_desde_copia, tipo, por_tipo.get(tipo["id_tipo_material"], []))
+            for tipo in copias_tipos
+        ]
+
+        workbook = Workbook()
+        for idx, futuro in enumerate(futuros):
+            worksheet = workbook.active if idx == 0 else workbook.create_sheet()
+            render_sheet(worksheet, futuro.result())
+            _guardar_estado(id_trabajo, estado="generando", total_hojas=total, hojas_listas=idx + 1, error=None)
+        if not futuros:
+            workbook.active.title = "Materiales"
+
+        destino = ruta_archivo(id_trabajo)
+        workbook.save(f"{destino}.tmp")
+        os.replace(f"{destino}.tmp", destino)
+        _guardar_estado(id_trabajo, estado="listo", total_hojas=total, hojas_listas=total, error=None)
+    except Exception as exc:
+        if isinstance(exc, BrokenProcessPool) and executor is not None:
+            _descartar_executor(executor)
+        logger.exception("Falló el export de materiales %s", id_trabajo)
+        estado = leer_estado(id_trabajo) or {}
+        _guardar_estado(
+            id_trabajo,
+            estado="error",
+            total_hojas=estado.get("total_hojas", 0),
+            hojas_listas=estado.get("hojas_listas", 0),
+            error=str(exc),
+        )
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import math
 from typing import Any, Dict, List, Optional, Tuple
 from io import BytesIO
 
@@ -10,22 +11,30 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.db.models import Material, TipoMaterial, ensure_total_cantidad_struct
+from app.services.configuracion import CLAVE_VALOR_DOLAR, fijar_config
+from app.services.materiales_dependencias import atributos_numericos
 
 
 def _safe_to_float(value: Any) -> float:
     """Convierte un valor de Excel a float de forma segura"""
     if value is None:
         return 0.0
+    numero = 0.0
     if isinstance(value, (int, float)):
-        return float(value)
-    if isinstance(value, str):
+        numero = float(value)
+    elif isinstance(value, str):
         # Remover símbolos de moneda y espacios
         cleaned = value.strip().replace('$', '').replace(',', '.')
         try:
-            return float(cleaned)
+            numero = float(cleaned)
         except ValueError:
             return 0.0
-    return 0.0
+    # "nan"/"inf" no se pueden guardar en JSONB: se tratan como no numéricos
+    return numero if math.isfinite(numero) else 0.0
+
+
+def _has_value(value: Any) -> bool:
+    return value is not None and str(value).strip() != ''
 
 
 def _increment_quantity_total(
@@ -84,6 +93,21 @@ def _extract_valor_dolar_from_totals(worksheet, totals_start_column: int) -> Opt
         return None
 
 
+def _count_table_columns(worksheet) -> int:
+    """
+    Número de columnas de la tabla de materiales: la tabla comienza en la fila 1
+    (título) y fila 2 (headers), y termina en el primer header vacío.
+    """
+    column_count = 0
+    for col_idx in range(1, worksheet.max_column + 1):
+        cell = worksheet.cell(row=2, column=col_idx)
+        if cell.value:
+            column_count = col_idx
+        else:
+            break
+    return column_count
+
+
 def _read_materials_from_excel(
     worksheet,
     tipo: TipoMaterial,
@@ -94,6 +118,7 @@ def _read_materials_from_excel(
     """
     base_map = {h['id_header_base']: h for h in tipo.headers_base or []}
     attr_map = {h['id_header_atribute']: h for h in tipo.headers_atributes or []}
+    numericos = atributos_numericos(tipo.headers_base, tipo.headers_atributes)
 
     # Construir mapa de columnas
     header_row = 2
@@ -177,7 +202,7 @@ def _read_materials_from_excel(
                 if header_id == 1:
                     material_data['detalle'] = str(value or '').strip()
                 elif header_id == 2:
-                    material_data['cantidad'] = str(value or '').strip()
+                    material_data['cantidad'] = _safe_to_float(value) if _has_value(value) else None
                     if col_info.get("isCantidad"):
                         _increment_quantity_total(quantity_totals, 'base', header_id, value)
                 elif header_id == 3:
@@ -195,9 +220,13 @@ def _read_materials_from_excel(
                 if not header:
                     continue
 
+                if header_id in numericos:
+                    attr_value = _safe_to_float(value) if _has_value(value) else None
+                else:
+                    attr_value = str(value or '').strip()
                 material_data['atributos'].append({
                     'id_header_atribute': header_id,
-                    'value': str(value or '').strip()
+                    'value': attr_value
                 })
 
                 if col_info.get("isCantidad"):
@@ -258,6 +287,7 @@ def _apply_global_valor_dolar(db: Session, nuevo_valor: float) -> None:
         tipo.valor_dolar = float(nuevo_valor)
         tipo.total_USD = float(tipo.total_costo_total or 0.0) * float(nuevo_valor)
         db.add(tipo)
+    fijar_config(db, {CLAVE_VALOR_DOLAR: float(nuevo_valor)})
 
 
 async def process_excel_upload(
@@ -289,15 +319,7 @@ async def process_excel_upload(
             detail=f"Error al leer el archivo Excel: {str(e)}"
         )
     
-    # Determinar el número de columnas de la tabla de materiales
-    # La tabla comienza en la fila 1 (título) y fila 2 (headers)
-    column_count = 0
-    for col_idx in range(1, worksheet.max_column + 1):
-        cell = worksheet.cell(row=2, column=col_idx)
-        if cell.value:
-            column_count = col_idx
-        else:
-            break
+    column_count = _count_table_columns(worksheet)
     
     if column_count == 0:
         raise HTTPException(
@@ -0,0 +1,238 @@
+"""
+Presupuesto de una obra armado en el servidor con consultas agregadas.
+
+El presupuesto se divide en secciones; cada una declara las tablas de las que
+sale y se cachea por (obra, sección) junto con la versión de esas tablas
+(tabla_versiones). En cada pedido se leen las versiones en una sola consulta y
+sólo se recalculan las secciones cuyas tablas cambiaron.
+
+Los catálogos (recursos, personal, equipos, tipos de material) no tienen
+id_obra: son comunes a todas las obras y se cachean una vez para todas. Van
+como referencia y no suman al total, porque no hay forma de saber qué parte
+del catálogo usa la obra (los ítems no referencian personal ni equipos).
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import (
+    CostoItemObraAsignacion,
+    Equipo,
+    ItemObra,
+    Personal,
+    Recurso,
+    Tipo_recurso,
+    TipoCosto,
+    TipoMaterial,
+)
+from app.services.versiones_tablas import leer_versiones
+
+
+@dataclass(frozen=True)
+class Seccion:
+    nombre: str
+    tablas: Tuple[str, ...]
+    # Las secciones de catálogo no dependen de la obra
+    por_obra: bool
+    calcular: Callable[[Session, int], Dict[str, Any]]
+
+
+def _items(db: Session, id_obra: int) -> Dict[str, Any]:
+    stmt = (
+        select(
+            ItemObra.id_item_Obra,
+            ItemObra.descripcion,
+            ItemObra.meses_operario,
+            ItemObra.capataz,
+            func.coalesce(func.sum(CostoItemObraAsignacion.total), 0.0),
+        )
+        .outerjoin(CostoItemObraAsignacion, CostoItemObraAsignacion.id_item == ItemObra.id_item_Obra)
+        .where(ItemObra.id_obra == id_obra)
+        .group_by(ItemObra.id_item_Obra)
+        .order_by(ItemObra.id_item_Obra)
+    )
+    items = [
+        {
+            "id_item": id_item,
+            "descripcion": descripcion,
+            "meses_operario": float(meses or 0.0),
+            "capataz": float(capataz or 0.0),
+            "costo_total": float(total or 0.0),
+        }
+        for id_item, descripcion, meses, capataz, total in db.execute(stmt)
+    ]
+    return {
+        "items": items,
+        "meses_operario": sum(item["meses_operario"] for item in items),
+        "capataz": sum(item["capataz"] for item in items),
+        "total": sum(item["costo_total"] for item in items),
+    }
+
+
+def _costos(db: Session, id_obra: int) -> Dict[str, Any]:
+    asignacion = CostoItemObraAsignacion
+    stmt = (
+        select(
+            TipoCosto.id_tipo_costo,
+            TipoCosto.tipo,
+            TipoCosto.descripcion,
+            func.count(func.distinct(asignacion.id_costo)),
+            func.sum(asignacion.total),
+        )
+        .join(asignacion, asignacion.id_tipo_costo == TipoCosto.id_tipo_costo)
+        .join(ItemObra, ItemObra.id_item_Obra == asignacion.id_item)
+        .where(ItemObra.id_obra == id_obra)
+        .group_by(TipoCosto.id_tipo_costo)
+        .order_by(TipoCosto.id_tipo_costo)
+    )
+    tipos = [
+        {
+            "id_tipo_costo": id_tipo,
+            "tipo": tipo,
+            "descripcion": descripcion,
+            "costos": costos,
+            "total": float(total or 0.0),
+        }
+        for id_tipo, tipo, descripcion, costos, total in db.execute(stmt)
+    ]
+    return {"tipos": tipos, "total": sum(tipo["total"] for tipo in tipos)}
+
+
+def _materiales(db: Session, _id_obra: int) -> Dict[str, Any]:
+    stmt = select(
+        TipoMaterial.id_tipo_material,
+        TipoMaterial.titulo,
+        TipoMaterial.total_costo_total,
+        TipoMaterial.total_USD,
+    ).order_by(TipoMaterial.id_tipo_material)
+    tipos = [
+        {
+            "id_tipo_material": id_tipo,
+            "titulo": titulo,
+            "total": float(total or 0.0),
+            "total_USD": float(total_usd or 0.0),
+        }
+        for id_tipo, titulo, total, total_usd in db.execute(stmt)
+    ]
+    return {
+        "tipos": tipos,
+        "total": sum(tipo["total"] for tipo in tipos),
+        "total_USD": sum(tipo["total_USD"] for tipo in tipos),
+    }
+
+
+def _recursos(db: Session, _id_obra: int) -> Dict[str, Any]:
+    stmt = (
+        select(
+            Tipo_recurso.id_tipo_recurso,
+            Tipo_recurso.descripcion,
+            func.count(Recurso.id_recurso),
+            func.coalesce(func.sum(Recurso.cantidad), 0.0),
+            func.coalesce(func.sum(Recurso.meses_operario), 0.0),
+        )
+        .outerjoin(Recurso, Recurso.id_tipo_recurso == Tipo_recurso.id_tipo_recurso)
+        .group_by(Tipo_recurso.id_tipo_recurso)
+        .order_by(Tipo_recurso.id_tipo_recurso)
+    )
+    tipos = [
+        {
+            "id_tipo_recurso": id_tipo,
+            "descripcion": descripcion,
+            "recursos": recursos,
+            "cantidad": float(cantidad or 0.0),
+            "meses_operario": float(meses or 0.0),
+        }
+        for id_tipo, descripcion, recursos, cantidad, meses in db.execute(stmt)
+    ]
+    return {"tipos": tipos, "meses_operario": sum(tipo["meses_operario"] for tipo in tipos)}
+
+
+def _personal(db: Session, _id_obra: int) -> Dict[str, Any]:
+    cantidad, total = db.execute(
+        select(func.count(Personal.id_personal), func.coalesce(func.sum(Personal.costo_total_mensual_apertura), 0.0))
+    ).one()
+    return {
+        "cantidad": cantidad,
+        "costo_mensual": float(total or 0.0),
+        "costo_mensual_promedio": float(total or 0.0) / cantidad if cantidad else 0.0,
+    }
+
+
+def _equipos(db: Session, _id_obra: int) -> Dict[str, Any]:
+    cantidad, total = db.execute(
+        select(func.count(Equipo.id_equipo), func.coalesce(func.sum(Equipo.Total_mes), 0.0))
+    ).one()
+    return {"cantidad": cantidad, "costo_mensual": float(total or 0.0)}
+
+
+SECCIONES: Tuple[Seccion, ...] = (
+    Seccion("items", ("itemsObra", "costo_item_obra"), True, _items),
+    Seccion("costos", ("itemsObra", "costo_item_obra", "tipos_costo"), True, _costos),
+    Seccion("materiales", ("tipos_material",), False, _materiales),
+    Seccion("recursos", ("recursos", "tipos_recurso"), False, _recursos),
+    Seccion("personal", ("personal",), False, _personal),
+    Seccion("equipos", ("equipos",), False, _equipos),
+)
+
+_TABLAS = tuple(sorted({tabla for seccion in SECCIONES for tabla in seccion.tablas}))
+
+# (id_obra o None para catálogos, sección) -> (versiones de sus tablas, datos)
+ClaveCache = Tuple[Optional[int], str]
+
+
+class PresupuestoCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[ClaveCache, Tuple[Tuple[int, ...], Dict[str, Any]]]" = OrderedDict()
+
+    def obtener(self, clave: ClaveCache, versiones: Tuple[int, ...]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada[0] != versiones:
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada[1]
+
+    def guardar(self, clave: ClaveCache, versiones: Tuple[int, ...], datos: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entradas[clave] = (versiones, datos)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > settings.PRESUPUESTO_CACHE_MAX_ENTRADAS:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+
+cache = PresupuestoCache()
+
+
+def calcular_presupuesto(db: Session, id_obra: int) -> Dict[str, Any]:
+    """
+    Presupuesto de la obra por secciones más el total (sólo los costos
+    asignados a sus ítems). `recalculadas` lista las secciones que no salieron
+    de la cache. Sin tabla_versiones se calcula todo en cada pedido.
+    """
+    versiones = leer_versiones(db, _TABLAS)
+    resultado: Dict[str, Any] = {}
+    recalculadas: List[str] = []
+    for seccion in SECCIONES:
+        clave: ClaveCache = (id_obra if seccion.por_obra else None, seccion.nombre)
+        firma = tuple(versiones[tabla][0] for tabla in seccion.tablas) if versiones is not None else None
+        datos = cache.obtener(clave, firma) if firma is not None else None
+        if datos is None:
+            datos = seccion.calcular(db, id_obra)
+            recalculadas.append(seccion.nombre)
+            if firma is not None:
+                cache.guardar(clave, firma, datos)
+        resultado[seccion.nombre] = datos
+
+    resultado["total"] = resultado["costos"]["total"]
+    resultado["recalculadas"] = recalculadas
+    return resultado
@@ -1,11 +1,28 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
 
+from sqlalchemy.orm import Session, configure_mappers
+from sqlalchemy import select, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
 from app.core.security import get_password_hash
 from app.db.models import Usuario, Rol
 
 
-def seed_admin(db: Session):
+logger = logging.getLogger(__name__)
+
+# Clave fija del advisory lock de la semilla: con varios workers se serializa
+SEED_LOCK_KEY = 726_150_001
+
+ADMIN_DNI = "12345678"
+
+
+def seed_admin(db: Session) -> bool:
+    """Crea el rol y el usuario admin si faltan. Devuelve True si creó algo."""
+    creado = False
     # Los roles ya se crean desde el SQL, solo verificamos que existan
     admin_role = db.scalar(select(Rol).where(Rol.nombre == "Administrador"))
     if not admin_role:
@@ -13,26 +30,96 @@ def seed_admin(db: Session):
         db.add(admin_role)
         db.commit()
         db.refresh(admin_role)
+        creado = True
 
     # El usuario admin ya se crea desde el SQL
-    existing = db.scalar(select(Usuario).where(Usuario.dni == "12345678"))
+    existing = db.scalar(select(Usuario).where(Usuario.dni == ADMIN_DNI))
     if existing:
-        return  # Ya existe, no hacer nada
+        return creado  # Ya existe, no hacer nada
     
     # Si no existe, crear usuario admin (backup)
     admin = Usuario(
-        dni="12345678",
-        nombre="Admin",
-        apellido="Sistema",
-        email="admin@sistema.com",
+        dni=ADMIN_DNI,
+        nombre="Admin Sistema",
         password_hash=get_password_hash("admin123"),
         id_rol=admin_role.id_rol,
         activo=True,
     )
     db.add(admin)
     db.commit()
+    return True
+
+
+def seed_con_lock(engine) -> bool:
+    """
+    Corre seed_admin bajo un advisory lock bloqueante: los workers que arrancan
+    a la vez esperan al primero y después encuentran la semilla hecha, así que
+    sólo uno inserta y ninguno arranca antes de que exista el admin. Si el admin
+    ya existe no se toma el lock. Devuelve True si este proceso creó algo.
+    """
+    with engine.connect() as conn:
+        if conn.scalar(select(Usuario.id_usuario).where(Usuario.dni == ADMIN_DNI)) is not None:
+            conn.rollback()
+            return False
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SEED_LOCK_KEY})
+        conn.commit()
+        try:
+            with Session(bind=conn) as db:
+                return seed_admin(db)
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SEED_LOCK_KEY})
+            conn.commit()
+
+
+def calentar_pool(engine, cantidad: int) -> int:
+    """Abre `cantidad` conexiones a la vez y las devuelve al pool."""
+    conexiones = []
+    try:
+        for _ in range(cantidad):
+            conexiones.append(engine.connect())
+    finally:
+        for conn in conexiones:
+            conn.close()
+    return len(conexiones)
+
+
+def precargar_caches(engine) -> None:
+    from app.services.configuracion import configuracion
+
+    # La configuración de mappers es perezosa: sin esto la paga el primer request
+    configure_mappers()
+    with Session(bind=engine) as db:
+        configuracion.cargar(db)
 
 
+@contextmanager
+def _medir(tiempos: Dict[str, float], etapa: str) -> Iterator[None]:
+    inicio = time.perf_counter()
+    try:
+        yield
+    except SQLAlchemyError:
+        # Sin base el proceso arranca igual; /health/ready lo va a reportar
+        logger.exception("Falló la etapa de arranque '%s'", etapa)
+    finally:
+        tiempos[etapa] = (time.perf_counter() - inicio) * 1000.0
 
 
+def preparar_arranque() -> Dict[str, float]:
+    """Trabajo de arranque de cada worker. Devuelve la duración en ms de cada etapa."""
+    from app.db.session import engine
+    from app.services.db_indexes import reportar_indices_faltantes
 
+    tiempos: Dict[str, float] = {}
+    with _medir(tiempos, "precarga"):
+        precargar_caches(engine)
+    with _medir(tiempos, "seed"):
+        if seed_con_lock(engine):
+            logger.info("Semilla inicial creada")
+    if settings.DB_POOL_WARMUP:
+        with _medir(tiempos, "pool"):
+            calentar_pool(engine, settings.DB_POOL_SIZE)
+    if settings.DB_INDEX_CHECK_ON_STARTUP:
+        with _medir(tiempos, "indices"):
+            reportar_indices_faltantes(engine)
+    return tiempos
@@ -0,0 +1,61 @@
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+# tabla_versiones se mantiene con triggers: cada INSERT/UPDATE/DELETE/TRUNCATE
+# sobre una tabla registrada incrementa su versión. La crean database/schema.sql
+# y, en bases manejadas con Alembic, la migración 0006 (antes de aplicarla no hay
+# ETag/Last-Modified ni cache de presupuesto: leer_versiones devuelve None).
+VersionTabla = Tuple[int, Optional[datetime]]
+
+logger = logging.getLogger(__name__)
+_aviso_emitido = False
+
+_SELECT_VERSIONES = text("SELECT tabla, version, actualizado FROM tabla_versiones WHERE tabla = ANY(:tablas)")
+
+
+def _avisar_sin_tabla() -> None:
+    global _aviso_emitido
+    if not _aviso_emitido:
+        _aviso_emitido = True
+        logger.warning("No existe tabla_versiones (ejecutar `alembic upgrade head`): GET condicional y caches por versión deshabilitados")
+
+
+def _armar_versiones(nombres: List[str], rows) -> Dict[str, VersionTabla]:
+    # Las tablas sin escrituras registradas quedan en versión 0
+    versiones: Dict[str, VersionTabla] = {nombre: (0, None) for nombre in nombres}
+    for tabla, version, actualizado in rows:
+        versiones[tabla] = (int(version), actualizado)
+    return versiones
+
+
+def leer_versiones(db: Session, tablas: Iterable[str]) -> Optional[Dict[str, VersionTabla]]:
+    """
+    Devuelve {tabla: (version, actualizado)} para las tablas pedidas, o None si
+    la tabla de versiones no existe (el llamador sigue sin cache).
+    """
+    nombres = list(tablas)
+    try:
+        rows = db.execute(_SELECT_VERSIONES, {"tablas": nombres}).fetchall()
+    except SQLAlchemyError:
+        db.rollback()
+        _avisar_sin_tabla()
+        return None
+    return _armar_versiones(nombres, rows)
+
+
+async def leer_versiones_async(db: AsyncSession, tablas: Iterable[str]) -> Optional[Dict[str, VersionTabla]]:
+    nombres = list(tablas)
+    try:
+        rows = (await db.execute(_SELECT_VERSIONES, {"tablas": nombres})).fetchall()
+    except SQLAlchemyError:
+        await db.rollback()
+        _avisar_sin_tabla()
+        return None
+    return _armar_versiones(nombres, rows)
@@ -0,0 +1,127 @@
+"""
+Compara requests/segundo de las rutas de lectura entre el stack sync y el async.
+
+Uso (con el backend levantado contra la base local):
+
+    # 1) backend sync
+    DB_ASYNC_ENABLED=false uvicorn app.main:app --port 8000
+    python -m benchmarks.async_vs_sync --label sync --output sync.json
+
+    # 2) backend async
+    DB_ASYNC_ENABLED=true uvicorn app.main:app --port 8000
+    python -m benchmarks.async_vs_sync --label async --output async.json
+
+    python -m benchmarks.async_vs_sync --compare sync.json async.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+
+DEFAULT_PATHS = [
+    "/materiales/tipos",
+    "/costos/",
+    "/costos/tipos",
+    "/catalogos/clientes",
+]
+
+
+async def _login(client: httpx.AsyncClient, dni: str, password: str) -> str:
+    resp = await client.post("/auth/login", json={"dni": dni, "password": password})
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+async def _run_path(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errores = 0
+    pendientes = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errores
+        for _ in pendientes:
+            inicio = time.perf_counter()
+            resp = await client.get(path)
+            latencies.append(time.perf_counter() - inicio)
+            if resp.status_code >= 400:
+                errores += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duracion = time.perf_counter() - inicio
+
+    latencies.sort()
+    return {
+        "path": path,
+        "requests": total,
+        "concurrency": concurrency,
+        "errores": errores,
+        "req_por_seg": total / duracion if duracion else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000.0,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    base_url = args.base_url.rstrip("/") + args.prefix
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+        token = await _login(client, args.dni, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+        for path in args.paths:  # calentamiento de pools y caches
+            await client.get(path)
+        resultados = [
+            await _run_path(client, path, args.requests, args.concurrency) for path in args.paths
+        ]
+    return {"label": args.label, "resultados": resultados}
+
+
+def compare(baseline_path: str, candidate_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    with open(candidate_path, encoding="utf-8") as fh:
+        candidate = json.load(fh)
+    base_map = {r["path"]: r for r in baseline["resultados"]}
+    print(f"{'ruta':<30} {baseline['label']:>12} {candidate['label']:>12} {'cambio':>9}")
+    for r in candidate["resultados"]:
+        base = base_map.get(r["path"])
+        if not base:
+            continue
+        cambio = (r["req_por_seg"] / base["req_por_seg"] - 1.0) * 100.0 if base["req_por_seg"] else 0.0
+        print(f"{r['path']:<30} {base['req_por_seg']:>12.1f} {r['req_por_seg']:>12.1f} {cambio:>8.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--prefix", default="/api/v1")
+    parser.add_argument("--dni", default="12345678")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "CANDIDATO"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    resultado = asyncio.run(run(args))
+    for r in resultado["resultados"]:
+        print(f"{r['path']:<30} {r['req_por_seg']:>9.1f} req/s  p50 {r['p50_ms']:.1f} ms  p95 {r['p95_ms']:.1f} ms  errores {r['errores']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(resultado, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
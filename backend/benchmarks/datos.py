@@ -0,0 +1,133 @@
+"""
+Generadores de datos sintéticos para los benchmarks (sin base de datos).
+
+Arman TipoMaterial/Material transitorios con la misma lógica de headers, cálculos
+y totales que usa el router, así los números se parecen a los de producción.
+"""
+from __future__ import annotations
+
+import random
+from typing import List, Tuple
+
+from app.db.models import Costo, Material, TipoMaterial
+from app.routers.materiales import (
+    _add_material_to_totals,
+    _apply_base_calculations,
+    _apply_calculo,
+    _apply_order_headers,
+    _build_headers_base,
+    _initialize_total_cantidad,
+    _normalize_headers_atributes,
+)
+from app.schemas.materiales import Calculo, CalculoOperacion, HeaderAtributoCreate
+
+
+def generar_tipo_material(
+    n_atributos: int = 6,
+    n_calculados: int = 2,
+    id_tipo_material: int = 1,
+    titulo: str | None = None,
+) -> TipoMaterial:
+    """Tipo con `n_atributos` atributos, de los cuales `n_calculados` tienen cálculo activo."""
+    n_calculados = min(n_calculados, max(n_atributos - 1, 0))
+    headers: List[HeaderAtributoCreate] = []
+    for idx in range(1, n_atributos + 1):
+        calculo = None
+        if idx > n_atributos - n_calculados:
+            # Los atributos calculados multiplican al anterior por la cantidad (base 2)
+            calculo = Calculo(
+                activo=True,
+                operaciones=[CalculoOperacion(tipo="multiplicacion", headers_base=[2], headers_atributes=[idx - 1])],
+            )
+        headers.append(
+            HeaderAtributoCreate(
+                id_header_atribute=idx,
+                titulo=f"Atributo {idx}",
+                isCantidad=(idx == 1),
+                calculo=calculo,
+                order=10 + idx,
+            )
+        )
+
+    headers_base = _build_headers_base([2, 3])
+    headers_base = _apply_base_calculations(headers_base, None)
+    headers_atributes = _normalize_headers_atributes(headers)
+    order_headers = _apply_order_headers(headers_base, headers_atributes, None)
+    tipo = TipoMaterial(
+        id_tipo_material=id_tipo_material,
+        titulo=titulo or f"Tipo sintético {id_tipo_material}",
+        headers_base=headers_base,
+        headers_atributes=headers_atributes,
+        order_headers=order_headers,
+        total_cantidad=_initialize_total_cantidad(headers_base, headers_atributes),
+        total_costo_unitario=0.0,
+        total_costo_total=0.0,
+        total_USD=0.0,
+        valor_dolar=1400.0,
+    )
+    return tipo
+
+
+def generar_materiales(tipo: TipoMaterial, n: int, seed: int = 1234) -> List[Material]:
+    """Genera `n` materiales para `tipo`, aplicando cálculos y acumulando totales."""
+    rnd = random.Random(seed)
+    materiales: List[Material] = []
+    for idx in range(1, n + 1):
+        material = Material(
+            id_material=idx,
+            id_tipo_material=tipo.id_tipo_material,
+            detalle=f"Material {idx} - caño acero {rnd.randint(1, 24)} pulgadas",
+            unidad=rnd.choice(["u", "m", "kg", "m2"]),
+            cantidad=round(rnd.uniform(1, 500), 2),
+            costo_unitario=round(rnd.uniform(1, 10000), 2),
+            costo_total=0.0,
+            atributos=[
+                {"id_header_atribute": header["id_header_atribute"], "value": round(rnd.uniform(0, 100), 3)}
+                for header in tipo.headers_atributes or []
+            ],
+        )
+        _apply_calculo(tipo, material)
+        _add_material_to_totals(tipo, material)
+        materiales.append(material)
+    return materiales
+
+
+def generar_catalogo(
+    n_tipos: int,
+    n_materiales: int,
+    n_atributos: int = 6,
+    n_calculados: int = 2,
+) -> List[Tuple[TipoMaterial, List[Material]]]:
+    catalogo = []
+    for id_tipo in range(1, n_tipos + 1):
+        tipo = generar_tipo_material(n_atributos, n_calculados, id_tipo_material=id_tipo)
+        materiales = generar_materiales(tipo, n_materiales, seed=id_tipo)
+        tipo.materiales_count = len(materiales)
+        catalogo.append((tipo, materiales))
+    return catalogo
+
+
+def generar_costos(n: int, n_items: int = 5, id_tipo_costo: int = 1, seed: int = 99) -> List[Costo]:
+    rnd = random.Random(seed)
+    costos: List[Costo] = []
+    for idx in range(1, n + 1):
+        cantidad = rnd.uniform(1, 24)
+        unitario = rnd.uniform(100, 50000)
+        total = cantidad * unitario
+        costos.append(
+            Costo(
+                id_costo=idx,
+                id_tipo_costo=id_tipo_costo,
+                detalle=f"Costo indirecto {idx}",
+                values=[{"name": f"valor {v}", "value": rnd.uniform(0, 1000)} for v in range(3)],
+                unidad="mes",
+                costo_unitario=unitario,
+                cantidad=cantidad,
+                costo_total=total,
+                itemsObra=[
+                    {"idItem": item, "cantidad": cantidad / n_items, "total": total / n_items, "porcentaje": 100.0 / n_items}
+                    for item in range(1, n_items + 1)
+                ],
+            )
+        )
+    return costos
@@ -0,0 +1,220 @@
+"""
+Suite de benchmarks reproducible: cálculos de materiales, export/import Excel y,
+opcionalmente, endpoints HTTP contra un backend levantado sobre la base local.
+
+Los casos locales usan los generadores de benchmarks.datos (sin base de datos,
+semilla fija). El resultado se guarda como JSON con el commit actual para poder
+comparar corridas:
+
+    python -m benchmarks.runner --materiales 100 1000 5000
+    python -m benchmarks.runner --base-url http://localhost:8000 --http-repeticiones 50
+    python -m benchmarks.runner --compare benchmarks/resultados/<a>.json benchmarks/resultados/<b>.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional
+
+from openpyxl import load_workbook
+
+from app.routers.materiales import _accumulate_totals, _apply_calculo, _initialize_total_cantidad
+from app.services.materiales_dependencias import construir_grafo
+from app.services.materiales_excel import build_excel_for_tipo_material
+from app.services.materiales_excel_upload import (
+    _count_table_columns,
+    _extract_totals_from_excel,
+    _read_materials_from_excel,
+)
+from benchmarks.datos import generar_materiales, generar_tipo_material
+
+
+RESULTADOS_DIR = os.path.join(os.path.dirname(__file__), "resultados")
+
+DEFAULT_HTTP_PATHS = [
+    "/materiales/tipos",
+    "/costos/",
+    "/recursos/",
+    "/personal/",
+    "/equipos/",
+]
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", *args], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _medir(func: Callable[[], Any], repeticiones: int, calentamiento: int = 1) -> Dict[str, float]:
+    for _ in range(calentamiento):
+        func()
+    tiempos: List[float] = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        func()
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    return {
+        "repeticiones": repeticiones,
+        "min_ms": tiempos[0] * 1000.0,
+        "mediana_ms": statistics.median(tiempos) * 1000.0,
+        "p95_ms": tiempos[max(int(len(tiempos) * 0.95) - 1, 0)] * 1000.0,
+    }
+
+
+# ==================== Casos locales ====================
+
+def _casos_locales(n: int, n_atributos: int, n_calculados: int) -> Dict[str, Callable[[], Any]]:
+    tipo = generar_tipo_material(n_atributos, n_calculados)
+    materiales = generar_materiales(tipo, n)
+    excel = build_excel_for_tipo_material(tipo, materiales)
+
+    def apply_calculo() -> None:
+        grafo = construir_grafo(tipo.headers_base, tipo.headers_atributes)
+        for material in materiales:
+            _apply_calculo(tipo, material, grafo=grafo)
+
+    def apply_calculo_incremental() -> None:
+        # Como actualizar_material al editar un atributo: sólo lo que depende de él
+        grafo = construir_grafo(tipo.headers_base, tipo.headers_atributes)
+        nodos = grafo.aguas_abajo([("atribute", max(n_atributos - n_calculados, 1))])
+        for material in materiales:
+            _apply_calculo(tipo, material, nodos)
+
+    def accumulate_totals() -> None:
+        # Totales reiniciados para que cada repetición parta del mismo estado
+        tipo.total_cantidad = _initialize_total_cantidad(tipo.headers_base, tipo.headers_atributes)
+        for material in materiales:
+            _accumulate_totals(tipo, material, 1.0)
+
+    def excel_export() -> bytes:
+        return build_excel_for_tipo_material(tipo, materiales)
+
+    def excel_upload_parse() -> None:
+        # Misma lectura que process_excel_upload, sin la parte de base de datos
+        worksheet = load_workbook(BytesIO(excel), data_only=True).active
+        column_count = _count_table_columns(worksheet)
+        _extract_totals_from_excel(worksheet, tipo, column_count + 3)
+        _read_materials_from_excel(worksheet, tipo, column_count)
+
+    return {
+        "apply_calculo": apply_calculo,
+        "apply_calculo_incremental": apply_calculo_incremental,
+        "accumulate_totals": accumulate_totals,
+        "excel_export": excel_export,
+        "excel_upload_parse": excel_upload_parse,
+    }
+
+
+def correr_locales(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    resultados: Dict[str, Dict[str, Any]] = {}
+    for n in args.materiales:
+        casos = _casos_locales(n, args.atributos, args.calculados)
+        for nombre, func in casos.items():
+            if args.casos and nombre not in args.casos:
+                continue
+            # Los casos de Excel son mucho más lentos: menos repeticiones
+            repeticiones = args.repeticiones if not nombre.startswith("excel") else max(args.repeticiones // 4, 3)
+            r = _medir(func, repeticiones)
+            resultados[f"{nombre}[n={n}]"] = r
+            print(f"{nombre:<20} n={n:<6} mediana {r['mediana_ms']:>10.2f} ms  p95 {r['p95_ms']:>10.2f} ms")
+    return resultados
+
+
+# ==================== Casos HTTP ====================
+
+def correr_http(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    import httpx
+
+    resultados: Dict[str, Dict[str, Any]] = {}
+    with httpx.Client(base_url=args.base_url.rstrip("/") + args.prefix, timeout=120.0) as client:
+        resp = client.post("/auth/login", json={"dni": args.dni, "password": args.password})
+        resp.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {resp.json()['access_token']}"
+
+        for path in args.http_paths:
+            def request(path: str = path) -> None:
+                client.get(path).raise_for_status()
+
+            r = _medir(request, args.http_repeticiones, calentamiento=2)
+            resultados[f"GET {path}"] = r
+            print(f"GET {path:<26} mediana {r['mediana_ms']:>10.2f} ms  p95 {r['p95_ms']:>10.2f} ms")
+    return resultados
+
+
+# ==================== Comparación ====================
+
+def compare(baseline_path: str, candidate_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    with open(candidate_path, encoding="utf-8") as fh:
+        candidate = json.load(fh)
+
+    etiqueta_base = (baseline.get("commit") or "base")[:10]
+    etiqueta_cand = (candidate.get("commit") or "candidato")[:10]
+    print(f"{'caso':<36} {etiqueta_base:>12} {etiqueta_cand:>12} {'cambio':>9}")
+    for caso, r in candidate["resultados"].items():
+        base = baseline["resultados"].get(caso)
+        if not base:
+            continue
+        cambio = (r["mediana_ms"] / base["mediana_ms"] - 1.0) * 100.0 if base["mediana_ms"] else 0.0
+        print(f"{caso:<36} {base['mediana_ms']:>10.2f}ms {r['mediana_ms']:>10.2f}ms {cambio:>8.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--materiales", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--atributos", type=int, default=6)
+    parser.add_argument("--calculados", type=int, default=2)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--casos", nargs="+", help="subconjunto de casos locales a correr")
+    parser.add_argument("--base-url", help="backend levantado para medir endpoints HTTP")
+    parser.add_argument("--prefix", default="/api/v1")
+    parser.add_argument("--dni", default="12345678")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--http-paths", nargs="+", default=DEFAULT_HTTP_PATHS)
+    parser.add_argument("--http-repeticiones", type=int, default=30)
+    parser.add_argument("--output", help="por defecto benchmarks/resultados/<commit>.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "CANDIDATO"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    commit = _git("rev-parse", "HEAD")
+    resultado: Dict[str, Any] = {
+        "commit": commit,
+        "sucio": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "parametros": {
+            "materiales": args.materiales,
+            "atributos": args.atributos,
+            "calculados": args.calculados,
+            "repeticiones": args.repeticiones,
+        },
+        "resultados": correr_locales(args),
+    }
+    if args.base_url:
+        resultado["parametros"]["base_url"] = args.base_url
+        resultado["resultados"].update(correr_http(args))
+
+    output = args.output or os.path.join(RESULTADOS_DIR, f"{(commit or 'sin-commit')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump(resultado, fh, indent=2)
+    print(f"Resultados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Mide cuánto cuesta serializar los listados pesados y qué parte de la latencia es.
+
+Compara, para /materiales/tipos, /materiales/tipo/{id} y /costos/:
+
+  * pydantic+json    -> camino por defecto de FastAPI (response_model + json.dumps)
+  * pydantic+orjson  -> response_model + ORJSONResponse
+  * confiable+orjson -> dict armado desde el ORM (TRUSTED_ORM_RESPONSES) + orjson
+
+Uso:
+    python -m benchmarks.serializacion --tipos 40 --materiales 2000
+    # opcional: comparar contra la latencia real de un backend levantado
+    python -m benchmarks.serializacion --base-url http://localhost:8000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.routers.costos import _costo_to_dict
+from app.routers.materiales import _material_to_dict, _tipo_material_to_dict
+from app.schemas.costos import CostoRead
+from app.schemas.materiales import MaterialRead, TipoMaterialRead
+from benchmarks.datos import generar_catalogo, generar_costos
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    # Igual que starlette.responses.JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _medir(func: Callable[[], bytes], repeticiones: int) -> Dict[str, float]:
+    func()
+    tiempos: List[float] = []
+    size = 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        size = len(func())
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    return {"ms": tiempos[len(tiempos) // 2] * 1000.0, "bytes": size}
+
+
+def _variantes(objs: List[Any], read_model: Any, to_dict: Callable[[Any], Dict[str, Any]]) -> Dict[str, Callable[[], bytes]]:
+    adapter = TypeAdapter(List[read_model])
+
+    def pydantic_json() -> bytes:
+        value = adapter.validate_python(objs, from_attributes=True)
+        return _stdlib_dumps(adapter.dump_python(value, mode="json"))
+
+    def pydantic_orjson() -> bytes:
+        value = adapter.validate_python(objs, from_attributes=True)
+        return orjson.dumps(adapter.dump_python(value, mode="json"))
+
+    def confiable_orjson() -> bytes:
+        return orjson.dumps([to_dict(obj) for obj in objs])
+
+    return {
+        "pydantic+json": pydantic_json,
+        "pydantic+orjson": pydantic_orjson,
+        "confiable+orjson": confiable_orjson,
+    }
+
+
+def _latencia_http(base_url: str, path: str, repeticiones: int) -> float | None:
+    try:
+        import httpx
+    except ImportError:
+        return None
+    with httpx.Client(base_url=base_url, timeout=60.0) as client:
+        client.get(path)
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            client.get(path)
+            tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2] * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tipos", type=int, default=40)
+    parser.add_argument("--materiales", type=int, default=2000, help="materiales por tipo para /materiales/tipo/{id}")
+    parser.add_argument("--costos", type=int, default=2000)
+    parser.add_argument("--atributos", type=int, default=8)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--base-url", help="backend levantado para medir la latencia end-to-end")
+    parser.add_argument("--prefix", default="/api/v1")
+    args = parser.parse_args()
+
+    catalogo = generar_catalogo(args.tipos, 1, n_atributos=args.atributos)
+    tipos = [tipo for tipo, _ in catalogo]
+    _, materiales = generar_catalogo(1, args.materiales, n_atributos=args.atributos)[0]
+    costos = generar_costos(args.costos)
+
+    casos = {
+        "/materiales/tipos": _variantes(tipos, TipoMaterialRead, _tipo_material_to_dict),
+        "/materiales/tipo/1": _variantes(materiales, MaterialRead, _material_to_dict),
+        "/costos/": _variantes(costos, CostoRead, _costo_to_dict),
+    }
+
+    for path, variantes in casos.items():
+        print(path)
+        resultados = {nombre: _medir(func, args.repeticiones) for nombre, func in variantes.items()}
+        base_ms = resultados["pydantic+json"]["ms"]
+        latencia = _latencia_http(args.base_url + args.prefix, path, args.repeticiones) if args.base_url else None
+        for nombre, r in resultados.items():
+            linea = f"  {nombre:<18} {r['ms']:>9.2f} ms  {r['bytes'] / 1024:>9.1f} KiB  x{base_ms / r['ms']:.1f}"
+            if latencia:
+                linea += f"  {r['ms'] / latencia * 100.0:>5.1f}% de {latencia:.1f} ms"
+            print(linea)
+
+
+if __name__ == "__main__":
+    main()
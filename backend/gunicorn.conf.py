@@ -0,0 +1,47 @@
+# Configuración de gunicorn para producción, tomada de app.core.config.Settings
+# (variables de entorno / .env):
+#
+#   gunicorn -c gunicorn.conf.py app.main:app
+import multiprocessing
+
+from app.core.config import settings
+
+
+bind = f"{settings.WEB_HOST}:{settings.WEB_PORT}"
+# Cada worker abre hasta DB_POOL_SIZE + DB_MAX_OVERFLOW conexiones (el doble
+# con el engine async): sin WEB_WORKERS se usan los que entran en el presupuesto
+conexiones_por_worker = (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW) * (2 if settings.DB_ASYNC_ENABLED else 1)
+max_workers = max(1, settings.DB_MAX_CONNECTIONS // conexiones_por_worker)
+workers = settings.WEB_WORKERS or min(multiprocessing.cpu_count(), max_workers)
+worker_class = "app.core.gunicorn_worker.UvicornWorker"
+
+keepalive = settings.WEB_KEEPALIVE
+backlog = settings.WEB_BACKLOG
+timeout = settings.WEB_TIMEOUT
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+
+# Reciclado de workers: el jitter evita que todos se reinicien a la vez
+max_requests = settings.WEB_MAX_REQUESTS
+max_requests_jitter = settings.WEB_MAX_REQUESTS_JITTER
+
+# Cada worker importa la app (y arma su pool) después del fork
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    if workers * conexiones_por_worker > settings.DB_MAX_CONNECTIONS:
+        server.log.warning(
+            "WEB_WORKERS=%s puede abrir %s conexiones (DB_MAX_CONNECTIONS=%s)",
+            workers,
+            workers * conexiones_por_worker,
+            settings.DB_MAX_CONNECTIONS,
+        )
+
+
+def worker_exit(server, worker):
+    from app.db.session import engine
+
+    engine.dispose()
@@ -0,0 +1,325 @@
+"""
+Prueba de carga con la mezcla real de operaciones del frontend (asyncio + httpx).
+
+Cada usuario virtual se loguea una vez y después elige operaciones al azar según
+los pesos de MIX: login, listado de tipos, edición de materiales, edición de días
+en meses-jornada, actualización de costos y export a Excel. Las escrituras
+reenvían los valores actuales, así que la base queda igual (pero se recorre
+todo el recálculo). Se corre por escalones de concurrencia y se reporta
+p50/p95/p99 por endpoint y el throughput de saturación.
+
+Uso (stack local con docker compose up -d --build y datos cargados):
+
+    python -m loadtest.mix --pasos 1 4 8 16 32 --duracion 30 --output uvicorn-1w.json
+    python -m loadtest.mix --pesos tipos=50 export_excel=0 --label lecturas
+    python -m loadtest.mix --compare uvicorn-1w.json gunicorn-4w.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+
+MIX: Dict[str, int] = {
+    "login": 5,
+    "tipos": 30,
+    "editar_material": 20,
+    "editar_dia": 15,
+    "actualizar_costo": 15,
+    "export_excel": 5,
+}
+
+
+@dataclass
+class Datos:
+    """Ids descubiertos antes de la carga, con los valores actuales para reenviarlos."""
+
+    tipos: List[int] = field(default_factory=list)
+    materiales: List[Dict[str, Any]] = field(default_factory=list)
+    dias: List[Dict[str, Any]] = field(default_factory=list)
+    costos: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class Muestras:
+    latencias: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errores: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+async def _login(client: httpx.AsyncClient, dni: str, password: str) -> str:
+    resp = await client.post("/auth/login", json={"dni": dni, "password": password})
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+async def descubrir(client: httpx.AsyncClient, max_items: int) -> Datos:
+    datos = Datos()
+
+    tipos = (await client.get("/materiales/tipos")).json()
+    datos.tipos = [tipo["id_tipo_material"] for tipo in tipos]
+    for id_tipo in datos.tipos:
+        for material in (await client.get(f"/materiales/tipo/{id_tipo}")).json():
+            datos.materiales.append(material)
+        if len(datos.materiales) >= max_items:
+            break
+
+    for cliente in (await client.get("/catalogos/clientes")).json():
+        resp = await client.get(f"/meses-jornada/mes-resumen/cliente/{cliente['id_cliente']}")
+        if resp.status_code != 200:
+            continue
+        dias = (await client.get(f"/meses-jornada/dias-mes/mes/{resp.json()['id_mes']}")).json()
+        datos.dias.extend(dias)
+        if len(datos.dias) >= max_items:
+            break
+
+    datos.costos = (await client.get("/costos/")).json()[:max_items]
+    return datos
+
+
+def _operaciones(
+    client: httpx.AsyncClient,
+    datos: Datos,
+    rnd: random.Random,
+    args: argparse.Namespace,
+) -> Dict[str, Callable[[], Awaitable[httpx.Response]]]:
+    async def login() -> httpx.Response:
+        return await client.post("/auth/login", json={"dni": args.dni, "password": args.password})
+
+    async def tipos() -> httpx.Response:
+        return await client.get("/materiales/tipos")
+
+    async def editar_material() -> httpx.Response:
+        material = rnd.choice(datos.materiales)
+        payload = {
+            "costo_unitario": material["costo_unitario"],
+            "cantidad": material.get("cantidad"),
+            "atributos": material.get("atributos") or [],
+        }
+        return await client.put(f"/materiales/{material['id_material']}", json=payload)
+
+    async def editar_dia() -> httpx.Response:
+        dia = rnd.choice(datos.dias)
+        payload = {key: dia[key] for key in ("hs_normales", "hs_50porc", "hs_100porc", "total_horas")}
+        return await client.put(f"/meses-jornada/dias-mes/{dia['id_dia']}", json=payload)
+
+    async def actualizar_costo() -> httpx.Response:
+        costo = rnd.choice(datos.costos)
+        payload = {"costo_unitario": costo["costo_unitario"], "cantidad": costo["cantidad"]}
+        return await client.put(f"/costos/{costo['id_costo']}", json=payload)
+
+    async def export_excel() -> httpx.Response:
+        return await client.get(f"/materiales/tipos/{rnd.choice(datos.tipos)}/excel")
+
+    operaciones = {
+        "login": login,
+        "tipos": tipos,
+        "editar_material": editar_material,
+        "editar_dia": editar_dia,
+        "actualizar_costo": actualizar_costo,
+        "export_excel": export_excel,
+    }
+    # Sin datos para una operación, se saca de la mezcla
+    if not datos.materiales:
+        operaciones.pop("editar_material")
+    if not datos.dias:
+        operaciones.pop("editar_dia")
+    if not datos.costos:
+        operaciones.pop("actualizar_costo")
+    if not datos.tipos:
+        operaciones.pop("export_excel")
+    return operaciones
+
+
+async def _usuario(
+    idx: int,
+    args: argparse.Namespace,
+    datos: Datos,
+    pesos: Dict[str, int],
+    hasta: float,
+    muestras: Muestras,
+) -> None:
+    rnd = random.Random(args.seed + idx)
+    async with httpx.AsyncClient(base_url=args.base_url.rstrip("/") + args.prefix, timeout=args.timeout) as client:
+        client.headers["Authorization"] = f"Bearer {await _login(client, args.dni, args.password)}"
+        operaciones = _operaciones(client, datos, rnd, args)
+        nombres = [nombre for nombre in operaciones if pesos.get(nombre, 0) > 0]
+        if not nombres:
+            return
+        weights = [pesos[nombre] for nombre in nombres]
+
+        while time.perf_counter() < hasta:
+            nombre = rnd.choices(nombres, weights)[0]
+            inicio = time.perf_counter()
+            try:
+                resp = await operaciones[nombre]()
+                ok = resp.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            muestras.latencias[nombre].append(time.perf_counter() - inicio)
+            if not ok:
+                muestras.errores[nombre] += 1
+            if args.pausa_ms:
+                await asyncio.sleep(rnd.uniform(0, 2 * args.pausa_ms) / 1000.0)
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    idx = min(int(round(p / 100.0 * (len(valores) - 1))), len(valores) - 1)
+    return valores[idx] * 1000.0
+
+
+def _resumen(muestras: Muestras, duracion: float) -> Dict[str, Any]:
+    endpoints: Dict[str, Any] = {}
+    total = 0
+    errores = 0
+    for nombre, latencias in sorted(muestras.latencias.items()):
+        latencias.sort()
+        total += len(latencias)
+        errores += muestras.errores.get(nombre, 0)
+        endpoints[nombre] = {
+            "requests": len(latencias),
+            "errores": muestras.errores.get(nombre, 0),
+            "p50_ms": _percentil(latencias, 50),
+            "p95_ms": _percentil(latencias, 95),
+            "p99_ms": _percentil(latencias, 99),
+        }
+    return {
+        "requests": total,
+        "errores": errores,
+        "req_por_seg": (total - errores) / duracion if duracion else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+async def correr(args: argparse.Namespace, pesos: Dict[str, int]) -> Dict[str, Any]:
+    async with httpx.AsyncClient(base_url=args.base_url.rstrip("/") + args.prefix, timeout=args.timeout) as client:
+        client.headers["Authorization"] = f"Bearer {await _login(client, args.dni, args.password)}"
+        datos = await descubrir(client, args.max_items)
+    print(
+        f"Datos: {len(datos.tipos)} tipos, {len(datos.materiales)} materiales, "
+        f"{len(datos.dias)} días, {len(datos.costos)} costos"
+    )
+
+    pasos: List[Dict[str, Any]] = []
+    for concurrencia in args.pasos:
+        muestras = Muestras()
+        inicio = time.perf_counter()
+        hasta = inicio + args.duracion
+        await asyncio.gather(*(_usuario(idx, args, datos, pesos, hasta, muestras) for idx in range(concurrencia)))
+        resumen = _resumen(muestras, time.perf_counter() - inicio)
+        resumen["concurrencia"] = concurrencia
+        pasos.append(resumen)
+        _imprimir_paso(resumen)
+
+    return {
+        "label": args.label,
+        "base_url": args.base_url,
+        "pesos": pesos,
+        "duracion_paso_s": args.duracion,
+        "pasos": pasos,
+        "saturacion": _saturacion(pasos, args.slo_p95_ms),
+    }
+
+
+def _saturacion(pasos: List[Dict[str, Any]], slo_p95_ms: Optional[float]) -> Dict[str, Any]:
+    """
+    Throughput máximo sostenido: el mejor escalón antes de que subir la
+    concurrencia deje de sumar más de un 5% o se rompa el SLO de p95.
+    """
+    mejor: Optional[Dict[str, Any]] = None
+    for paso in pasos:
+        p95 = max((e["p95_ms"] for e in paso["endpoints"].values()), default=0.0)
+        if slo_p95_ms and p95 > slo_p95_ms:
+            break
+        if mejor is not None and paso["req_por_seg"] < mejor["req_por_seg"] * 1.05:
+            break
+        mejor = paso
+    if mejor is None:
+        return {"concurrencia": None, "req_por_seg": 0.0}
+    return {"concurrencia": mejor["concurrencia"], "req_por_seg": mejor["req_por_seg"]}
+
+
+def _imprimir_paso(paso: Dict[str, Any]) -> None:
+    print(
+        f"\nconcurrencia {paso['concurrencia']}: {paso['req_por_seg']:.1f} req/s ok, "
+        f"{paso['requests']} requests, {paso['errores']} errores"
+    )
+    for nombre, e in paso["endpoints"].items():
+        print(
+            f"  {nombre:<18} n={e['requests']:<6} p50 {e['p50_ms']:>8.1f}  p95 {e['p95_ms']:>8.1f}  "
+            f"p99 {e['p99_ms']:>8.1f} ms  errores {e['errores']}"
+        )
+
+
+def compare(baseline_path: str, candidate_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    with open(candidate_path, encoding="utf-8") as fh:
+        candidate = json.load(fh)
+    base_pasos = {p["concurrencia"]: p for p in baseline["pasos"]}
+    print(f"{'concurrencia':<14} {baseline['label']:>14} {candidate['label']:>14} {'cambio':>9}")
+    for paso in candidate["pasos"]:
+        base = base_pasos.get(paso["concurrencia"])
+        if not base:
+            continue
+        cambio = (paso["req_por_seg"] / base["req_por_seg"] - 1.0) * 100.0 if base["req_por_seg"] else 0.0
+        print(f"{paso['concurrencia']:<14} {base['req_por_seg']:>10.1f}r/s {paso['req_por_seg']:>10.1f}r/s {cambio:>8.1f}%")
+    print(
+        f"saturación: {baseline['saturacion']['req_por_seg']:.1f} req/s "
+        f"(c={baseline['saturacion']['concurrencia']}) -> "
+        f"{candidate['saturacion']['req_por_seg']:.1f} req/s (c={candidate['saturacion']['concurrencia']})"
+    )
+
+
+def _parse_pesos(valores: Optional[List[str]]) -> Dict[str, int]:
+    pesos = dict(MIX)
+    for valor in valores or []:
+        nombre, _, peso = valor.partition("=")
+        if nombre not in MIX:
+            raise SystemExit(f"Operación desconocida: {nombre} (opciones: {', '.join(MIX)})")
+        pesos[nombre] = int(peso)
+    return pesos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--prefix", default="/api/v1")
+    parser.add_argument("--dni", default="12345678")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--pasos", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--duracion", type=float, default=30.0, help="segundos por escalón")
+    parser.add_argument("--pausa-ms", type=float, default=0.0, help="pausa media entre operaciones por usuario")
+    parser.add_argument("--pesos", nargs="+", metavar="OP=PESO")
+    parser.add_argument("--slo-p95-ms", type=float, help="corta la saturación cuando algún p95 lo supera")
+    parser.add_argument("--max-items", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "CANDIDATO"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    resultado = asyncio.run(correr(args, _parse_pesos(args.pesos)))
+    saturacion = resultado["saturacion"]
+    print(f"\nSaturación: {saturacion['req_por_seg']:.1f} req/s con concurrencia {saturacion['concurrencia']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(resultado, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Índices secundarios para los filtros de uso frecuente
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+database/schema.sql sólo tenía PKs y UNIQUE. Se agregan B-tree para las FKs y
+columnas que se filtran en cada request y GIN jsonb_path_ops para las
+búsquedas por contenido (@>) en los JSONB. Todo con IF NOT EXISTS para poder
+aplicarlo sobre bases creadas desde schema.sql.
+"""
+import logging
+
+from alembic import context, op
+import sqlalchemy as sa
+from typing import List
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+BTREE = [
+    ("ix_materiales_id_tipo_material", "materiales", ["id_tipo_material"]),
+    ("ix_costos_id_tipo_costo", "costos", ["id_tipo_costo"]),
+    ("ix_diasMes_id_mes_fecha", "diasMes", ["id_mes", "fecha"]),
+    ("ix_itemsObra_id_obra", "itemsObra", ["id_obra"]),
+    ("ix_recursos_id_tipo_recurso", "recursos", ["id_tipo_recurso"]),
+    ("ix_personal_funcion", "personal", ["funcion"]),
+    ("ix_equipos_detalle", "equipos", ["detalle"]),
+]
+
+GIN = [
+    ("ix_materiales_atributos_gin", "materiales", "atributos"),
+    ("ix_costos_itemsObra_gin", "costos", "itemsObra"),
+]
+
+# Ya cubiertas por UNIQUE en schema.sql; sólo se crean si la base no las tiene
+UNICOS = [
+    ("ux_usuarios_dni", "usuarios", "dni"),
+    ("ux_tipos_material_titulo", "tipos_material", "titulo"),
+]
+
+
+def _tabla_real(tabla: str) -> str:
+    """
+    schema.sql crea diasMes/itemsObra sin comillas (quedan como diasmes/
+    itemsobra); el ORM los crea con comillas. Se usa el nombre que exista.
+    """
+    if context.is_offline_mode():
+        return tabla
+    existentes = set(sa.inspect(op.get_bind()).get_table_names())
+    for candidato in (tabla, tabla.lower()):
+        if candidato in existentes:
+            return candidato
+    raise RuntimeError(f'No existe la tabla "{tabla}" (ni "{tabla.lower()}")')
+
+
+def _tiene_indice_sobre(tabla: str, columnas: List[str]) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    existentes = inspector.get_indexes(tabla) + inspector.get_unique_constraints(tabla)
+    return any(entry["column_names"][: len(columnas)] == columnas for entry in existentes)
+
+
+def _faltan_columnas(tabla: str, columnas: List[str]) -> List[str]:
+    inspector = sa.inspect(op.get_bind())
+    existentes = {col["name"] for col in inspector.get_columns(tabla)}
+    return [col for col in columnas if col not in existentes]
+
+
+def upgrade() -> None:
+    offline = context.is_offline_mode()
+    for nombre, tabla, columnas in BTREE:
+        tabla = _tabla_real(tabla)
+        if not offline:
+            faltantes = _faltan_columnas(tabla, columnas)
+            if faltantes:
+                # Bases viejas creadas desde schema.sql (diasMes sin id_mes/fecha)
+                logger.warning('Se omite %s: "%s" no tiene %s', nombre, tabla, ", ".join(faltantes))
+                continue
+            # personal.funcion ya es UNIQUE en schema.sql: no duplicar el índice
+            if _tiene_indice_sobre(tabla, columnas):
+                continue
+        op.create_index(nombre, tabla, columnas, if_not_exists=True)
+
+    for nombre, tabla, columna in GIN:
+        op.create_index(
+            nombre,
+            _tabla_real(tabla),
+            [columna],
+            postgresql_using="gin",
+            postgresql_ops={columna: "jsonb_path_ops"},
+            if_not_exists=True,
+        )
+
+    # En modo --sql no hay base para inspeccionar: se asume el UNIQUE de schema.sql
+    if offline:
+        return
+    for nombre, tabla, columna in UNICOS:
+        tabla = _tabla_real(tabla)
+        if not _tiene_indice_sobre(tabla, [columna]):
+            op.create_index(nombre, tabla, [columna], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    # Los ux_* sólo existen si upgrade() los creó (con el UNIQUE de schema.sql
+    # se omiten y la constraint tiene otro nombre): borrar por nombre no toca esa
+    for nombre, tabla, _ in reversed(UNICOS):
+        op.drop_index(nombre, table_name=_tabla_real(tabla), if_exists=True)
+    for nombre, tabla, _ in reversed(GIN):
+        op.drop_index(nombre, table_name=_tabla_real(tabla), if_exists=True)
+    for nombre, tabla, _ in reversed(BTREE):
+        op.drop_index(nombre, table_name=_tabla_real(tabla), if_exists=True)
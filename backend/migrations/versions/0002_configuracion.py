@@ -0,0 +1,31 @@
+"""Tabla configuracion (clave/valor)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+El router de configuración ya la usaba pero no estaba en database/schema.sql.
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS configuracion (
+          clave VARCHAR(100) PRIMARY KEY,
+          valor TEXT NOT NULL
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    # Puede tener datos cargados desde antes de la migración: no se borra
+    pass
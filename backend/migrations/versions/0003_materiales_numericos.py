@@ -0,0 +1,169 @@
+"""materiales.cantidad numérica y atributos numéricos tipados
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+materiales.cantidad pasa de VARCHAR(50) a DOUBLE PRECISION y, en atributos,
+los valores de headers numéricos (isCantidad, calculados o leídos por un
+cálculo) pasan de string a número JSON.
+
+Una cantidad vacía queda en NULL; si alguna no es un número (por ejemplo
+"1.234,5") la migración falla listando los id_material para corregirlos a
+mano, en lugar de perder el dato. En atributos, los textos que no son números
+finitos quedan como estaban y se avisa cuántos son.
+"""
+import json
+import logging
+import math
+
+import sqlalchemy as sa
+from alembic import context, op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+_NUMERO = r"^[-+]?([0-9]+([.,][0-9]*)?|[.,][0-9]+)([eE][-+]?[0-9]+)?$"
+
+
+def _referencias_atributos(calculo):
+    operaciones = calculo.get("operaciones") or []
+    if not calculo.get("isMultiple"):
+        operaciones = operaciones[:1]
+    for operacion in operaciones:
+        for header_id in operacion.get("headers_atributes") or []:
+            yield int(header_id)
+
+
+def _atributos_numericos(headers_base, headers_atributes):
+    # Copia congelada de app.services.materiales_dependencias.atributos_numericos
+    numericos = set()
+    for header in headers_atributes or []:
+        calculo = header.get("calculo") or {}
+        if header.get("isCantidad") or calculo.get("activo"):
+            numericos.add(int(header["id_header_atribute"]))
+    for header in list(headers_base or []) + list(headers_atributes or []):
+        calculo = header.get("calculo") or {}
+        if calculo.get("activo"):
+            numericos.update(_referencias_atributos(calculo))
+    return numericos
+
+
+def _a_numero(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    texto = str(value).strip()
+    if texto == "":
+        return None
+    try:
+        numero = float(texto.replace(",", "."))
+    except ValueError:
+        return value
+    # "nan"/"inf" los acepta float() pero jsonb no
+    return numero if math.isfinite(numero) else value
+
+
+def upgrade() -> None:
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+          invalidos text;
+        BEGIN
+          SELECT string_agg(format('%s (%L)', id_material, cantidad), ', ' ORDER BY id_material)
+            INTO invalidos
+          FROM (
+            SELECT id_material, cantidad FROM materiales
+            WHERE btrim(cantidad) <> '' AND btrim(cantidad) !~ '{_NUMERO}'
+            ORDER BY id_material
+            LIMIT 50
+          ) t;
+          IF invalidos IS NOT NULL THEN
+            RAISE EXCEPTION 'materiales.cantidad no numérica en id_material: %', invalidos
+              USING HINT = 'Corregir esas cantidades y volver a correr la migración';
+          END IF;
+        END
+        $$
+        """
+    )
+    op.execute(
+        f"""
+        ALTER TABLE materiales
+          ALTER COLUMN cantidad TYPE DOUBLE PRECISION
+          USING CASE
+            WHEN btrim(cantidad) ~ '{_NUMERO}' THEN replace(btrim(cantidad), ',', '.')::double precision
+            ELSE NULL  -- sólo vacías: el bloque anterior rechaza el resto
+          END
+        """
+    )
+
+    if context.is_offline_mode():
+        # La conversión de atributos necesita leer los headers de cada tipo
+        return
+
+    conn = op.get_bind()
+    tipos = conn.execute(sa.text("SELECT id_tipo_material, headers_base, headers_atributes FROM tipos_material"))
+    actualizar = sa.text("UPDATE materiales SET atributos = CAST(:atributos AS jsonb) WHERE id_material = :id")
+    sin_convertir = 0
+    for id_tipo, headers_base, headers_atributes in tipos.fetchall():
+        numericos = _atributos_numericos(headers_base, headers_atributes)
+        if not numericos:
+            continue
+        materiales = conn.execute(
+            sa.text("SELECT id_material, atributos FROM materiales WHERE id_tipo_material = :id"),
+            {"id": id_tipo},
+        ).fetchall()
+        cambios = []
+        for id_material, atributos in materiales:
+            nuevos = [
+                {**attr, "value": _a_numero(attr.get("value"))}
+                if attr.get("id_header_atribute") in numericos
+                else attr
+                for attr in atributos or []
+            ]
+            sin_convertir += sum(
+                1
+                for attr in nuevos
+                if attr.get("id_header_atribute") in numericos and isinstance(attr.get("value"), str)
+            )
+            if nuevos != atributos:
+                cambios.append({"id": id_material, "atributos": json.dumps(nuevos)})
+        if cambios:
+            conn.execute(actualizar, cambios)
+    if sin_convertir:
+        logger.warning("%s valores de atributos numéricos no son números y quedan como texto", sin_convertir)
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        ALTER TABLE materiales
+          ALTER COLUMN cantidad TYPE VARCHAR(50)
+          USING cantidad::text
+        """
+    )
+    # Vuelve los valores numéricos de atributos a string
+    op.execute(
+        """
+        UPDATE materiales m
+        SET atributos = sub.atributos
+        FROM (
+          SELECT id_material,
+                 jsonb_agg(
+                   CASE WHEN jsonb_typeof(attr -> 'value') = 'number'
+                        THEN jsonb_set(attr, '{value}', to_jsonb((attr ->> 'value')))
+                        ELSE attr
+                   END
+                   ORDER BY ord
+                 ) AS atributos
+          FROM materiales, jsonb_array_elements(atributos) WITH ORDINALITY AS a(attr, ord)
+          GROUP BY id_material
+        ) sub
+        WHERE m.id_material = sub.id_material
+        """
+    )
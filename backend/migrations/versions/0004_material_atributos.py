@@ -0,0 +1,59 @@
+"""Tabla material_atributos (copia relacional de materiales.atributos)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Una fila por (material, header de atributo) con el valor numérico y como
+texto, para filtrar/ordenar/sumar por header en SQL. La mantienen los
+eventos after_insert/after_update de Material; acá se crea y se carga con
+los materiales existentes.
+"""
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+_NUMERO = r"^[-+]?([0-9]+([.,][0-9]*)?|[.,][0-9]+)([eE][-+]?[0-9]+)?$"
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS material_atributos (
+          id_material INTEGER NOT NULL REFERENCES materiales(id_material) ON DELETE CASCADE,
+          id_header_atribute INTEGER NOT NULL,
+          id_tipo_material INTEGER NOT NULL,
+          value_num DOUBLE PRECISION,
+          value_text TEXT,
+          PRIMARY KEY (id_material, id_header_atribute)
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_material_atributos_tipo_header_num "
+        "ON material_atributos (id_tipo_material, id_header_atribute, value_num)"
+    )
+    op.execute(
+        f"""
+        INSERT INTO material_atributos (id_material, id_header_atribute, id_tipo_material, value_num, value_text)
+        SELECT m.id_material,
+               (attr ->> 'id_header_atribute')::int,
+               m.id_tipo_material,
+               CASE
+                 WHEN jsonb_typeof(attr -> 'value') = 'number' THEN (attr ->> 'value')::double precision
+                 WHEN btrim(attr ->> 'value') ~ '{_NUMERO}' THEN replace(btrim(attr ->> 'value'), ',', '.')::double precision
+               END,
+               attr ->> 'value'
+        FROM materiales m, jsonb_array_elements(m.atributos) AS attr
+        WHERE attr ? 'id_header_atribute'
+        ON CONFLICT (id_material, id_header_atribute) DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS material_atributos")
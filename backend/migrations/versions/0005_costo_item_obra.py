@@ -0,0 +1,58 @@
+"""Tabla costo_item_obra (copia relacional de costos.itemsObra)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+
+Una fila por (costo, ítem de obra) con cantidad/total/porcentaje asignados,
+para sumar por ítem con un GROUP BY. La mantienen los eventos after_insert/
+after_update de Costo; acá se crea y se carga con los costos existentes.
+"""
+from alembic import op
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS costo_item_obra (
+          id_costo INTEGER NOT NULL REFERENCES costos(id_costo) ON DELETE CASCADE,
+          id_item INTEGER NOT NULL,
+          id_tipo_costo INTEGER NOT NULL,
+          cantidad DOUBLE PRECISION NOT NULL DEFAULT 0,
+          total DOUBLE PRECISION NOT NULL DEFAULT 0,
+          porcentaje DOUBLE PRECISION NOT NULL DEFAULT 0,
+          PRIMARY KEY (id_costo, id_item)
+        )
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_costo_item_obra_id_item ON costo_item_obra (id_item)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_costo_item_obra_tipo_item ON costo_item_obra (id_tipo_costo, id_item)"
+    )
+    # Mismas claves alternativas que acepta la API (idItem/id/id_item, total/costo_total)
+    op.execute(
+        """
+        INSERT INTO costo_item_obra (id_costo, id_item, id_tipo_costo, cantidad, total, porcentaje)
+        SELECT DISTINCT ON (c.id_costo, COALESCE(item ->> 'idItem', item ->> 'id', item ->> 'id_item'))
+               c.id_costo,
+               COALESCE(item ->> 'idItem', item ->> 'id', item ->> 'id_item')::int,
+               c.id_tipo_costo,
+               COALESCE((item ->> 'cantidad')::double precision, 0),
+               COALESCE((item ->> 'total')::double precision, (item ->> 'costo_total')::double precision, 0),
+               COALESCE((item ->> 'porcentaje')::double precision, 0)
+        FROM costos c, jsonb_array_elements(c."itemsObra") WITH ORDINALITY AS a(item, ord)
+        WHERE COALESCE(item ->> 'idItem', item ->> 'id', item ->> 'id_item') IS NOT NULL
+        ORDER BY c.id_costo, COALESCE(item ->> 'idItem', item ->> 'id', item ->> 'id_item'), ord DESC
+        ON CONFLICT (id_costo, id_item) DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS costo_item_obra")
@@ -0,0 +1,103 @@
+"""tabla_versiones y triggers para las tablas del presupuesto de obra
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+tabla_versiones sólo existía en database/schema.sql. Se crea si falta y se
+registran, además de los catálogos, las tablas de las que sale el presupuesto
+de obra (ítems, costos y su asignación a ítems) para que la cache por sección
+sepa cuándo recalcular.
+
+schema.sql crea itemsObra sin comillas (queda itemsobra) y el ORM con comillas:
+el trigger se crea sobre el nombre que exista y recibe el nombre lógico como
+argumento, que es la clave que se guarda en tabla_versiones (la que leen
+presupuesto_obra y el GET condicional). Si no existe ninguno, la migración falla.
+"""
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+_TABLAS_CATALOGO = ["recursos", "tipos_recurso", "personal", "equipos", "tipos_material", "materiales"]
+_TABLAS_PRESUPUESTO = ["obras", "itemsObra", "tipos_costo", "costos", "costo_item_obra"]
+
+
+def _crear_triggers(tablas) -> None:
+    arreglo = ", ".join(f"'{tabla}'" for tabla in tablas)
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+          t TEXT;
+          rel REGCLASS;
+        BEGIN
+          FOREACH t IN ARRAY ARRAY[{arreglo}] LOOP
+            rel := COALESCE(to_regclass(format('%I', t)), to_regclass(format('%I', lower(t))));
+            IF rel IS NULL THEN
+              RAISE EXCEPTION 'tabla_versiones: no existe la tabla "%" (ni "%")', t, lower(t);
+            END IF;
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %s', 'trg_version_' || t, rel);
+            EXECUTE format(
+              'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %s '
+              'FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_tabla(%L)',
+              'trg_version_' || t, rel, t
+            );
+          END LOOP;
+        END;
+        $$
+        """
+    )
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tabla_versiones (
+          tabla VARCHAR(63) PRIMARY KEY,
+          version BIGINT NOT NULL DEFAULT 0,
+          actualizado TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION incrementar_version_tabla() RETURNS trigger AS $$
+        BEGIN
+          -- La clave es el argumento del trigger (nombre lógico) o, sin él, la tabla
+          INSERT INTO tabla_versiones (tabla, version, actualizado)
+          VALUES (COALESCE(TG_ARGV[0], TG_TABLE_NAME), 1, now())
+          ON CONFLICT (tabla) DO UPDATE
+            SET version = tabla_versiones.version + 1,
+                actualizado = now();
+          RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    _crear_triggers(_TABLAS_CATALOGO + _TABLAS_PRESUPUESTO)
+
+
+def downgrade() -> None:
+    # Los triggers de catálogos y la tabla quedan: los usa el GET condicional
+    arreglo = ", ".join(f"'{tabla}'" for tabla in _TABLAS_PRESUPUESTO)
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+          t TEXT;
+          rel REGCLASS;
+        BEGIN
+          FOREACH t IN ARRAY ARRAY[{arreglo}] LOOP
+            rel := COALESCE(to_regclass(format('%I', t)), to_regclass(format('%I', lower(t))));
+            CONTINUE WHEN rel IS NULL;
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %s', 'trg_version_' || t, rel);
+          END LOOP;
+        END;
+        $$
+        """
+    )
+    op.execute(f"DELETE FROM tabla_versiones WHERE tabla IN ({arreglo})")
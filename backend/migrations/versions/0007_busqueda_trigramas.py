@@ -0,0 +1,50 @@
+"""Índices de trigramas para la búsqueda por texto
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+Extensiones pg_trgm y unaccent, el wrapper f_unaccent (unaccent no es
+IMMUTABLE y no se puede usar directo en un índice) y un GIN gin_trgm_ops
+sobre lower(f_unaccent(...)) de cada texto que busca /search. La expresión
+tiene que coincidir con la de app/services/busqueda.py para que se use el
+índice.
+"""
+from alembic import op
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+TRGM = [
+    ("ix_materiales_detalle_trgm", "materiales", "detalle"),
+    ("ix_equipos_detalle_trgm", "equipos", "detalle"),
+    ("ix_personal_funcion_trgm", "personal", "funcion"),
+    ("ix_recursos_descripcion_trgm", "recursos", "descripcion"),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+          LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+          AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        """
+    )
+    for nombre, tabla, columna in TRGM:
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS {nombre} ON {tabla} "
+            f"USING gin (lower(f_unaccent({columna})) gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    for nombre, _, _ in reversed(TRGM):
+        op.execute(f"DROP INDEX IF EXISTS {nombre}")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
+    # Las extensiones quedan: pueden usarlas otros objetos de la base
@@ -0,0 +1,83 @@
+"""
+Control del costo de importar la app (lo que paga cada worker y cada proceso de
+tests al arrancar), usando `python -X importtime`.
+
+Falla si `import app.main` supera el presupuesto o si carga librerías pesadas que
+sólo usan los endpoints de import/export (pandas, openpyxl, numpy):
+
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --budget-ms 800 --top 15
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROHIBIDOS = ("pandas", "openpyxl", "numpy")
+
+_LINEA = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def medir(modulo: str) -> List[Tuple[str, int, int, int]]:
+    """Devuelve (modulo, self_us, cumulativo_us, nivel) por cada import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"No se pudo importar {modulo}:\n{proc.stderr[-2000:]}")
+
+    filas = []
+    for linea in proc.stderr.splitlines():
+        match = _LINEA.match(linea)
+        if match:
+            self_us, cumulativo_us, sangria, nombre = match.groups()
+            filas.append((nombre, int(self_us), int(cumulativo_us), len(sangria) // 2))
+    return filas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modulo", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("IMPORT_TIME_BUDGET_MS", 2000)))
+    parser.add_argument("--top", type=int, default=10, help="paquetes de primer nivel más caros a listar")
+    args = parser.parse_args()
+
+    filas = medir(args.modulo)
+    total_ms = next((cum for nombre, _, cum, _ in filas if nombre == args.modulo), 0) / 1000.0
+
+    por_paquete: Dict[str, int] = {}
+    for nombre, self_us, _, _ in filas:
+        raiz = nombre.split(".")[0]
+        por_paquete[raiz] = por_paquete.get(raiz, 0) + self_us
+
+    print(f"import {args.modulo}: {total_ms:.0f} ms (presupuesto {args.budget_ms:.0f} ms)")
+    for raiz, self_us in sorted(por_paquete.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"  {raiz:<24} {self_us / 1000.0:>8.1f} ms")
+
+    errores = []
+    cargados = sorted({nombre.split(".")[0] for nombre, _, _, _ in filas} & set(PROHIBIDOS))
+    if cargados:
+        errores.append(f"se importan al arrancar: {', '.join(cargados)} (deben cargarse en el endpoint que los usa)")
+    if total_ms > args.budget_ms:
+        errores.append(f"el import tarda {total_ms:.0f} ms, más que el presupuesto de {args.budget_ms:.0f} ms")
+
+    if errores:
+        for error in errores:
+            print(f"ERROR: {error}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -76,6 +76,8 @@ CREATE TABLE mesesResumen (
 --Dias_mes
 CREATE TABLE diasMes (
   id_dia SERIAL PRIMARY KEY,
+  id_mes INTEGER NOT NULL REFERENCES mesesResumen(id_mes) ON DELETE CASCADE,
+  fecha INTEGER NOT NULL,
   dia VARCHAR(8) NOT NULL UNIQUE,
   hs_normales DOUBLE PRECISION NOT NULL,
   hs_50porc DOUBLE PRECISION NOT NULL,
@@ -138,7 +140,7 @@ CREATE TABLE materiales (
   id_tipo_material INTEGER NOT NULL REFERENCES tipos_material(id_tipo_material) ON DELETE CASCADE,
   detalle VARCHAR(255) NOT NULL,
   unidad VARCHAR(50),
-  cantidad VARCHAR(50),
+  cantidad DOUBLE PRECISION,
   costo_unitario DOUBLE PRECISION NOT NULL DEFAULT 0,
   costo_total DOUBLE PRECISION NOT NULL DEFAULT 0,
   atributos JSONB NOT NULL DEFAULT '[]'::jsonb
@@ -169,6 +171,108 @@ CREATE TABLE recursos (
 );
 
 
+-- Configuración global clave/valor (ver app/services/configuracion.py)
+CREATE TABLE configuracion (
+  clave VARCHAR(100) PRIMARY KEY,
+  valor TEXT NOT NULL
+);
+
+-- Índices secundarios (mismo set que backend/migrations/versions/0001)
+CREATE INDEX ix_materiales_id_tipo_material ON materiales (id_tipo_material);
+CREATE INDEX ix_costos_id_tipo_costo ON costos (id_tipo_costo);
+CREATE INDEX ix_diasMes_id_mes_fecha ON diasMes (id_mes, fecha);
+CREATE INDEX ix_itemsObra_id_obra ON itemsObra (id_obra);
+CREATE INDEX ix_recursos_id_tipo_recurso ON recursos (id_tipo_recurso);
+-- personal.funcion ya tiene índice por el UNIQUE
+CREATE INDEX ix_equipos_detalle ON equipos (detalle);
+CREATE INDEX ix_materiales_atributos_gin ON materiales USING gin (atributos jsonb_path_ops);
+CREATE INDEX ix_costos_itemsObra_gin ON costos USING gin ("itemsObra" jsonb_path_ops);
+
+-- Búsqueda por texto (/search): trigramas sobre el texto sin acentos y en minúsculas.
+-- unaccent no es IMMUTABLE; f_unaccent lo envuelve para poder indexarlo.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+  LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+  AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+CREATE INDEX ix_materiales_detalle_trgm ON materiales USING gin (lower(f_unaccent(detalle)) gin_trgm_ops);
+CREATE INDEX ix_equipos_detalle_trgm ON equipos USING gin (lower(f_unaccent(detalle)) gin_trgm_ops);
+CREATE INDEX ix_personal_funcion_trgm ON personal USING gin (lower(f_unaccent(funcion)) gin_trgm_ops);
+CREATE INDEX ix_recursos_descripcion_trgm ON recursos USING gin (lower(f_unaccent(descripcion)) gin_trgm_ops);
+
+-- Copia relacional de materiales.atributos (una fila por atributo), mantenida
+-- por la aplicación al escribir materiales. Sirve para filtrar/ordenar/sumar por header.
+CREATE TABLE material_atributos (
+  id_material INTEGER NOT NULL REFERENCES materiales(id_material) ON DELETE CASCADE,
+  id_header_atribute INTEGER NOT NULL,
+  id_tipo_material INTEGER NOT NULL,
+  value_num DOUBLE PRECISION,
+  value_text TEXT,
+  PRIMARY KEY (id_material, id_header_atribute)
+);
+CREATE INDEX ix_material_atributos_tipo_header_num ON material_atributos (id_tipo_material, id_header_atribute, value_num);
+
+-- Copia relacional de costos."itemsObra" (una fila por costo e ítem de obra),
+-- mantenida por la aplicación. Sirve para sumar costos por ítem con GROUP BY.
+CREATE TABLE costo_item_obra (
+  id_costo INTEGER NOT NULL REFERENCES costos(id_costo) ON DELETE CASCADE,
+  id_item INTEGER NOT NULL,
+  id_tipo_costo INTEGER NOT NULL,
+  cantidad DOUBLE PRECISION NOT NULL DEFAULT 0,
+  total DOUBLE PRECISION NOT NULL DEFAULT 0,
+  porcentaje DOUBLE PRECISION NOT NULL DEFAULT 0,
+  PRIMARY KEY (id_costo, id_item)
+);
+CREATE INDEX ix_costo_item_obra_id_item ON costo_item_obra (id_item);
+CREATE INDEX ix_costo_item_obra_tipo_item ON costo_item_obra (id_tipo_costo, id_item);
+
+-- Versión por tabla para ETag/Last-Modified de los catálogos (GET condicional)
+-- y para invalidar la cache del presupuesto de obra.
+-- Los triggers son FOR EACH STATEMENT: un import masivo incrementa una sola vez.
+CREATE TABLE tabla_versiones (
+  tabla VARCHAR(63) PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  actualizado TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION incrementar_version_tabla() RETURNS trigger AS $$
+BEGIN
+  -- La clave es el argumento del trigger (nombre lógico) o, sin él, la tabla
+  INSERT INTO tabla_versiones (tabla, version, actualizado)
+  VALUES (COALESCE(TG_ARGV[0], TG_TABLE_NAME), 1, now())
+  ON CONFLICT (tabla) DO UPDATE
+    SET version = tabla_versiones.version + 1,
+        actualizado = now();
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+  t TEXT;
+  rel REGCLASS;
+BEGIN
+  FOREACH t IN ARRAY ARRAY[
+    'recursos', 'tipos_recurso', 'personal', 'equipos', 'tipos_material', 'materiales',
+    -- Presupuesto de obra (cache por sección en app/services/presupuesto_obra.py)
+    'obras', 'itemsObra', 'tipos_costo', 'costos', 'costo_item_obra'
+  ] LOOP
+    -- itemsObra se crea sin comillas (queda itemsobra); la clave sigue siendo
+    -- "itemsObra", que es la que lee el backend
+    rel := COALESCE(to_regclass(format('%I', t)), to_regclass(format('%I', lower(t))));
+    IF rel IS NULL THEN
+      RAISE EXCEPTION 'tabla_versiones: no existe la tabla "%" (ni "%")', t, lower(t);
+    END IF;
+    EXECUTE format(
+      'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %s '
+      'FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_tabla(%L)',
+      'trg_version_' || t, rel, t
+    );
+  END LOOP;
+END;
+$$;
+
+
 -- Datos básicos
 --el insert de equipos y personal se hacer a traves de la carga de excel
 
@@ -62,7 +62,7 @@ export interface TipoMaterial {
 
 export interface MaterialAtributo {
   id_header_atribute: number;
-  value: string;
+  value: number | string | null;
 }
 
 export interface Material {
@@ -70,7 +70,7 @@ export interface Material {
   id_tipo_material: number;
   detalle: string;
   unidad: string | null;
-  cantidad: string | null;
+  cantidad: number | null;
   costo_unitario: number;
   costo_total: number;
   atributos: MaterialAtributo[] | null;